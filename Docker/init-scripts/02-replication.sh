@@ -0,0 +1,9 @@
+#!/bin/bash
+# 只读副本（postgres-replica）用的复制账号：pg_basebackup 拉全量备份后按流复制跟随主库
+set -e
+
+psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" <<-EOSQL
+    CREATE ROLE replicator WITH REPLICATION LOGIN PASSWORD '${REPLICATION_PASSWORD:-replicator_pass}';
+EOSQL
+
+echo "host replication replicator all scram-sha-256" >> "$PGDATA/pg_hba.conf"
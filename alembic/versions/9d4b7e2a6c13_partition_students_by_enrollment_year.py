@@ -0,0 +1,248 @@
+"""partition students by enrollment year
+
+Revision ID: 9d4b7e2a6c13
+Revises: 5b8d2f6e1c47
+Create Date: 2026-03-07 13:48:20.517396
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4b7e2a6c13'
+down_revision: Union[str, Sequence[str], None] = '5b8d2f6e1c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    'id, student_id, name, gender, date_of_birth, enrollment_date, major, class_name, email, phone, '
+    'address, gpa, status, change_xid, created_at, updated_at'
+)
+
+
+def _create_table(name: str, partitioned: bool) -> None:
+    """与 students 同结构的新表；分区表主键须包含分区键，学号唯一改由 student_ids 保证"""
+    constraints = (
+        [sa.PrimaryKeyConstraint('id', 'enrollment_date', name=f'{name}_pkey')]
+        if partitioned else
+        [sa.PrimaryKeyConstraint('id', name=f'{name}_pkey'), sa.UniqueConstraint('student_id', name=f'{name}_student_id_key')]
+    )
+    op.create_table(name,
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('students_id_seq'::regclass)"), nullable=False, comment='自增主键ID'),
+    sa.Column('student_id', sa.String(length=64), nullable=False, comment='学号，唯一标识符'),
+    sa.Column('name', sa.String(length=50), nullable=False, comment='学生姓名'),
+    sa.Column('gender', sa.String(length=10), nullable=True, comment='性别，取值范围：male, female, other'),
+    sa.Column('date_of_birth', sa.Date(), nullable=False, comment='出生日期'),
+    sa.Column('enrollment_date', sa.Date(), server_default=sa.text('CURRENT_DATE'), nullable=False,
+              comment='入学日期（分区键）' if partitioned else '入学日期'),
+    sa.Column('major', sa.String(length=100), nullable=False, comment='所属专业名称'),
+    sa.Column('class_name', sa.String(length=50), nullable=False, comment='行政班级名称，例如：计算机2401班'),
+    sa.Column('email', sa.String(length=100), nullable=True, comment='电子邮箱地址'),
+    sa.Column('phone', sa.String(length=20), nullable=True, comment='联系电话/手机号'),
+    sa.Column('address', sa.Text(), nullable=True, comment='家庭或通讯详细地址'),
+    sa.Column('gpa', sa.Numeric(precision=3, scale=2), nullable=True, comment='平均学分绩点（GPA），范围0.00-4.00'),
+    sa.Column('status', sa.String(length=32), server_default='active', nullable=False,
+              comment='学籍状态：active(在读), inactive(休学/离校), graduated(毕业)'),
+    sa.Column('change_xid', sa.BigInteger(), server_default=sa.text('(pg_current_xact_id())::text::bigint'), nullable=False,
+              comment='最后一次写入该行的事务号（增量同步水位）'),
+    sa.Column('created_at', sa.Date(), server_default=sa.text('CURRENT_DATE'), nullable=False),
+    sa.Column('updated_at', sa.Date(), server_default=sa.text('CURRENT_DATE'), nullable=False),
+    *constraints,
+    **({'postgresql_partition_by': 'RANGE (enrollment_date)'} if partitioned else {})
+    )
+
+
+def _swap(new: str) -> None:
+    """复制数据后用 new 替换 students（旧表的索引与触发器随表删除；触发器函数保留）"""
+    op.execute(f"INSERT INTO {new} ({COLUMNS}) SELECT {COLUMNS} FROM students")
+    op.execute("ALTER SEQUENCE students_id_seq OWNED BY NONE")
+    op.drop_table('students')
+    op.rename_table(new, 'students')
+    op.execute(f"ALTER TABLE students RENAME CONSTRAINT {new}_pkey TO students_pkey")
+    op.execute("ALTER SEQUENCE students_id_seq OWNED BY students.id")
+
+
+def _create_indexes() -> None:
+    op.create_index('ix_students_gpa_id', 'students', ['gpa', 'id'], unique=False)
+    op.create_index('ix_students_enrollment_date_id', 'students', ['enrollment_date', 'id'], unique=False)
+    op.create_index('ix_students_name_id', 'students', ['name', 'id'], unique=False)
+    op.create_index('ix_students_major_enrollment_date_id', 'students', ['major', 'enrollment_date', 'id'], unique=False)
+    op.create_index('ix_students_major_gpa_id', 'students', ['major', 'gpa', 'id'], unique=False)
+    op.create_index('ix_students_class_name_gpa_id', 'students', ['class_name', 'gpa', 'id'], unique=False)
+    op.create_index('ix_students_status_enrollment_date_id', 'students', ['status', 'enrollment_date', 'id'], unique=False)
+    op.create_index('ix_students_change_xid_id', 'students', ['change_xid', 'id'], unique=False)
+    op.create_index('ix_students_student_id_pattern', 'students', ['student_id'], unique=False, postgresql_ops={'student_id': 'varchar_pattern_ops'})
+
+
+def _create_triggers() -> None:
+    """重建 students 上的触发器（函数在之前的迁移中已创建）"""
+    op.execute("""
+    CREATE TRIGGER students_bump_version
+    AFTER INSERT OR UPDATE OR DELETE ON students
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+    """)
+    op.execute("""
+    CREATE TRIGGER students_bump_version_truncate
+    AFTER TRUNCATE ON students
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+    """)
+    op.execute("""
+    CREATE TRIGGER students_touch_change_xid
+    BEFORE UPDATE ON students
+    FOR EACH ROW EXECUTE FUNCTION students_touch_change_xid()
+    """)
+    op.execute("""
+    CREATE TRIGGER students_record_tombstones
+    AFTER DELETE ON students
+    REFERENCING OLD TABLE AS deleted_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION students_record_tombstones()
+    """)
+    for prefix, function in (('students_stats', 'students_stats'), ('students_search', 'students_search')):
+        op.execute(f"""
+        CREATE TRIGGER {prefix}_insert AFTER INSERT ON students
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION {function}_apply()
+        """)
+        op.execute(f"""
+        CREATE TRIGGER {prefix}_update AFTER UPDATE ON students
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION {function}_apply()
+        """)
+        op.execute(f"""
+        CREATE TRIGGER {prefix}_delete AFTER DELETE ON students
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION {function}_apply()
+        """)
+        op.execute(f"""
+        CREATE TRIGGER {prefix}_truncate AFTER TRUNCATE ON students
+        FOR EACH STATEMENT EXECUTE FUNCTION {function}_truncate()
+        """)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table('student_ids',
+    sa.Column('student_id', sa.String(length=64), nullable=False, comment='学号（全局唯一）'),
+    sa.Column('id', sa.Integer(), nullable=False, comment='学生主键ID'),
+    sa.PrimaryKeyConstraint('student_id')
+    )
+    # ### end Alembic commands ###
+    # 迁移期间只允许读
+    op.execute("LOCK TABLE students IN EXCLUSIVE MODE")
+    op.execute("INSERT INTO student_ids (student_id, id) SELECT student_id, id FROM students")
+
+    _create_table('students_partitioned', partitioned=True)
+    op.execute("CREATE TABLE students_default PARTITION OF students_partitioned DEFAULT")
+    # 已有数据的各届 + 往前 5 届到下一届
+    op.execute("""
+    DO $$
+    DECLARE
+        y int;
+    BEGIN
+        FOR y IN
+            SELECT DISTINCT extract(year FROM enrollment_date)::int FROM students
+            UNION
+            SELECT generate_series(extract(year FROM current_date)::int - 5, extract(year FROM current_date)::int + 1)
+        LOOP
+            EXECUTE 'CREATE TABLE students_y' || y || ' PARTITION OF students_partitioned FOR VALUES FROM ('
+                || quote_literal(make_date(y, 1, 1)) || ') TO (' || quote_literal(make_date(y + 1, 1, 1)) || ')';
+        END LOOP;
+    END $$
+    """)
+    _swap('students_partitioned')
+    # 索引建在分区表上，各分区自动建对应索引
+    _create_indexes()
+    op.create_index('uq_students_student_id_enrollment_date', 'students', ['student_id', 'enrollment_date'], unique=True)
+    _create_triggers()
+
+    op.execute("""
+    CREATE OR REPLACE FUNCTION students_registry_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO student_ids (student_id, id) SELECT student_id, id FROM new_rows;
+        ELSIF TG_OP = 'DELETE' THEN
+            DELETE FROM student_ids r USING old_rows o WHERE r.student_id = o.student_id;
+        ELSE
+            -- 只处理学号变化的行；先删后插，同一语句内互换学号不会误报冲突
+            DELETE FROM student_ids r USING old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE r.student_id = o.student_id AND n.student_id <> o.student_id;
+            INSERT INTO student_ids (student_id, id)
+            SELECT n.student_id, n.id FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE n.student_id <> o.student_id;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+    CREATE OR REPLACE FUNCTION students_registry_truncate() RETURNS trigger AS $$
+    BEGIN
+        DELETE FROM student_ids;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+    CREATE TRIGGER students_registry_insert AFTER INSERT ON students
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION students_registry_apply()
+    """)
+    op.execute("""
+    CREATE TRIGGER students_registry_update AFTER UPDATE ON students
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION students_registry_apply()
+    """)
+    op.execute("""
+    CREATE TRIGGER students_registry_delete AFTER DELETE ON students
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION students_registry_apply()
+    """)
+    op.execute("""
+    CREATE TRIGGER students_registry_truncate AFTER TRUNCATE ON students
+    FOR EACH STATEMENT EXECUTE FUNCTION students_registry_truncate()
+    """)
+    # 新一届的分区（student-db partitions create）
+    op.execute("""
+    CREATE OR REPLACE FUNCTION create_student_partition(year int) RETURNS text AS $$
+    DECLARE
+        part text := 'students_y' || year;
+        lo text := quote_literal(make_date(year, 1, 1));
+        hi text := quote_literal(make_date(year + 1, 1, 1));
+    BEGIN
+        IF to_regclass(part) IS NOT NULL THEN
+            RETURN part;
+        END IF;
+        EXECUTE 'CREATE TABLE ' || quote_ident(part) || ' (LIKE students INCLUDING DEFAULTS)';
+        IF to_regclass('students_default') IS NOT NULL THEN
+            EXECUTE 'WITH moved AS (DELETE FROM students_default WHERE enrollment_date >= ' || lo
+                || ' AND enrollment_date < ' || hi || ' RETURNING *) INSERT INTO ' || quote_ident(part)
+                || ' SELECT * FROM moved';
+        END IF;
+        EXECUTE 'ALTER TABLE students ATTACH PARTITION ' || quote_ident(part)
+            || ' FOR VALUES FROM (' || lo || ') TO (' || hi || ')';
+        RETURN part;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("ANALYZE students")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # 已归档（摘下）的分区不会并回；students_archive_y* 表保留
+    op.execute("LOCK TABLE students IN EXCLUSIVE MODE")
+    _create_table('students_unpartitioned', partitioned=False)
+    _swap('students_unpartitioned')
+    op.execute("ALTER TABLE students RENAME CONSTRAINT students_unpartitioned_student_id_key TO students_student_id_key")
+    _create_indexes()
+    _create_triggers()
+    op.execute("DROP FUNCTION IF EXISTS create_student_partition(int)")
+    op.execute("DROP FUNCTION IF EXISTS students_registry_truncate()")
+    op.execute("DROP FUNCTION IF EXISTS students_registry_apply()")
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_table('student_ids')
+    # ### end Alembic commands ###
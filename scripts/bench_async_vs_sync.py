@@ -0,0 +1,95 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-02-22 16:20:41
+FilePath: /student_pg_db/scripts/bench_async_vs_sync.py
+'''
+"""
+同步路由 vs 异步路由 压测对比
+用法：
+  # 进程内（ASGITransport，不经过网络）
+  python scripts/bench_async_vs_sync.py --concurrency 500 --requests 5000
+  # 对真实服务压测（先 uvicorn student_pg_db.main:app --workers 1）
+  python scripts/bench_async_vs_sync.py --base-url http://127.0.0.1:8000 --concurrency 2000
+
+同步路由在线程池（默认 40 线程）里执行，并发超过线程数后请求排队，
+高并发下线程全部阻塞在等待连接池上，会出现大量超时（记为 errors）；
+异步路由在事件循环中等待数据库，并发只受连接池大小限制
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List, Optional
+
+import httpx
+
+# 两条路径访问相同的数据，只有执行方式不同
+ENDPOINTS = {
+    "sync": "/students/?limit=20",
+    "async": "/async/students/?limit=20",
+}
+
+
+async def _worker(
+    client: httpx.AsyncClient, path: str, timeout: float,
+    remaining: List[int], latencies: List[float], errors: List[str],
+):
+    while remaining[0] > 0:
+        remaining[0] -= 1
+        started = time.perf_counter()
+        try:
+            # ASGITransport 不受 httpx 超时控制，统一用 wait_for 限时
+            resp = await asyncio.wait_for(client.get(path), timeout)
+            if resp.status_code != 200:
+                errors.append(str(resp.status_code))
+        except Exception as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - started)
+
+
+async def run(name: str, path: str, total: int, concurrency: int, timeout: float, base_url: Optional[str]) -> dict:
+    if base_url:
+        transport, url = None, base_url
+    else:
+        from student_pg_db.main import app
+        transport, url = httpx.ASGITransport(app=app), "http://bench"
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url=url, limits=limits, timeout=None) as client:
+        await client.get(path)  # 预热：建立连接池
+        remaining, latencies, errors = [total], [], []
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            _worker(client, path, timeout, remaining, latencies, errors) for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "name": name,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="同步 / 异步学生列表接口压测对比")
+    parser.add_argument("--requests", "-n", type=int, default=2000, help="每条路径的请求总数")
+    parser.add_argument("--concurrency", "-c", type=int, default=200, help="并发请求数")
+    parser.add_argument("--timeout", type=float, default=10.0, help="单个请求超时（秒），超时计入 errors")
+    parser.add_argument("--base-url", default=None, help="压测已启动的服务；不传则进程内压测")
+    parser.add_argument("--only", choices=list(ENDPOINTS), default=None, help="只压测其中一条路径")
+    args = parser.parse_args()
+
+    names = [args.only] if args.only else list(ENDPOINTS)
+    print(f"{'path':<6} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50(ms)':>9} {'p99(ms)':>9}")
+    for name in names:
+        r = asyncio.run(run(name, ENDPOINTS[name], args.requests, args.concurrency, args.timeout, args.base_url))
+        print(f"{r['name']:<6} {r['requests']:>9} {r['errors']:>7} {r['rps']:>9.1f} {r['p50']:>9.1f} {r['p99']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
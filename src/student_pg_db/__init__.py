@@ -10,22 +10,35 @@ __license__ = "MIT"
 
 
 
-# 公开API
-try:
-    from .config import DatabaseConfig
-    from .database.repository import StudentRepository
-    from .models.students import Student
-    from .schemas.student import StudentStatusEnum
-except ImportError as e:
-    # 友好提示常见导入错误（便于调试）
-    import sys
-    print(f"⚠️  模块导入警告: {e}", file=sys.stderr)
-    print("💡 请确保已运行: poetry install", file=sys.stderr)
-    # 不抛出异常，允许部分功能可用（如版本查询）
+# 公开API：首次访问时才导入（import student_pg_db / student-db --help 不加载 SQLAlchemy 模型与 Pydantic schema）
+_LAZY_EXPORTS = {
+    "DatabaseConfig": ".config",
+    "StudentRepository": ".database.repository",
+    "Student": ".models.students",
+    "StudentStatusEnum": ".schemas.enums",
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    try:
+        value = getattr(import_module(_LAZY_EXPORTS[name], __name__), name)
+    except ImportError as e:
+        # 友好提示常见导入错误（便于调试）
+        import sys
+        print(f"⚠️  模块导入警告: {e}", file=sys.stderr)
+        print("💡 请确保已运行: poetry install", file=sys.stderr)
+        raise
+    globals()[name] = value
+    return value
+
+
 __all__ = [
     "DatabaseConfig",
     "StudentRepository",
     "Student",
     "StudentStatusEnum",
     "__version__",
-]
\ No newline at end of file
+]
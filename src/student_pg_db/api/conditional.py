@@ -0,0 +1,47 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-02-26 11:20:47
+FilePath: /student_pg_db/src/student_pg_db/api/conditional.py
+'''
+"""
+条件 GET（ETag / If-None-Match）
+ETag 未变时直接返回 304，不查询数据行、不序列化
+"""
+from datetime import date, datetime, time, timezone
+from email.utils import format_datetime
+from typing import Dict, Optional, Union
+
+from fastapi import Request, Response
+
+# 要求客户端每次都带 If-None-Match 来校验，而不是直接用本地缓存
+CACHE_CONTROL = "no-cache"
+
+
+def http_date(value: Union[date, datetime]) -> str:
+    """date / datetime -> HTTP 日期（Last-Modified 用，date 按当天 00:00 UTC）"""
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time.min)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def validator_headers(etag: str, last_modified: Optional[Union[date, datetime]] = None) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match 是否命中（弱比较：忽略 W/ 前缀）"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
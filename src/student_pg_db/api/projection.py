@@ -0,0 +1,24 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-05 10:21:36
+FilePath: /student_pg_db/src/student_pg_db/api/projection.py
+'''
+"""
+fields= 查询参数：只返回（并只查询）请求的字段
+"""
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Query
+
+from ..schemas.serializer import RESPONSE_FIELDS, parse_fields
+
+
+def response_fields(
+    fields: Optional[str] = Query(
+        None, description=f"只返回这些字段（逗号分隔），可选：{', '.join(RESPONSE_FIELDS)}"
+    ),
+) -> Optional[Tuple[str, ...]]:
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
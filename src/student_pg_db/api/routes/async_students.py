@@ -0,0 +1,107 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-02-22 15:48:03
+FilePath: /student_pg_db/src/student_pg_db/api/routes/async_students.py
+'''
+"""
+异步学生路由（/async/students）
+与 students.py / main.py 中的同步路由一一对应，但全程 async：
+等待数据库时让出事件循环，不占用线程池，单 worker 可承载大量并发连接
+"""
+import math
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from student_pg_db.core import cache as core_cache
+from student_pg_db.api.routes.students import parse_ids
+from student_pg_db.core.async_session import get_async_session
+from student_pg_db.core.loader import get_async_student_loader
+from student_pg_db.database.async_repository import AsyncStudentRepository
+from student_pg_db.database.loader import AsyncStudentLoader
+from student_pg_db.database.pagination import Cursor, InvalidCursor, SortKey, SortOrder
+from student_pg_db.models.students import Student
+from student_pg_db.schemas.student import (
+    Student as StudentSchema,
+    StudentCreate,
+    StudentListResponse,
+    StudentQuery,
+    StudentResponse,
+    StudentUpdate,
+)
+
+router = APIRouter(prefix="/async/students", tags=["students (async)"])
+
+
+@router.get("/", response_model=list[StudentResponse])
+async def list_students(
+    response: Response,
+    ids: Optional[str] = Query(None, description="按 ID 批量获取（逗号分隔，最多 1000 个），按传入顺序返回"),
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="游标分页：上一页响应头 X-Next-Cursor 的值"),
+    sort_by: SortKey = Query("id", description="游标分页排序字段（id 作为决胜键）"),
+    order: SortOrder = Query("asc", description="排序方向"),
+    db: AsyncSession = Depends(get_async_session),
+    loader: AsyncStudentLoader = Depends(get_async_student_loader),
+):
+    """学生列表（参数与 GET /students/ 相同）；传 ids 时经请求内加载器一次查询，不存在的 ID 跳过"""
+    if ids is not None:
+        return [s for s in await loader.load_many(dict.fromkeys(parse_ids(ids))) if s is not None]
+    repo = AsyncStudentRepository(db)
+    if skip:
+        if cursor:
+            raise HTTPException(status_code=400, detail="cursor 与 skip 不能同时使用")
+        return await repo.list_all(offset=skip, limit=limit)
+    try:
+        rows, next_cursor = await repo.list_keyset(
+            limit=limit,
+            cursor=Cursor.decode(cursor) if cursor else None,
+            sort_by=sort_by,
+            order=order,
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor.encode()
+    return rows
+
+
+@router.get("/query", response_model=StudentListResponse)
+async def query_students(q: Annotated[StudentQuery, Query()], db: AsyncSession = Depends(get_async_session)):
+    """按 StudentQuery 条件筛选学生（语义同 GET /students/query）"""
+    rows, total, exact = await AsyncStudentRepository(db).query(q)
+    return StudentListResponse(
+        data=[StudentSchema.model_validate(row, from_attributes=True) for row in rows],
+        total=total,
+        total_exact=exact,
+        page=q.page,
+        size=q.size,
+        total_pages=math.ceil(total / q.size),
+    )
+
+
+@router.post("", response_model=StudentResponse)
+async def create_student(dto: StudentCreate, db: AsyncSession = Depends(get_async_session)):
+    return await AsyncStudentRepository(db).create(Student(**dto.model_dump()))
+
+@router.get("/{student_id}", response_model=StudentResponse)
+async def get_student(student_id: int, loader: AsyncStudentLoader = Depends(get_async_student_loader)):
+    # 同一请求内其他依赖 / 并发协程的 load 与这里合并为一次查询（单个 ID 时仍共享 singleflight）
+    student = await loader.load(student_id)
+    if not student:
+        raise HTTPException(404, "Student not found")
+    return student
+
+@router.patch("/{student_id}", response_model=StudentResponse)
+async def update_student(student_id: int, data: StudentUpdate, db: AsyncSession = Depends(get_async_session)):
+    # 只更新传入的字段
+    updated = await AsyncStudentRepository(db, cache=core_cache.student_cache).update(student_id, **data.model_dump(exclude_unset=True))
+    if not updated:
+        raise HTTPException(404, "Update failed: Student not found")
+    return updated
+
+@router.delete("/{student_id}")
+async def delete_student(student_id: int, db: AsyncSession = Depends(get_async_session)):
+    await AsyncStudentRepository(db, cache=core_cache.student_cache).delete(student_id)
+    return {"status": "ok"}
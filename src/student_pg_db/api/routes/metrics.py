@@ -0,0 +1,28 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-10 14:37:21
+FilePath: /student_pg_db/src/student_pg_db/api/routes/metrics.py
+'''
+"""
+运行指标（GET /metrics，Prometheus 文本格式）：主库 / 副本 / 异步引擎的连接池状态与借出等待时间，
+以及维护任务用的 psycopg2 连接池（DatabaseConnection）的借出 / 等待 / 占用统计
+指标按进程统计，多 worker 部署时由 Prometheus 分别抓取后汇总
+"""
+from fastapi import APIRouter, Response
+from student_pg_db.core.async_session import async_pool_metrics, get_async_engine
+from student_pg_db.core.connection import DatabaseConnection
+from student_pg_db.core.session import get_engine, pool_metrics
+from student_pg_db.database.pool_metrics import render_pg_pools, render_prometheus
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics")
+def metrics():
+    # 引擎在首次使用时才创建：先确保都已创建（只建连接池对象，不建连接），输出里始终列出所有连接池
+    get_engine()
+    get_async_engine()
+    return Response(
+        render_prometheus([*pool_metrics, async_pool_metrics]) + render_pg_pools(DatabaseConnection.pool_stats()),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
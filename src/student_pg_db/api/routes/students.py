@@ -3,24 +3,356 @@ Author: qifuxiao 867225266@qq.com
 Date: 2026-02-13 05:34:54
 FilePath: /student_pg_db/src/student_pg_db/api/routes/students.py
 '''
-from fastapi import APIRouter, Depends, HTTPException
-from student_pg_db.database.repository import StudentRepository
-from student_pg_db.schemas.student import StudentCreate, StudentOut
+import csv
+import io
+import json
+import math
+from dataclasses import asdict
+from datetime import date
+from decimal import Decimal
+from typing import Annotated, Iterable, Iterator, List, Literal, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.orm import Session
+from student_pg_db.api.projection import response_fields
+from student_pg_db.api.conditional import etag_matches, not_modified, validator_headers
+from student_pg_db.core import cache as core_cache
+from student_pg_db.core import singleflight as core_singleflight
+from student_pg_db.core.session import get_session
+from student_pg_db.database.pagination import ChangeToken, InvalidCursor
+from student_pg_db.database.repository import ROW_COLUMNS, StudentRepository, projection_columns
+from student_pg_db.database.stats import StatsDimension, StudentStatsRepository
+from student_pg_db.models.students import Student
+from student_pg_db.schemas.student import (
+    BulkCreateResponse,
+    BulkItemError,
+    Student as StudentSchema,
+    StudentCreate,
+    StudentListResponse,
+    StudentQuery,
+    StudentChangesResponse,
+    StudentResponse,
+    StudentStatsResponse,
+    StudentUpdate,
+)
+from student_pg_db.schemas.serializer import StudentSerializer, serializer_for
 
 router = APIRouter(prefix="/students", tags=["students"])
 
-@router.post("", response_model=StudentOut)
-def create_student(dto: StudentCreate):
-    return StudentRepository().create_from_schema(dto)
+# 单次批量创建的记录上限
+MAX_BULK_ITEMS = 5000
+# ids= 批量获取的 ID 上限
+MAX_IDS = 1000
+_bulk_adapter = TypeAdapter(List[StudentCreate])
+_serializer = StudentSerializer(ROW_COLUMNS)
+# NDJSON 中无法解析的行的占位；不能用 None，否则 JSON 的 null 项会被当成已报错而静默丢弃
+_UNPARSEABLE = object()
+
+
+def parse_ids(raw: str) -> List[int]:
+    """ids= 查询参数（逗号分隔的整数，最多 MAX_IDS 个）"""
+    try:
+        ids = [int(part) for part in raw.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(400, "ids 必须是逗号分隔的整数")
+    if len(ids) > MAX_IDS:
+        raise HTTPException(400, f"ids 最多 {MAX_IDS} 个")
+    return ids
+
+
+def _parse_bulk_body(body: bytes, content_type: str) -> Tuple[list, List[BulkItemError]]:
+    """解析 JSON 数组或 NDJSON 请求体；NDJSON 中无法解析的行记为该条的错误"""
+    if "ndjson" in content_type:
+        items, errors = [], []
+        for line in body.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                errors.append(BulkItemError(
+                    index=len(items), errors=[{"loc": [], "msg": f"JSON 解析失败: {e.msg}", "type": "json_invalid"}]
+                ))
+                items.append(_UNPARSEABLE)
+        return items, errors
+    try:
+        items = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise HTTPException(400, f"请求体不是合法 JSON: {e.msg}")
+    if not isinstance(items, list):
+        raise HTTPException(422, "请求体必须是 StudentCreate 数组")
+    return items, []
+
+
+def _validate_bulk(items: list) -> Tuple[List[Tuple[int, StudentCreate]], List[BulkItemError]]:
+    """整批一次校验；有失败时剔除失败项后再校验一次剩余记录"""
+    indexes = [i for i, item in enumerate(items) if item is not _UNPARSEABLE]
+    errors: List[BulkItemError] = []
+    try:
+        models = _bulk_adapter.validate_python([items[i] for i in indexes])
+    except ValidationError as e:
+        failed = {}
+        for err in e.errors(include_url=False, include_context=False, include_input=False):
+            failed.setdefault(err["loc"][0], []).append({**err, "loc": list(err["loc"][1:])})
+        for pos, errs in failed.items():
+            item = items[indexes[pos]]
+            errors.append(BulkItemError(
+                index=indexes[pos],
+                student_id=item.get("student_id") if isinstance(item, dict) else None,
+                errors=errs,
+            ))
+        indexes = [i for pos, i in enumerate(indexes) if pos not in failed]
+        models = _bulk_adapter.validate_python([items[i] for i in indexes])
+    return list(zip(indexes, models)), errors
+
+
+def _bulk_insert(db: Session, items: list, errors: List[BulkItemError]) -> BulkCreateResponse:
+    valid, validation_errors = _validate_bulk(items)
+    errors.extend(validation_errors)
+
+    inserted = StudentRepository(db).bulk_create([m.model_dump() for _, m in valid])
+    id_by_student_id = {row.student_id: row.id for row in inserted}
+    ids = []
+    for index, model in valid:
+        # pop：同批重复学号只有第一条算成功
+        new_id = id_by_student_id.pop(model.student_id, None)
+        if new_id is None:
+            errors.append(BulkItemError(
+                index=index,
+                student_id=model.student_id,
+                errors=[{"loc": ["student_id"], "msg": "学号已存在", "type": "unique_violation"}],
+            ))
+        else:
+            ids.append(new_id)
+
+    errors.sort(key=lambda e: e.index)
+    return BulkCreateResponse(created=len(ids), ids=ids, errors=errors)
+
+
+@router.post("/bulk", response_model=BulkCreateResponse)
+async def bulk_create_students(request: Request, db: Session = Depends(get_session)):
+    """
+    批量创建学生：请求体为 StudentCreate 数组（application/json）或逐行 JSON（application/x-ndjson）。
+    整批校验后用一条多行 INSERT 入库；校验失败或学号已存在的记录在 errors 中逐条返回，不影响其它记录。
+    """
+    items, errors = _parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(413, f"单次最多提交 {MAX_BULK_ITEMS} 条记录")
+    # 校验与入库都是同步阻塞操作，放到线程池执行，避免阻塞事件循环
+    return await run_in_threadpool(_bulk_insert, db, items, errors)
+
+
+@router.get("/query", response_model=StudentListResponse)
+def query_students(
+    q: Annotated[StudentQuery, Query()],
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_session),
+):
+    """
+    按 StudentQuery 条件筛选学生（专业/班级/状态/入学年份/GPA 区间/学号前缀/姓名包含）。
+    结果集较小时 total 为精确值；很大时为规划器估算值（total_exact=false），不做全表 count(*)。
+    ETag 为表级版本号，表未变化时返回 304
+    """
+    repo = StudentRepository(db)
+    version = repo.table_version()
+    if version is not None:
+        headers = validator_headers(f'"t{version.version}"', version.updated_at)
+        if etag_matches(request, headers["ETag"]):
+            return not_modified(headers)
+        response.headers.update(headers)
+    rows, total, exact = repo.query(q)
+    return StudentListResponse(
+        data=[StudentSchema.model_validate(row, from_attributes=True) for row in rows],
+        total=total,
+        total_exact=exact,
+        page=q.page,
+        size=q.size,
+        total_pages=math.ceil(total / q.size),
+    )
+
+
+def _json_default(value):
+    if isinstance(value, date):  # 含 datetime
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
 
-@router.get("/{student_id}", response_model=StudentOut)
-def get_student(student_id: int):
-    student = StudentRepository().get_by_id(student_id)
-    if not student:
+def _ndjson_chunks(batches: Iterable[list]) -> Iterator[bytes]:
+    """每批行编码为一段 NDJSON（一行一个对象）"""
+    for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(ROW_COLUMNS, row)), ensure_ascii=False, default=_json_default) + "\n"
+            for row in batch
+        ).encode("utf-8")
+
+
+def _csv_chunks(batches: Iterable[list]) -> Iterator[bytes]:
+    """先输出表头，再每批行编码为一段 CSV（NULL 输出为空字段）"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(ROW_COLUMNS)
+    yield buffer.getvalue().encode("utf-8")  # 表头立即发出，不等第一批数据
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+
+
+@router.get("/stream")
+def stream_students(
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="输出格式"),
+    batch_size: int = Query(1000, ge=100, le=10000, description="服务端游标每次读取的行数"),
+    # scope="request"：会话要等响应流发送完毕后才关闭
+    db: Session = Depends(get_session, scope="request"),
+):
+    """
+    按 id 顺序流式导出全部学生（NDJSON 或 CSV）。
+    数据经服务端游标逐批读取、逐批写出，内存占用与表大小无关，不受 limit 上限约束
+    """
+    batches = StudentRepository(db).stream_rows(batch_size=batch_size)
+    if format == "csv":
+        return StreamingResponse(
+            _csv_chunks(batches),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": 'attachment; filename="students.csv"'},
+        )
+    return StreamingResponse(_ndjson_chunks(batches), media_type="application/x-ndjson")
+
+
+@router.get("/search", response_model=List[StudentResponse])
+def search_students(
+    q: str = Query(..., min_length=1, max_length=50, description="姓名片段、学号前缀或尾号"),
+    limit: int = Query(20, ge=1, le=50),
+    fields: Optional[Tuple[str, ...]] = Depends(response_fields),
+    db: Session = Depends(get_session),
+):
+    """
+    姓名 / 学号模糊搜索（走 student_search 的 GIN 索引），按相关度排序：
+    完全相等 > 前缀匹配 > 包含匹配；单字按姓氏匹配，学号按前缀或尾号匹配
+    """
+    columns = projection_columns(fields, "id")
+    rows = StudentRepository(db).search(q, limit=limit, columns=columns)
+    return Response(serializer_for(columns, fields).dumps_many(rows), media_type="application/json")
+
+
+@router.get("/changes", response_model=StudentChangesResponse)
+def student_changes(
+    since: str = Query("0", description="上一次响应的 next_token；首次同步传 0"),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_session),
+):
+    """
+    增量同步：返回 since 之后新增 / 修改（changed）与删除（deleted）的学生。
+    has_more=true 时用 next_token 继续拉取；TRUNCATE 不会留下墓碑，需要重新全量同步。
+    删除的墓碑保留 30 天（student-db prune-tombstones --retention-days 可调）：
+    next_token 超过保留期未使用时，期间的删除可能已被清理，客户端应从 since=0 重新全量同步
+    """
+    try:
+        token = ChangeToken.decode(since)
+    except InvalidCursor as e:
+        raise HTTPException(400, str(e))
+    batch = StudentRepository(db).changes_since(token, limit=limit)
+    deleted = [{"id": r.id, "student_id": r.student_id} for r in batch.deleted]
+    body = b"".join([
+        b'{"changed":', _serializer.dumps_many(batch.rows),
+        b',"deleted":', json.dumps(deleted, ensure_ascii=False).encode("utf-8"),
+        b',"next_token":', json.dumps(batch.next_token.encode()).encode("utf-8"),
+        b',"has_more":', b"true" if batch.has_more else b"false",
+        b"}",
+    ])
+    return Response(body, media_type="application/json")
+
+
+@router.get("/stats/{dimension}", response_model=StudentStatsResponse)
+def student_stats(
+    dimension: StatsDimension,
+    value: Optional[str] = Query(None, description="只返回该分组"),
+    percentiles: str = Query("50,90", description="GPA 分位数（1-99，逗号分隔）"),
+    db: Session = Depends(get_session),
+):
+    """
+    按维度（all / major / class_name / status / enrollment_year）统计人数、GPA 均值与分位数。
+    数据来自 student_stats 汇总表加上触发器追加的增量，不扫描 students；只读，可走副本。
+    增量的折叠由 student-db fold-stats（定时任务）完成，不在读请求中写库
+    """
+    try:
+        points = [int(p) for p in percentiles.split(",") if p.strip()]
+    except ValueError:
+        raise HTTPException(400, "percentiles 必须是逗号分隔的整数")
+    if any(not 1 <= p <= 99 for p in points):
+        raise HTTPException(400, "percentiles 取值范围为 1-99")
+    groups = StudentStatsRepository(db).groups(dimension, value=value, percentiles=points)
+    return StudentStatsResponse(dimension=dimension, groups=[asdict(g) for g in groups])
+
+
+@router.get("/cache/stats")
+def cache_stats():
+    """get_by_id 缓存命中统计（未启用缓存时 enabled=false）"""
+    cache = core_cache.student_cache
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.snapshot()}
+
+
+@router.get("/singleflight/stats")
+def singleflight_stats():
+    """按 ID 查询的合并统计：coalesced 为等待并共享了他人查询结果的调用次数"""
+    return {
+        "sync": core_singleflight.student_flight.snapshot(),
+        "async": core_singleflight.async_student_flight.snapshot(),
+    }
+
+
+@router.post("", response_model=StudentResponse)
+def create_student(dto: StudentCreate, db: Session = Depends(get_session)):
+    return StudentRepository(db).create(Student(**dto.model_dump()))
+
+@router.get("/{student_id}", response_model=StudentResponse)
+def get_student(
+    student_id: int,
+    request: Request,
+    fields: Optional[Tuple[str, ...]] = Depends(response_fields),
+    db: Session = Depends(get_session),
+):
+    """
+    只查列元组并直接拼 JSON，不经 ORM 对象与 Pydantic 校验。
+    ETag 由 id + 行版本（xmin）组成；带 If-None-Match 时先只查行版本，命中则返回 304，不读整行、不做序列化。
+    传 fields 时缓存未命中只查这些字段的列（不回填缓存）
+    """
+    repo = StudentRepository(db, cache=core_cache.student_cache, flight=core_singleflight.student_flight)
+    if request.headers.get("if-none-match"):
+        version = repo.get_version(student_id)
+        if version is None:
+            raise HTTPException(404, "Student not found")
+        headers = validator_headers(f'"s{student_id}-{version.row_version}"', version.updated_at)
+        if etag_matches(request, headers["ETag"]):
+            return not_modified(headers)
+    columns = None if fields is None else projection_columns(fields, "updated_at")
+    row = repo.get_row(student_id, columns=columns)
+    if row is None:
         raise HTTPException(404, "Student not found")
-    return student
+    columns = columns or ROW_COLUMNS
+    headers = validator_headers(f'"s{student_id}-{row[-1]}"', row[columns.index("updated_at")])
+    return Response(serializer_for(columns, fields).dumps_one(row), media_type="application/json", headers=headers)
+
+@router.patch("/{student_id}", response_model=StudentResponse)
+def update_student(student_id: int, data: StudentUpdate, db: Session = Depends(get_session)):
+    # 只更新传入的字段
+    updated = StudentRepository(db, cache=core_cache.student_cache).update(
+        student_id, **data.model_dump(exclude_unset=True)
+    )
+    if not updated:
+        raise HTTPException(404, "Update failed: Student not found")
+    return updated
 
 @router.delete("/{student_id}")
-def delete_student(student_id: int):
-    StudentRepository().delete(student_id)
-    return {"status": "ok"}
\ No newline at end of file
+def delete_student(student_id: int, db: Session = Depends(get_session)):
+    StudentRepository(db, cache=core_cache.student_cache).delete(student_id)
+    return {"status": "ok"}
@@ -4,45 +4,388 @@ Date: 2026-02-05 09:40:42
 FilePath: /student_pg_db/src/student_pg_db/cli.py
 '''
 import typer
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
+from functools import lru_cache
 from pathlib import Path
-import sys
-import traceback  # ✅ 添加导入
+from typing import Optional
 
-
-from .database.repository import StudentRepository
-from .utils.data_generator import DataGenerator
+# 模块级只导入 typer 与枚举：SQLAlchemy、Faker、rich 等在各命令内部导入，student-db --help 与短命令启动更快
+from .schemas.enums import StudentStatusEnum
 
 app = typer.Typer(
     name="student-db",
     help="Production student database management system",
     add_completion=False
 )
-console = Console()
+
+
+@lru_cache(maxsize=None)
+def get_console():
+    from rich.console import Console
+    return Console()
+
+
+def _seed_worker(worker: int, start: int, count: int, options: dict, queue) -> tuple:
+    """子进程入口：导入一个序号区间，并把进度 (worker, 已导入行数) 发回主进程"""
+    from .database.bulk_loader import seed_range
+
+    stats = seed_range(start, count, on_progress=lambda s: queue.put((worker, s.rows)), **options)
+    return worker, start, stats
 
 
 @app.command()
-def seed(count: int = 100):
-    """一键生成模拟数据 """
-    from .utils.data_generator import DataGenerator
+def seed(
+    count: int = 100,
+    start: int = typer.Option(0, "--start", help="学号序号起点（追加数据时避免与已有学号冲突）"),
+    workers: int = typer.Option(1, "--workers", "-w", help="并行进程数（各自独立连接、学号区间互不重叠）"),
+    chunk_size: int = typer.Option(10_000, "--chunk-size", help="每次 COPY 的行数"),
+    copy_format: str = typer.Option("text", "--format", help="COPY 格式：text 或 binary"),
+    locale: str = typer.Option("zh_CN", "--locale", help="Faker 语言区域"),
+    random_seed: int = typer.Option(None, "--seed", help="随机种子（指定后生成结果可复现）"),
+    direct: bool = typer.Option(
+        False, "--direct/--triggers",
+        help="直接 COPY 进分区，不经 students 触发器，最后全量重建检索词（空库或大批量导入时更快）；默认逐块经触发器维护",
+    ),
+):
+    """一键生成模拟数据（COPY 流式导入，内存占用与 count 无关）"""
+    import multiprocessing
+    import queue as queue_mod
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_EXCEPTION
+    from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeElapsedColumn
+    from rich.table import Table
+    from .core.connection import DatabaseConnection
+    from .database.bulk_loader import split_ranges
+    from .models.student_search import REBUILD_SQL as SEARCH_REBUILD_SQL
+    from .models.student_stats import FOLD_LOCK_KEY, FOLD_SQL
+
+    if copy_format not in ("text", "binary"):
+        raise typer.BadParameter(f"未知的 COPY 格式: {copy_format}（可选 text / binary）")
+    try:
+        ranges = split_ranges(count, workers, start=start)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+
+    progress = Progress(
+        TextColumn("[bold blue]COPY students"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TextColumn("{task.fields[rate]:,.0f} 行/秒"),
+        TimeElapsedColumn(),
+        console=get_console(),
+    )
+    done = {k: 0 for k in range(len(ranges))}
+    results = []
+    with progress, multiprocessing.Manager() as manager, ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+        events = manager.Queue()
+        task = progress.add_task("seed", total=count, rate=0.0)
+        futures = [
+            pool.submit(
+                _seed_worker, k, range_start, range_count,
+                # 每个 worker 使用不同的 seed，结果整体仍可复现
+                dict(locale=locale, seed=None if random_seed is None else random_seed + k,
+                     fmt=copy_format, chunk_size=chunk_size, direct=direct),
+                events,
+            )
+            for k, (range_start, range_count) in enumerate(ranges)
+        ]
+        pending = set(futures)
+        while pending:
+            finished, pending = wait(pending, timeout=0.2, return_when=FIRST_EXCEPTION)
+            while True:
+                try:
+                    worker, rows = events.get_nowait()
+                except queue_mod.Empty:
+                    break
+                done[worker] = rows
+            elapsed = progress.tasks[0].elapsed or 0
+            total_rows = sum(done.values())
+            progress.update(task, completed=total_rows, rate=total_rows / elapsed if elapsed else 0.0)
+            for future in finished:
+                if future.exception():
+                    for other in pending:
+                        other.cancel()
+                    raise future.exception()
+                results.append(future.result())
+
+    # 所有区间导入完成后（direct 时先全量重建检索词）把汇总增量折叠进 student_stats，
+    # 再统一 ANALYZE 一次，刷新规划器统计信息
+    db = DatabaseConnection()
+    db.connect_app()
+    try:
+        if direct:
+            with get_console().status("正在重建检索词（期间 students 暂停写入）..."), db.get_cursor() as cursor:
+                for sql in SEARCH_REBUILD_SQL:
+                    cursor.execute(sql)
+        with db.get_cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (FOLD_LOCK_KEY,))
+            cursor.execute(FOLD_SQL)
+        with db.get_cursor() as cursor:
+            cursor.execute("ANALYZE students")
+    finally:
+        # 导入命令结束即进程退出，关闭本进程的全部连接池
+        DatabaseConnection.close_all_pools()
+
+    table = Table(title="各进程导入统计")
+    table.add_column("Worker", justify="right")
+    table.add_column("学号序号区间")
+    table.add_column("行数", justify="right")
+    table.add_column("耗时(秒)", justify="right")
+    table.add_column("行/秒", justify="right")
+    for worker, range_start, stats in sorted(results, key=lambda r: r[0]):
+        table.add_row(
+            str(worker), f"{range_start}-{range_start + stats.rows - 1}", f"{stats.rows:,}",
+            f"{stats.elapsed:.2f}", f"{stats.rows_per_sec:,.0f}",
+        )
+    get_console().print(table)
+
+    total_rows = sum(stats.rows for _, _, stats in results)
+    wall = progress.tasks[0].elapsed or 0
+    rate = total_rows / wall if wall else 0.0
+    print(f"✅ 成功生成 {total_rows} 条学生数据（{workers} 个进程，合计 {rate:,.0f} 行/秒，{wall:.2f} 秒）")
+
+
+@app.command("rebuild-stats")
+def rebuild_stats():
+    """全量重建 student_stats 汇总表（触发器平时会增量维护，数据不一致时使用）"""
+    from .core.session import session_scope
+    from .database.stats import StudentStatsRepository
+
+    with get_console().status("正在重建汇总表（期间 students 暂停写入）..."):
+        with session_scope() as session:
+            rows = StudentStatsRepository(session).rebuild()
+    print(f"✅ 汇总表重建完成，共 {rows} 行")
+
+
+@app.command("rebuild-search")
+def rebuild_search():
+    """全量重建 student_search 检索词（绕过触发器导入后或数据不一致时使用）"""
+    from sqlalchemy import func, select, text
+    from .core.session import session_scope
+    from .models.student_search import REBUILD_SQL, StudentSearch
+
+    with get_console().status("正在重建检索词（期间 students 暂停写入）..."):
+        with session_scope() as session:
+            for sql in REBUILD_SQL:
+                session.execute(text(sql))
+            rows = session.scalar(select(func.count()).select_from(StudentSearch))
+    print(f"✅ 检索词重建完成，共 {rows} 行")
+
+
+@app.command("fold-stats")
+def fold_stats():
+    """把触发器追加的汇总增量折叠进 student_stats（可由 cron 定期执行；读取时增量同样计入）"""
+    from .core.session import session_scope
+    from .database.stats import StudentStatsRepository
+
+    with session_scope() as session:
+        rows = StudentStatsRepository(session).fold()
+    if rows is None:
+        print("⏭️ 其他会话正在折叠，本次跳过")
+    else:
+        print(f"✅ 折叠完成，更新 {rows} 行汇总")
+
+
+@app.command("prune-tombstones")
+def prune_tombstones(
+    retention_days: Optional[int] = typer.Option(None, "--retention-days", min=1, help="墓碑保留天数（默认 30）"),
+):
+    """清理过期的删除墓碑（可由 cron 每天执行）；超过保留期没有同步的客户端需要从 since=0 重新全量同步"""
+    from datetime import timedelta
+    from .core.session import session_scope
+    from .database.repository import StudentRepository
+    from .models.change_tracking import TOMBSTONE_RETENTION_DAYS
+
+    days = retention_days or TOMBSTONE_RETENTION_DAYS
+    with session_scope() as session:
+        rows = StudentRepository(session).prune_tombstones(timedelta(days=days))
+    print(f"✅ 已清理 {rows} 条超过 {days} 天的墓碑")
+
+
+jobs_app = typer.Typer(help="分块执行的批量修改任务（每块单独提交，可限速、可中断续跑）")
+app.add_typer(jobs_app, name="jobs")
+
+
+def _run_job(name: str, spec, chunk_size: int, pause: float, max_rate: Optional[float], dry_run: bool, restart: bool):
+    from rich.panel import Panel
+    from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeElapsedColumn
+    from .core import cache as core_cache
+    from .core.session import SessionLocal
+    from .database.jobs import ChunkedJobRunner, JobConflict
+
+    with SessionLocal() as session:
+        try:
+            # 缓存配置了 pg 失效通道时，每块提交后把修改的 ID 广播给各 API worker
+            runner = ChunkedJobRunner(
+                session, name, spec, chunk_size=chunk_size, pause=pause, max_rows_per_sec=max_rate,
+                cache=core_cache.student_cache,
+            )
+        except ValueError as e:
+            raise typer.BadParameter(str(e))
+        if dry_run:
+            plan = runner.plan()
+            get_console().print(f"[bold]{name}[/bold] 待处理 {plan.rows:,} 行（每块 {chunk_size} 行，约 {-(-plan.rows // chunk_size)} 块）")
+            # 计划中内联的 ID 数组很长，只保留开头
+            shorten = lambda lines: "\n".join(line if len(line) <= 160 else line[:157] + "..." for line in lines)
+            get_console().print(Panel(shorten(plan.chunk_plan), title="取块查询计划"))
+            if plan.update_plan:
+                get_console().print(Panel(shorten(plan.update_plan), title="按块修改计划（第一块）"))
+            return
+
+        job = runner.checkpoint()
+        # 进度条总数用规划器估算：精确 count(*) 每次运行 / 续跑都要扫描全部匹配的行
+        total = runner.estimate_remaining(0 if restart or job is None else job.last_id)
+        progress = Progress(
+            TextColumn(f"[bold blue]{name}"),
+            BarColumn(),
+            MofNCompleteColumn(),
+            TextColumn("已修改 {task.fields[updated]:,} 行"),
+            TextColumn("{task.fields[rate]:,.0f} 行/秒"),
+            TimeElapsedColumn(),
+            console=get_console(),
+        )
+        with progress:
+            task = progress.add_task("job", total=total, updated=0, rate=0.0)
+            runner.on_progress = lambda p: progress.update(
+                task, completed=p.run_rows, updated=p.rows_updated, rate=p.rows_per_sec
+            )
+            try:
+                result = runner.run(restart=restart)
+            except JobConflict as e:
+                raise typer.BadParameter(str(e))
+            except KeyboardInterrupt:
+                get_console().print(f"[yellow]已中断，检查点已保存：student-db jobs resume {name}[/yellow]")
+                raise typer.Exit(130)
+            # 估算的总数与实际不同：完成时按实际处理的行数收尾
+            progress.update(task, total=result.run_rows, completed=result.run_rows)
+    print(f"✅ 任务 {name} {result.status}：扫描 {result.rows_scanned:,} 行，修改 {result.rows_updated:,} 行，共 {result.chunks} 块")
+
+
+@jobs_app.command("transition")
+def jobs_transition(
+    name: str = typer.Argument(..., help="任务名（中断后用同名续跑）"),
+    from_status: StudentStatusEnum = typer.Option(..., "--from", help="原状态"),
+    to_status: StudentStatusEnum = typer.Option(..., "--to", help="目标状态"),
+    enrollment_year: Optional[int] = typer.Option(None, "--enrollment-year", help="只处理该年入学的学生"),
+    major: Optional[str] = typer.Option(None, "--major", help="只处理该专业"),
+    class_name: Optional[str] = typer.Option(None, "--class-name", help="只处理该班级"),
+    chunk_size: int = typer.Option(1000, "--chunk-size", help="每块（每个事务）的行数"),
+    pause: float = typer.Option(0.0, "--pause", help="块之间暂停的秒数"),
+    max_rate: Optional[float] = typer.Option(None, "--max-rate", help="每秒最多处理的行数"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="只输出待处理行数与查询计划，不修改数据"),
+    restart: bool = typer.Option(False, "--restart", help="忽略已有检查点，从头开始"),
+):
+    """批量修改学籍状态，如整届毕业：jobs transition graduate-2022 --from active --to graduated --enrollment-year 2022"""
+    from .database.jobs import StatusTransition
+
+    spec = StatusTransition(
+        from_status=from_status.value, to_status=to_status.value,
+        enrollment_year=enrollment_year, major=major, class_name=class_name,
+    )
+    _run_job(name, spec, chunk_size, pause, max_rate, dry_run, restart)
+
+
+@jobs_app.command("resume")
+def jobs_resume(
+    name: str = typer.Argument(..., help="任务名"),
+    chunk_size: int = typer.Option(1000, "--chunk-size", help="每块（每个事务）的行数"),
+    pause: float = typer.Option(0.0, "--pause", help="块之间暂停的秒数"),
+    max_rate: Optional[float] = typer.Option(None, "--max-rate", help="每秒最多处理的行数"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="只输出待处理行数与查询计划，不修改数据"),
+):
+    """按保存的参数从检查点继续执行任务"""
+    from .core.session import SessionLocal
+    from .database.jobs import spec_from_job
+    from .models.batch_job import BatchJob
+
+    with SessionLocal() as session:
+        job = session.get(BatchJob, name)
+        if job is None:
+            raise typer.BadParameter(f"任务不存在: {name}")
+        spec = spec_from_job(job)
+    _run_job(name, spec, chunk_size, pause, max_rate, dry_run, restart=False)
+
+
+@jobs_app.command("list")
+def jobs_list():
+    """列出批量修改任务及其检查点"""
+    from rich.table import Table
     from .core.session import SessionLocal
-    
+    from .database.jobs import list_jobs
+
+    table = Table(title="批量修改任务")
+    for column in ("任务", "类型", "状态", "参数", "检查点 ID", "扫描行数", "修改行数", "块数", "最后推进", "错误"):
+        table.add_column(column)
     with SessionLocal() as session:
-        generator = DataGenerator()
-        students = generator.generate_students(count)
-        session.add_all(students)
-        session.commit()
-    print(f"✅ 成功生成 {count} 条学生数据")
+        for job in list_jobs(session):
+            params = ", ".join(f"{k}={v}" for k, v in job.params.items() if v is not None)
+            table.add_row(
+                job.name, job.kind, job.status, params, str(job.last_id), f"{job.rows_scanned:,}",
+                f"{job.rows_updated:,}", str(job.chunks), f"{job.updated_at:%Y-%m-%d %H:%M:%S}", job.error or "",
+            )
+    get_console().print(table)
+
+
+partitions_app = typer.Typer(help="students 按入学年份分区：建分区、归档一届")
+app.add_typer(partitions_app, name="partitions")
+
+
+@partitions_app.command("list")
+def partitions_list():
+    """列出分区与已归档的表（行数为规划器估算值）"""
+    from rich.table import Table
+    from .core.session import SessionLocal
+    from .database.partitions import StudentPartitionManager
+
+    table = Table(title="students 分区")
+    table.add_column("表")
+    table.add_column("范围")
+    table.add_column("估算行数", justify="right")
+    with SessionLocal() as session:
+        manager = StudentPartitionManager(session)
+        for part in manager.partitions():
+            table.add_row(part.name, part.bound, f"{max(part.rows, 0):,}")
+        for part in manager.archives():
+            table.add_row(f"[dim]{part.name}[/dim]", "[dim]已归档[/dim]", f"{max(part.rows, 0):,}")
+    get_console().print(table)
+
+
+@partitions_app.command("create")
+def partitions_create(year: int = typer.Argument(..., help="入学年份")):
+    """为新一届建分区（默认分区中该年份的行会搬进新分区）"""
+    from .core.session import session_scope
+    from .database.partitions import StudentPartitionManager
+
+    with session_scope() as session:
+        name = StudentPartitionManager(session).create(year)
+    print(f"✅ 分区 {name} 已就绪")
+
+
+@partitions_app.command("archive")
+def partitions_archive(
+    year: int = typer.Argument(..., help="入学年份"),
+    yes: bool = typer.Option(False, "--yes", "-y", help="不再确认"),
+):
+    """归档一届：摘下分区（DETACH）改名为 students_archive_y<年份>，代替逐行 DELETE"""
+    from .core.session import session_scope
+    from .database.partitions import StudentPartitionManager
+
+    if not yes:
+        typer.confirm(f"{year} 届学生将从 students 中移出（表保留为 students_archive_y{year}），继续？", abort=True)
+    with session_scope() as session:
+        try:
+            rows = StudentPartitionManager(session).archive(year)
+        except ValueError as e:
+            raise typer.BadParameter(str(e))
+    print(f"✅ 已归档 {rows:,} 行到 students_archive_y{year}")
+
+
 @app.callback()
 def main(
     verbose: bool = typer.Option(False, "--verbose", "-v", help="Enable verbose output")
 ):
     """Student Database Management System - Production Edition"""
     if verbose:
-        console.print(f"[dim]Running in verbose mode[/dim]")
-        console.print(f"[dim]Package location: {Path(__file__).parent.parent}[/dim]")
+        get_console().print(f"[dim]Running in verbose mode[/dim]")
+        get_console().print(f"[dim]Package location: {Path(__file__).parent.parent}[/dim]")
 
 if __name__ == "__main__":
     app()
\ No newline at end of file
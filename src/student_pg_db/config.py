@@ -3,9 +3,10 @@
 """
 
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from functools import lru_cache
 from pathlib import Path
-from dotenv import load_dotenv
+from typing import List, Tuple
 
 def _setup_env():
     """
@@ -20,6 +21,8 @@ def _setup_env():
     else:
         env_file = ".env"
 
+    from dotenv import load_dotenv
+
     env_path = Path(".") / env_file
 
     if env_path.exists():
@@ -29,6 +32,13 @@ def _setup_env():
 
 _setup_env()
 
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
 @dataclass(frozen=True)
 class _DBProfile:
     host: str
@@ -44,9 +54,11 @@ class _DBProfile:
 class DatabaseConfig:
     """
     数据库配置中心（统一对外接口：sync_url / async_url）
+    连接参数在第一次使用时读取环境变量并缓存（进程内快照），环境变量变化后调用 reload()
     """
 
     @classmethod
+    @lru_cache(maxsize=None)
     def _load_profile(cls) -> _DBProfile:
         return _DBProfile(
             host=os.getenv("DB_HOST", "127.0.0.1"),
@@ -59,24 +71,61 @@ class DatabaseConfig:
             app_password=os.getenv("DB_PASSWORD", "student_secure_pass"),
         )
 
-    # ========= 推荐统一接口 =========
-
-    @property
-    def sync_url(self) -> str:
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _load_replica_profiles(cls) -> Tuple[_DBProfile, ...]:
         """
-        SQLAlchemy 同步引擎连接串（Alembic / 同步 ORM 使用）
+        只读副本：DB_REPLICAS=host:port[,host:port...]（端口省略时同主库），账号与库名与主库相同
         """
-        p = self._load_profile()
+        primary = cls._load_profile()
+        profiles = []
+        for item in os.getenv("DB_REPLICAS", "").split(","):
+            host, _, port = item.strip().partition(":")
+            if host:
+                profiles.append(replace(primary, host=host, port=int(port or primary.port)))
+        return tuple(profiles)
+
+    @classmethod
+    def reload(cls) -> None:
+        """清除缓存的连接参数快照（已创建的引擎不受影响）"""
+        cls._load_profile.cache_clear()
+        cls._load_replica_profiles.cache_clear()
+
+    @staticmethod
+    def _sync_url(p: _DBProfile) -> str:
         return (
             f"postgresql+psycopg2://"
             f"{p.app_user}:{p.app_password}@"
             f"{p.host}:{p.port}/{p.app_db_name}"
         )
 
+    # ========= 推荐统一接口 =========
+
+    @property
+    def sync_url(self) -> str:
+        """
+        SQLAlchemy 同步引擎连接串（Alembic / 同步 ORM 使用）
+        """
+        return self._sync_url(self._load_profile())
+
+    @property
+    def replica_sync_urls(self) -> List[str]:
+        """
+        只读副本的同步连接串（未配置时为空列表，读写都走主库；见 core/routing.py）
+        """
+        return [self._sync_url(p) for p in self._load_replica_profiles()]
+
+    @property
+    def replica_max_lag(self) -> float:
+        """
+        副本复制延迟上限（秒），超过后该副本暂不分配读请求
+        """
+        return float(os.getenv("DB_REPLICA_MAX_LAG", 5))
+
     @property
     def async_url(self) -> str:
         """
-        SQLAlchemy Async 引擎连接串（未来 async ORM 使用）
+        SQLAlchemy Async 引擎连接串（core/async_session.py 使用）
         """
         p = self._load_profile()
         return (
@@ -85,6 +134,25 @@ class DatabaseConfig:
             f"{p.host}:{p.port}/{p.app_db_name}"
         )
 
+    @property
+    def pool_options(self) -> dict:
+        """
+        create_engine / create_async_engine 的连接池参数（主库、副本、异步引擎共用，每个进程各自一份）：
+          - DB_POOL_SIZE / DB_MAX_OVERFLOW：常驻连接数 / 高峰时额外允许的连接数
+          - DB_POOL_TIMEOUT：连接用满时等待归还的秒数，超时抛 TimeoutError
+          - DB_POOL_RECYCLE：连接最长使用秒数，到期在下次借出时重连（-1 不限；中间有会断开空闲连接的代理时设置）
+          - DB_POOL_PRE_PING：借出前探活（悲观策略，每次借出多一次往返）；关闭后断线只在执行出错时发现并重连
+          - DB_POOL_USE_LIFO：后进先出，低峰时只有少数连接在用，其余空闲到被 recycle / 服务端回收
+        """
+        return dict(
+            pool_size=int(os.getenv("DB_POOL_SIZE", 10)),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 20)),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", -1)),
+            pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+            pool_use_lifo=_env_bool("DB_POOL_USE_LIFO", False),
+        )
+
     # ========= 向后兼容（避免你现有代码全部改动） =========
 
     @classmethod
@@ -115,3 +183,22 @@ class DatabaseConfig:
             f"user={p.app_user} "
             f"password={p.app_password}"
         )
+
+
+class CacheConfig:
+    """
+    get_by_id 读穿缓存配置（STUDENT_CACHE_SIZE=0 表示关闭）
+    STUDENT_CACHE_CHANNEL=pg 时通过 LISTEN/NOTIFY 在多个 worker 间广播失效
+    """
+
+    @property
+    def size(self) -> int:
+        return int(os.getenv("STUDENT_CACHE_SIZE", 0))
+
+    @property
+    def ttl(self) -> float:
+        return float(os.getenv("STUDENT_CACHE_TTL", 30))
+
+    @property
+    def channel(self) -> str:
+        return os.getenv("STUDENT_CACHE_CHANNEL", "").lower()
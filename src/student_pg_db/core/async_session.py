@@ -0,0 +1,71 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-02-22 15:10:26
+FilePath: /student_pg_db/src/student_pg_db/core/async_session.py
+'''
+"""
+异步引擎与会话（asyncpg 驱动，供 async 路由使用）
+与 core/session.py 的同步栈并行存在：连接在事件循环中复用，不占用线程池
+"""
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from ..config import DatabaseConfig
+from ..database.pool_metrics import PoolMetrics
+
+async_pool_metrics = PoolMetrics("async")
+_factory: Optional[async_sessionmaker] = None
+_factory_lock = threading.Lock()
+
+
+def get_async_session_factory() -> async_sessionmaker:
+    """第一次使用时创建异步引擎与 Session 工厂（与 core/session.py 一样延迟到首次使用）"""
+    global _factory
+    if _factory is None:
+        with _factory_lock:
+            if _factory is None:
+                config = DatabaseConfig()
+                # 1. 创建异步引擎（连接池参数与同步引擎相同，见 DatabaseConfig.pool_options）
+                engine = create_async_engine(
+                    config.async_url,
+                    poolclass=async_pool_metrics.pool_class(AsyncAdaptedQueuePool),
+                    **config.pool_options,
+                )
+                async_pool_metrics.attach(engine.sync_engine)
+                # 2. 创建异步 Session 工厂（commit 后不过期对象，避免序列化时隐式 IO）
+                _factory = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    return _factory
+
+
+def get_async_engine() -> AsyncEngine:
+    return get_async_session_factory().kw["bind"]
+
+
+def __getattr__(name):
+    """兼容旧用法：from core.async_session import async_engine / AsyncSessionLocal"""
+    if name == "async_engine":
+        return get_async_engine()
+    if name == "AsyncSessionLocal":
+        return get_async_session_factory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@asynccontextmanager
+async def async_session_scope() -> AsyncGenerator[AsyncSession, None]:
+    session = get_async_session_factory()()
+    try:
+        yield session
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    async with async_session_scope() as session:
+        yield session
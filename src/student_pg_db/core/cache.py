@@ -0,0 +1,44 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-02-24 10:26:52
+FilePath: /student_pg_db/src/student_pg_db/core/cache.py
+'''
+"""
+进程级 get_by_id 缓存实例（由 CacheConfig 决定是否启用；未启用时为 None），第一次访问时创建
+"""
+import threading
+from typing import Optional
+
+from ..config import CacheConfig, DatabaseConfig
+from ..database.cache import InvalidationChannel, PgNotifyChannel, TTLCache
+
+
+def build_student_cache(config: CacheConfig = CacheConfig()) -> Optional[TTLCache]:
+    if config.size <= 0:
+        return None
+    channel: InvalidationChannel = InvalidationChannel()
+    if config.channel == "pg":
+        channel = PgNotifyChannel(DatabaseConfig.get_app_connection_string())
+    return TTLCache(maxsize=config.size, ttl=config.ttl, channel=channel)
+
+
+_student_cache: Optional[TTLCache] = None
+_built = False
+_lock = threading.Lock()
+
+
+def get_student_cache() -> Optional[TTLCache]:
+    """第一次使用时创建缓存（pg 通道此时才建立监听连接；import 本模块不连数据库）"""
+    global _student_cache, _built
+    if not _built:
+        with _lock:
+            if not _built:
+                _student_cache, _built = build_student_cache(), True
+    return _student_cache
+
+
+def __getattr__(name):
+    """兼容旧用法：core_cache.student_cache"""
+    if name == "student_cache":
+        return get_student_cache()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
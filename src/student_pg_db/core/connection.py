@@ -3,31 +3,47 @@ Author: qifuxiao 867225266@qq.com
 Date: 2026-02-05 11:20:38
 FilePath: /student_pg_db/src/student_pg_db/core/connection.py
 '''
-import psycopg2
+import threading
+from psycopg2.extensions import parse_dsn
 from psycopg2.extras import RealDictCursor
 from contextlib import contextmanager
-from typing import Generator, Optional
+from typing import Dict, Generator, Optional
 from ..config import DatabaseConfig
+from ..database.connection_pool import PgConnectionPool
 
 class DatabaseConnection:
-    _instance: Optional['DatabaseConnection'] = None
-    _connection = None
+    """
+    原生 psycopg2 访问（建库授权、ANALYZE 等维护任务）。
+    每个连接串对应一个进程级连接池，get_cursor() 每次借一个连接、提交或回滚后归还，多个线程可并行执行；
+    连接池的大小由第一次 connect 的参数决定。
+    connect / connect_admin / connect_app 与 get_connection 保持原来的用法：返回本实例从池中借出的一个连接
+    （autocommit 关闭，由调用方提交），该连接一直由本实例占用，直到 close() 归还
+    """
+    _pools: Dict[str, PgConnectionPool] = {}
+    _pools_lock = threading.Lock()
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(DatabaseConnection, cls).__new__(cls)
-        return cls._instance
+    def __init__(self, minconn: int = 1, maxconn: int = 10, timeout: float = 30.0):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self._dsn: Optional[str] = None
+        self._connection = None
 
     def connect(self, connection_string: str):
-        """通用连接方法，支持断线重连"""
-        if self._connection is None or self._connection.closed:
-            try:
-                self._connection = psycopg2.connect(connection_string)
-                self._connection.autocommit = False # 默认显式事务
-            except Exception as e:
-                print(f"❌ 数据库连接失败: {e}")
-                raise
-        return self._connection
+        """通用连接方法：取得（首次调用时创建）该连接串的连接池，返回本实例借出的连接"""
+        if connection_string != self._dsn:
+            self._release()
+        with self._pools_lock:
+            pool = self._pools.get(connection_string)
+            if pool is None:
+                try:
+                    pool = PgConnectionPool(connection_string, self.minconn, self.maxconn, self.timeout)
+                except Exception as e:
+                    print(f"❌ 数据库连接失败: {e}")
+                    raise
+                self._pools[connection_string] = pool
+        self._dsn = connection_string
+        return self.get_connection()
 
     def connect_admin(self):
         return self.connect(DatabaseConfig.get_admin_connection_string())
@@ -37,25 +53,66 @@ class DatabaseConnection:
 
     @contextmanager
     def get_cursor(self) -> Generator:
-        """上下文管理器：自动获取和关闭游标，处理异常"""
-        conn = self.get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        try:
-            yield cursor
-            conn.commit() # 成功则提交
-        except Exception:
-            conn.rollback() # 失败则回滚
-            raise
-        finally:
-            cursor.close()
+        """上下文管理器：借出连接并创建游标，成功则提交、异常则回滚，最后归还连接"""
+        with self.get_pool().connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            try:
+                yield cursor
+                conn.commit() # 成功则提交
+            except Exception:
+                conn.rollback() # 失败则回滚
+                raise
+            finally:
+                cursor.close()
 
     def get_connection(self):
-        if not self._connection or self._connection.closed:
-            raise ConnectionError("数据库未连接，请先调用 connect_admin 或 connect_app")
+        """本实例占用的连接；首次调用或原连接已断开时从池中重新借出"""
+        if self._connection is not None and self._connection.closed:
+            self._release()
+        if self._connection is None:
+            self._connection = self.get_pool().getconn()
         return self._connection
 
+    def get_pool(self) -> PgConnectionPool:
+        pool = self._pools.get(self._dsn) if self._dsn is not None else None
+        if pool is None:
+            raise ConnectionError("数据库未连接，请先调用 connect_admin 或 connect_app")
+        return pool
+
     def close(self):
-        """重要：显式关闭连接，修复测试报错"""
-        if self._connection and not self._connection.closed:
-            self._connection.close()
-            self._connection = None
\ No newline at end of file
+        """
+        归还本实例占用的连接并断开与连接池的关联（维护任务结束时调用；之后需重新 connect）。
+        连接池由同一连接串的所有实例共享，这里不关闭，否则会中断其他实例正在使用的连接
+        """
+        self._release()
+        self._dsn = None
+
+    def _release(self) -> None:
+        conn, self._connection = self._connection, None
+        if conn is None:
+            return
+        pool = self._pools.get(self._dsn) if self._dsn is not None else None
+        if pool is not None:
+            pool.putconn(conn)  # psycopg2 归还时回滚未提交的事务
+        elif not conn.closed:  # 连接池已被 close_all_pools 关闭
+            conn.close()
+
+    @classmethod
+    def close_all_pools(cls) -> None:
+        """关闭进程内全部连接池（进程退出前调用；之后再 connect 会重新创建）"""
+        with cls._pools_lock:
+            pools = list(cls._pools.values())
+            cls._pools.clear()
+        for pool in pools:
+            pool.closeall()
+
+    @classmethod
+    def pool_stats(cls) -> Dict[str, dict]:
+        """各连接池的借出 / 等待 / 占用统计，键为 user@host:port/dbname（不含密码）"""
+        with cls._pools_lock:
+            pools = list(cls._pools.items())
+        stats = {}
+        for dsn, pool in pools:
+            p = parse_dsn(dsn)
+            stats[f"{p.get('user')}@{p.get('host')}:{p.get('port')}/{p.get('dbname')}"] = pool.snapshot()
+        return stats
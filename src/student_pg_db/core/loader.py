@@ -0,0 +1,27 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-03 11:40:09
+FilePath: /student_pg_db/src/student_pg_db/core/loader.py
+'''
+"""
+每个请求一个批量加载器（FastAPI 依赖在同一请求内只求值一次，各处 Depends 拿到的是同一个实例）
+"""
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import cache as core_cache
+from . import singleflight as core_singleflight
+from .async_session import get_async_session
+from .session import get_session
+from ..database.async_repository import AsyncStudentRepository
+from ..database.loader import AsyncStudentLoader, StudentLoader
+from ..database.repository import StudentRepository
+
+
+def get_student_loader(db: Session = Depends(get_session)) -> StudentLoader:
+    return StudentLoader(StudentRepository(db, cache=core_cache.student_cache))
+
+
+def get_async_student_loader(db: AsyncSession = Depends(get_async_session)) -> AsyncStudentLoader:
+    return AsyncStudentLoader(AsyncStudentRepository(db, flight=core_singleflight.async_student_flight))
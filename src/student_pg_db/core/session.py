@@ -5,27 +5,85 @@ FilePath: /student_pg_db/src/student_pg_db/core/session.py
 '''
 
 
-from typing import Generator
+import threading
+from typing import Generator, List, NamedTuple, Optional
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
 from ..config import DatabaseConfig
+from ..database.pool_metrics import PoolMetrics
+from ..database.routing import ReplicaSet, RoutingSession
 
-# 1. 创建引擎（包含连接池配置）
-engine = create_engine(
-    DatabaseConfig().sync_url,
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,
-)
+# 各引擎连接池的指标（GET /metrics）
+pool_metrics: List[PoolMetrics] = []
 
-# 2. 创建 Session 工厂
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+class _SyncStack(NamedTuple):
+    engine: Engine
+    replica_engines: List[Engine]
+    replicas: Optional[ReplicaSet]
+    session_factory: sessionmaker
+
+
+_stack: Optional[_SyncStack] = None
+_stack_lock = threading.Lock()
+
+
+def _create_engine(name: str, url: str, config: DatabaseConfig, **options) -> Engine:
+    """按 DatabaseConfig.pool_options 建引擎，并登记连接池指标"""
+    metrics = PoolMetrics(name)
+    pool_metrics.append(metrics)
+    return metrics.attach(create_engine(url, poolclass=metrics.pool_class(), **config.pool_options, **options))
+
+
+def _build_stack() -> _SyncStack:
+    config = DatabaseConfig()
+    # 1. 创建引擎（连接池参数见 DatabaseConfig.pool_options）
+    engine = _create_engine("primary", config.sync_url, config)
+    # 1.1 只读副本引擎（DB_REPLICAS 未配置时为空，全部读写走主库）；连接设为只读事务，误写会直接报错
+    replica_engines = [
+        _create_engine(f"replica-{i}", url, config, execution_options={"postgresql_readonly": True})
+        for i, url in enumerate(config.replica_sync_urls)
+    ]
+    replicas = ReplicaSet(replica_engines, max_lag=config.replica_max_lag) if replica_engines else None
+    # 2. 创建 Session 工厂（仓储层标记的只读查询分给副本，见 database/routing.py）
+    session_factory = sessionmaker(
+        class_=RoutingSession, autocommit=False, autoflush=False, bind=engine, replicas=replicas
+    )
+    return _SyncStack(engine, replica_engines, replicas, session_factory)
+
+
+def _get_stack() -> _SyncStack:
+    """第一次使用时创建引擎与 Session 工厂（import 本模块不建连接池，CLI 的短命令不付这部分开销）"""
+    global _stack
+    if _stack is None:
+        with _stack_lock:
+            if _stack is None:
+                _stack = _build_stack()
+    return _stack
+
+
+def get_engine() -> Engine:
+    return _get_stack().engine
+
+
+def get_session_factory() -> sessionmaker:
+    return _get_stack().session_factory
+
+
+def __getattr__(name):
+    """兼容旧用法：from core.session import engine / SessionLocal / replica_engines / replicas"""
+    if name == "SessionLocal":
+        return get_session_factory()
+    if name in _SyncStack._fields:
+        return getattr(_get_stack(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 from contextlib import contextmanager
 
 @contextmanager
 def session_scope():
-    session = SessionLocal()
+    session = get_session_factory()()
     try:
         yield session
         session.commit()
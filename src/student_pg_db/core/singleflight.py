@@ -0,0 +1,14 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-04 11:03:27
+FilePath: /student_pg_db/src/student_pg_db/core/singleflight.py
+'''
+"""
+进程级 singleflight 实例：热点 GET /students/{id} 的并发相同查询只占用一个连接
+"""
+from ..database.singleflight import AsyncSingleFlight, SingleFlight
+
+# 同步路由（线程池）
+student_flight = SingleFlight()
+# 异步路由（/async/students，事件循环内）
+async_student_flight = AsyncSingleFlight()
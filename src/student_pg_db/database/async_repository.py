@@ -0,0 +1,189 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-02-22 15:32:48
+FilePath: /student_pg_db/src/student_pg_db/database/async_repository.py
+'''
+"""
+StudentRepository 的异步版本（AsyncSession）
+方法与同步仓储一一对应，SQL 语句构造复用 repository.py 中的公共函数
+"""
+import asyncio
+from typing import Any, Iterable, List, Mapping, Optional, Tuple
+from sqlalchemy import select, delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.students import Student
+from ..schemas.student import StudentQuery
+from .cache import TTLCache
+from .singleflight import AsyncSingleFlight
+from .pagination import SORT_COLUMNS, Cursor, SortKey, SortOrder, keyset_select
+from .repository import (
+    EXACT_COUNT_LIMIT,
+    UpsertResult,
+    build_filters,
+    bulk_create_statement,
+    capped_count_statement,
+    check_cursor,
+    detached_from_snapshot,
+    explain_statement,
+    first_by_student_id,
+    get_many_statement,
+    in_requested_order,
+    insert_statements,
+    page_with_cursor,
+    plan_rows,
+    query_statement,
+    registered_statement,
+    row_snapshot_statement,
+    split_upsert,
+    update_many_statements,
+    upsert_batches,
+)
+
+
+class AsyncStudentRepository:
+    def __init__(
+        self, session: AsyncSession, cache: Optional[TTLCache] = None, flight: Optional[AsyncSingleFlight] = None
+    ):
+        self.session = session
+        # 可选：与同步路由共享的 get_by_id 缓存；异步路由只负责写后失效，避免同步读到异步写之前的旧值
+        self.cache = cache
+        self.flight = flight  # 可选：并发的相同 get_by_id 共享一次查询（只用于只读请求）
+
+    async def create(self, student: Student):
+        self.session.add(student)
+        await self.session.flush()  # 不要 commit
+        return student
+
+    async def bulk_create(self, rows: List[Mapping[str, Any]]) -> List[Any]:
+        """单条多行 INSERT 批量创建；学号已存在的行被跳过，返回实际插入的 (id, student_id)"""
+        first = first_by_student_id(rows)
+        if not first:
+            return []
+        taken = set((await self.session.scalars(registered_statement(list(first)))).all())
+        rows = [row for student_id, row in first.items() if student_id not in taken]
+        if not rows:
+            return []
+        return list((await self.session.execute(bulk_create_statement(rows))).all())
+
+    async def get_by_id(self, id: int) -> Optional[Student]:
+        """按 ID 查询；启用 singleflight 时共享快照，各自在自己的 Session 中重建对象"""
+        if self.flight is None:
+            return await self.session.get(Student, id)
+        snapshot = await self.flight.do(id, lambda: self._load_snapshot(id))
+        if snapshot is None:
+            return None
+        return await self.session.merge(detached_from_snapshot(snapshot), load=False)
+
+    async def _load_snapshot(self, id: int) -> Optional[dict]:
+        row = (await self.session.execute(row_snapshot_statement(id))).first()
+        return None if row is None else row._asdict()
+
+    async def get_many(self, ids: Iterable[int]) -> List[Student]:
+        """按一组 ID 批量查询（一条 = ANY(:ids) 语句），按传入顺序返回；不存在的 ID 跳过"""
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return []
+        rows = (await self.session.scalars(get_many_statement(select(Student), ids))).all()
+        return in_requested_order(rows, ids)
+
+    async def list_all(self, limit: int = 100, offset: int = 0) -> List[Student]:
+        """批量获取学生（默认100条）"""
+        stmt = select(Student).order_by(Student.id).offset(offset).limit(limit)
+        return list((await self.session.scalars(stmt)).all())
+
+    async def list_keyset(
+        self,
+        limit: int = 100,
+        cursor: Optional[Cursor] = None,
+        sort_by: SortKey = "id",
+        order: SortOrder = "asc",
+    ) -> Tuple[List[Student], Optional[Cursor]]:
+        """游标分页（语义同 StudentRepository.list_keyset）"""
+        check_cursor(cursor, sort_by, order)
+        nullable = SORT_COLUMNS[sort_by].nullable
+        in_null_region = nullable and cursor is not None and cursor.value is None
+
+        rows: List[Student] = []
+        if not in_null_region:
+            stmt = keyset_select(select(Student), sort_by, order, cursor).limit(limit + 1)
+            rows = list((await self.session.scalars(stmt)).all())
+        if nullable and len(rows) <= limit:
+            stmt = keyset_select(
+                select(Student), sort_by, order, cursor if in_null_region else None, null_region=True
+            ).limit(limit + 1 - len(rows))
+            rows += (await self.session.scalars(stmt)).all()
+        return page_with_cursor(rows, limit, sort_by, order)
+
+    async def query(self, q: StudentQuery) -> Tuple[List[Student], int, bool]:
+        """按 StudentQuery 筛选 + 排序 + 分页，返回 (本页数据, 总数, 总数是否精确)"""
+        filters = build_filters(q)
+        rows = list((await self.session.scalars(query_statement(q, filters))).all())
+        total, exact = await self.count(filters)
+        return rows, total, exact
+
+    async def count(self, filters: list, limit: Optional[int] = None) -> Tuple[int, bool]:
+        """有上限的精确计数，超过上限时改用规划器估算"""
+        limit = EXACT_COUNT_LIMIT if limit is None else limit
+        n = await self.session.scalar(capped_count_statement(filters, limit))
+        if n <= limit:
+            return n, True
+        return max(await self.estimate_rows(select(Student.id).where(*filters)), n), False
+
+    async def estimate_rows(self, stmt) -> int:
+        """EXPLAIN 取规划器估算行数（不执行查询）"""
+        sql, params = explain_statement(stmt, self.session.get_bind().dialect)
+        conn = await self.session.connection()
+        return plan_rows((await conn.exec_driver_sql(sql, params)).scalar())
+
+    async def update(self, id: int, **kwargs) -> Optional[Student]:
+        """更新学生信息 """
+        stmt = update(Student).where(Student.id == id).values(**kwargs).returning(Student)
+        result = await self.session.execute(stmt)
+        await self.session.commit()
+        await self._invalidate([id])
+        return result.scalar_one_or_none()
+
+    async def update_many(
+        self, changes: Iterable[Tuple[int, Mapping[str, Any]]], batch_size: int = 1000
+    ) -> List[Any]:
+        """批量修改（每批一条 UPDATE ... FROM (VALUES ...)），返回修改后的整行列元组；不 commit"""
+        updated: List[Any] = []
+        for stmt in update_many_statements(changes, batch_size):
+            updated += (await self.session.execute(stmt)).all()
+        await self._invalidate([row.id for row in updated])
+        return updated
+
+    async def delete(self, id: int) -> bool:
+        """删除学生记录 """
+        stmt = delete(Student).where(Student.id == id)
+        result = await self.session.execute(stmt)
+        await self.session.commit()
+        await self._invalidate([id])
+        return result.rowcount > 0
+
+    async def _invalidate(self, ids: List[int]) -> None:
+        """失效缓存条目；PgNotifyChannel 的广播是阻塞调用，放到线程中执行，不阻塞事件循环"""
+        if self.cache is None or not ids:
+            return
+
+        def invalidate() -> None:
+            for id in ids:
+                self.cache.invalidate(id)
+
+        await asyncio.to_thread(invalidate)
+
+    async def bulk_upsert(self, rows: Iterable[Mapping[str, Any]], batch_size: int = 1000) -> UpsertResult:
+        """按 student_id 批量 upsert，不 commit（语义同 StudentRepository.bulk_upsert）"""
+        result = UpsertResult()
+        for batch in upsert_batches(rows, batch_size):
+            registered = dict(
+                (student_id, id)
+                for student_id, id in await self.session.execute(registered_statement(list(batch), True))
+            )
+            changes, new_rows = split_upsert(batch, registered)
+            updated = await self.update_many(changes, batch_size)
+            for stmt in insert_statements(new_rows):
+                await self.session.execute(stmt)
+            result.inserted += len(new_rows)
+            result.updated += len(updated)
+        return result
@@ -0,0 +1,307 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-02-18 09:12:30
+FilePath: /student_pg_db/src/student_pg_db/database/bulk_loader.py
+'''
+"""
+基于 COPY ... FROM STDIN 的批量导入引擎
+职责：把行元组流按固定大小分块编码（text / binary），逐块 COPY 进 PostgreSQL
+设计原则：
+  1. 只持有当前分块，内存占用与总行数无关
+  2. 不提交事务（与 StudentRepository 一致，由调用方决定何时 commit）
+direct=True 时按入学年份直接 COPY 进各分区，students 上的语句级触发器不触发：
+  - 学号登记与汇总增量在导入结束时、同一事务内按本事务写入的行一次性补齐（学号重复同样报主键冲突）
+  - 检索词不维护，全部导入结束后由调用方执行一次 student_search.REBUILD_SQL（seed --direct 自动执行）
+代价：检索词全量重建与 students 总行数成正比，且期间阻塞 students 写入与检索请求，
+适合空库或导入量与现有数据相当的场景；向大表追加少量数据仍应走触发器。
+direct 导入的事务中不能有其他 students 写入（会被当作本次导入的行重复登记）
+"""
+import io
+import struct
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Literal, Optional, Sequence, Tuple
+
+import psycopg2
+from sqlalchemy import BigInteger, Date, DateTime, Integer, Numeric, SmallInteger, String, Text
+
+from ..config import DatabaseConfig
+from ..models.student_partitions import DEFAULT_PARTITION, partition_name, register_sql
+from ..models.student_stats import add_sql
+from ..models.students import Student
+
+CopyFormat = Literal["text", "binary"]
+
+_PG_EPOCH_DATE = date(2000, 1, 1)
+_PG_EPOCH_DATETIME = datetime(2000, 1, 1)
+_BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+_BINARY_TRAILER = struct.pack(">h", -1)
+_TEXT_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+# 本事务写入的 students 行（INSERT / COPY 时 change_xid 默认为当前事务号，走 change_xid 索引）
+LOADED_ROWS = "(SELECT * FROM students WHERE change_xid = pg_current_xact_id()::text::bigint)"
+# direct 导入后补齐学号登记与汇总增量（与触发器的 INSERT 分支等价）
+DERIVED_SQL = [register_sql(LOADED_ROWS), add_sql(LOADED_ROWS)]
+
+
+@dataclass
+class LoadStats:
+    """导入进度统计"""
+    rows: int = 0
+    chunks: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+
+# ==================== text 格式编码 ====================
+def _text_field(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, Enum):
+        value = value.value
+    if isinstance(value, str):
+        return value.translate(_TEXT_ESCAPES)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_text(rows: Iterable[Sequence]) -> bytes:
+    """按 COPY text 格式编码（制表符分隔、\\N 表示 NULL）"""
+    return "".join(
+        "\t".join(_text_field(v) for v in row) + "\n" for row in rows
+    ).encode("utf-8")
+
+
+# ==================== binary 格式编码 ====================
+def _encode_numeric(value) -> bytes:
+    """Decimal -> PostgreSQL numeric 二进制表示（base 10000 分组）"""
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    sign, digits, exp = value.as_tuple()
+    if not isinstance(exp, int):
+        raise ValueError(f"不支持的 numeric 值: {value}")
+    dscale = max(0, -exp)
+    digit_str = "".join(map(str, digits))
+    if exp > 0:
+        int_part, frac_part = digit_str + "0" * exp, ""
+    elif -exp >= len(digit_str):
+        int_part, frac_part = "", "0" * (-exp - len(digit_str)) + digit_str
+    else:
+        int_part, frac_part = digit_str[:exp or None], digit_str[len(digit_str) + exp:]
+
+    int_part = int_part.zfill((len(int_part) + 3) // 4 * 4)
+    frac_part = frac_part.ljust((len(frac_part) + 3) // 4 * 4, "0")
+    groups = [int(int_part[i:i + 4]) for i in range(0, len(int_part), 4)]
+    weight = len(groups) - 1
+    groups += [int(frac_part[i:i + 4]) for i in range(0, len(frac_part), 4)]
+
+    while groups and groups[0] == 0:
+        groups.pop(0)
+        weight -= 1
+    while groups and groups[-1] == 0:
+        groups.pop()
+    if not groups:
+        weight, sign = 0, 0
+
+    return struct.pack(
+        f">hhHH{len(groups)}H", len(groups), weight, 0x4000 if sign else 0, dscale, *groups
+    )
+
+
+def _encode_date(value: date) -> bytes:
+    return struct.pack(">i", (value - _PG_EPOCH_DATE).days)
+
+
+def _encode_timestamp(value: datetime) -> bytes:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = value - _PG_EPOCH_DATETIME
+    return struct.pack(">q", (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds)
+
+
+def _encode_str(value) -> bytes:
+    if isinstance(value, Enum):
+        value = value.value
+    return str(value).encode("utf-8")
+
+
+def _binary_encoder(column) -> Callable[[object], bytes]:
+    """根据列的 SQLAlchemy 类型选择二进制编码器（类型必须与表定义严格一致）"""
+    col_type = column.type
+    if isinstance(col_type, (String, Text)):
+        return _encode_str
+    if isinstance(col_type, DateTime):
+        return _encode_timestamp
+    if isinstance(col_type, Date):
+        return _encode_date
+    if isinstance(col_type, Numeric):
+        return _encode_numeric
+    if isinstance(col_type, BigInteger):
+        return lambda v: struct.pack(">q", v)
+    if isinstance(col_type, SmallInteger):
+        return lambda v: struct.pack(">h", v)
+    if isinstance(col_type, Integer):
+        return lambda v: struct.pack(">i", v)
+    raise TypeError(f"列 {column.name} 的类型 {col_type!r} 暂不支持 binary COPY")
+
+
+def encode_binary(rows: Iterable[Sequence], encoders: Sequence[Callable[[object], bytes]]) -> bytes:
+    """按 COPY binary 格式编码（含文件头与结束标记）"""
+    out = [_BINARY_HEADER]
+    field_count = struct.pack(">h", len(encoders))
+    for row in rows:
+        out.append(field_count)
+        for value, encode in zip(row, encoders):
+            if value is None:
+                out.append(b"\xff\xff\xff\xff")
+            else:
+                data = encode(value)
+                out.append(struct.pack(">i", len(data)))
+                out.append(data)
+    out.append(_BINARY_TRAILER)
+    return b"".join(out)
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def _chunked(rows: Iterable[Sequence], size: int) -> Iterator[List[Sequence]]:
+    it = iter(rows)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+class CopyLoader:
+    """COPY 批量导入器（基于 psycopg2 DBAPI 连接）"""
+
+    def __init__(
+        self,
+        connection,
+        columns: Sequence[str],
+        table=Student.__table__,
+        fmt: CopyFormat = "text",
+        chunk_size: int = 10_000,
+        direct: bool = False,
+    ):
+        if fmt not in ("text", "binary"):
+            raise ValueError(f"未知的 COPY 格式: {fmt}（可选 text / binary）")
+        if chunk_size < 1:
+            raise ValueError("chunk_size 必须大于 0")
+        if direct and (table is not Student.__table__ or "enrollment_date" not in columns):
+            raise ValueError("direct 导入只支持 students 表，且列中须包含 enrollment_date")
+        self.connection = connection
+        self.columns = tuple(columns)
+        self.table = table
+        self.fmt = fmt
+        self.chunk_size = chunk_size
+        self.direct = direct
+        self._partitions: Optional[set] = None  # direct 导入时 students 当前的分区名，每次 load 重新读取
+        self._encoders = [_binary_encoder(table.c[name]) for name in self.columns]
+
+    def copy_sql(self, target: str) -> str:
+        return f"COPY {target} ({', '.join(self.columns)}) FROM STDIN WITH (FORMAT {self.fmt})"
+
+    def encode(self, rows: Iterable[Sequence]) -> bytes:
+        if self.fmt == "binary":
+            return encode_binary(rows, self._encoders)
+        return encode_text(rows)
+
+    def _by_partition(self, cursor, chunk: List[Sequence]) -> Iterator[Tuple[str, List[Sequence]]]:
+        """把一块行按入学年份分到各分区（没有对应分区的年份进入默认分区）"""
+        if self._partitions is None:
+            cursor.execute(
+                "SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = %s::regclass",
+                (self.table.name,),
+            )
+            self._partitions = {name for name, in cursor.fetchall()}
+        column = self.columns.index("enrollment_date")
+        groups = defaultdict(list)
+        for row in chunk:
+            target = partition_name(_as_date(row[column]).year)
+            groups[target if target in self._partitions else DEFAULT_PARTITION].append(row)
+        return iter(groups.items())
+
+    def load(
+        self,
+        rows: Iterable[Sequence],
+        on_progress: Optional[Callable[[LoadStats], None]] = None,
+    ) -> LoadStats:
+        """
+        逐块 COPY 导入；每块完成后回调 on_progress。不提交事务。
+        direct=True 时最后补齐学号登记与汇总增量（见模块说明），同一事务内只应调用一次
+        """
+        stats = LoadStats()
+        started = time.perf_counter()
+        self._partitions = None
+        with self.connection.cursor() as cursor:
+            for chunk in _chunked(rows, self.chunk_size):
+                targets = self._by_partition(cursor, chunk) if self.direct else [(self.table.name, chunk)]
+                for target, part in targets:
+                    cursor.copy_expert(self.copy_sql(target), io.BytesIO(self.encode(part)))
+                stats.rows += len(chunk)
+                stats.chunks += 1
+                stats.elapsed = time.perf_counter() - started
+                if on_progress:
+                    on_progress(stats)
+            if self.direct:
+                for sql in DERIVED_SQL:
+                    cursor.execute(sql)
+        stats.elapsed = time.perf_counter() - started
+        return stats
+
+
+# ==================== 多进程分段导入 ====================
+def split_ranges(count: int, workers: int, start: int = 0) -> List[Tuple[int, int]]:
+    """把序号区间 [start, start+count) 切成至多 workers 段互不重叠的 (起点, 行数)"""
+    if count < 1:
+        raise ValueError("count 必须大于 0")
+    if start < 0:
+        raise ValueError("start 不能为负数")
+    if workers < 1:
+        raise ValueError("workers 必须大于 0")
+    base, extra = divmod(count, workers)
+    ranges, offset = [], start
+    for k in range(workers):
+        size = base + (1 if k < extra else 0)
+        if size:
+            ranges.append((offset, size))
+        offset += size
+    return ranges
+
+
+def seed_range(
+    start: int,
+    count: int,
+    *,
+    locale: str = "zh_CN",
+    seed: Optional[int] = None,
+    fmt: CopyFormat = "text",
+    chunk_size: int = 10_000,
+    direct: bool = False,
+    on_progress: Optional[Callable[[LoadStats], None]] = None,
+) -> LoadStats:
+    """用独立连接生成并导入一个序号区间，成功后提交（多进程 worker 入口）；direct 见 CopyLoader"""
+    from ..utils.data_generator import DataGenerator
+
+    conn = psycopg2.connect(DatabaseConfig.get_app_connection_string())
+    try:
+        loader = CopyLoader(conn, DataGenerator.ROW_COLUMNS, fmt=fmt, chunk_size=chunk_size, direct=direct)
+        rows = DataGenerator(locale, seed=seed).iter_rows(count, start=start, batch_size=chunk_size)
+        stats = loader.load(rows, on_progress=on_progress)
+        conn.commit()
+        return stats
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
@@ -0,0 +1,239 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-02-24 09:41:15
+FilePath: /student_pg_db/src/student_pg_db/database/cache.py
+'''
+"""
+进程内读穿缓存（StudentRepository.get_by_id 使用）
+职责：按主键缓存学生行快照，容量有上限（LRU 淘汰）且带 TTL
+设计原则：
+  1. 只缓存列值快照，不缓存绑定到某个 Session 的 ORM 对象
+  2. 写操作（update / delete）提交后失效对应条目
+  3. 跨 worker 失效通过可插拔的 InvalidationChannel 广播（默认不广播，只靠 TTL 兜底）
+"""
+import logging
+import select
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Hashable, Optional
+
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+# 广播"清空全部"时使用的特殊键
+ALL_KEYS = "*"
+
+
+@dataclass
+class CacheStats:
+    """命中统计（用于调整容量与 TTL）"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0  # 因容量上限被 LRU 淘汰
+    expirations: int = 0  # 因 TTL 过期被丢弃
+    invalidations: int = 0  # 因写操作 / 广播被失效
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class InvalidationChannel:
+    """跨 worker 失效通道：publish 广播失效的键，listen 注册收到广播时的回调。默认实现什么也不做"""
+
+    def publish(self, key: Hashable) -> None:
+        pass
+
+    def listen(self, callback: Callable[[str], None]) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class PgNotifyChannel(InvalidationChannel):
+    """
+    基于 PostgreSQL LISTEN / NOTIFY 的失效通道（后台线程监听，忽略本进程发出的通知）。
+    发送连接在第一次 publish 时才建立；连接断开时重连重试一次，仍失败只记日志不抛出：
+    调用方的写操作已经提交，广播失败由其他 worker 的 TTL 兜底，不能让已成功的写请求返回 500
+    """
+
+    def __init__(self, connection_string: str, channel: str = "student_cache", poll_interval: float = 1.0):
+        self.channel = channel
+        self.poll_interval = poll_interval
+        self._publisher = None
+        self._publisher_pid: Optional[int] = None
+        self._connection_string = connection_string
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _connect_publisher(self):
+        publisher = psycopg2.connect(self._connection_string)
+        publisher.autocommit = True
+        self._publisher, self._publisher_pid = publisher, publisher.get_backend_pid()
+        return publisher
+
+    def publish(self, key: Hashable) -> None:
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    publisher = self._publisher
+                    if publisher is None or publisher.closed:
+                        publisher = self._connect_publisher()
+                    with publisher.cursor() as cursor:
+                        cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, str(key)))
+                    return
+                except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                    self._close_publisher()
+                    if attempt:
+                        logger.warning("缓存失效广播失败（key=%s），其他 worker 依赖 TTL 过期: %s", key, e)
+
+    def _close_publisher(self) -> None:
+        if self._publisher is not None and not self._publisher.closed:
+            self._publisher.close()
+        self._publisher = None
+
+    def listen(self, callback: Callable[[str], None]) -> None:
+        # 先同步建立监听连接，返回后发出的通知不会漏掉；连不上时由后台线程重试
+        try:
+            listener = self._listen_connection()
+        except psycopg2.OperationalError as e:
+            logger.warning("缓存失效监听连接失败，稍后重连: %s", e)
+            listener = None
+        self._thread = threading.Thread(
+            target=self._loop, args=(callback, listener), name="student-cache-listener", daemon=True
+        )
+        self._thread.start()
+
+    def _listen_connection(self):
+        listener = psycopg2.connect(self._connection_string)
+        listener.autocommit = True
+        with listener.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return listener
+
+    def _loop(self, callback: Callable[[str], None], listener) -> None:
+        while not self._stopped.is_set():
+            try:
+                if listener is None:
+                    listener = self._listen_connection()
+                if select.select([listener], [], [], self.poll_interval) == ([], [], []):
+                    continue
+                listener.poll()
+                while listener.notifies:
+                    notify = listener.notifies.pop(0)
+                    if notify.pid != self._publisher_pid:
+                        callback(notify.payload)
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                # 断线期间可能漏掉通知：重连前清空本地缓存
+                logger.warning("缓存失效监听连接断开，稍后重连: %s", e)
+                if listener is not None:
+                    listener.close()
+                    listener = None
+                    callback(ALL_KEYS)
+                self._stopped.wait(self.poll_interval)
+        if listener is not None:
+            listener.close()
+
+    def close(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(self.poll_interval * 2)
+        with self._lock:
+            self._close_publisher()
+
+
+class TTLCache:
+    """线程安全的 LRU + TTL 缓存"""
+
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        ttl: float = 30.0,
+        channel: Optional[InvalidationChannel] = None,
+        clock: Callable[[], float] = time.monotonic,
+        key_from_str: Callable[[str], Hashable] = int,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize 必须大于 0")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._clock = clock
+        self._key_from_str = key_from_str  # 广播收到的是字符串，还原成本地键
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (过期时间, 值)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.channel = channel or InvalidationChannel()
+        self.channel.listen(self._on_remote_invalidate)
+
+    def token(self) -> int:
+        """
+        读库前取一个令牌，回填时交给 set。
+        期间若发生过失效，回填会被丢弃，避免把写操作之前读到的旧值放回缓存
+        """
+        return self._generation
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, token: Optional[int] = None) -> None:
+        with self._lock:
+            if token is not None and token != self._generation:
+                return
+            self._data[key] = (self._clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """失效本地条目并广播给其它 worker"""
+        self._invalidate_local(key)
+        self.channel.publish(key)
+
+    def clear(self) -> None:
+        """清空本地缓存并广播给其它 worker"""
+        self._invalidate_local(ALL_KEYS)
+        self.channel.publish(ALL_KEYS)
+
+    def _invalidate_local(self, key: Hashable) -> None:
+        with self._lock:
+            self._generation += 1
+            if key == ALL_KEYS:
+                self.stats.invalidations += len(self._data)
+                self._data.clear()
+            elif self._data.pop(key, None) is not None:
+                self.stats.invalidations += 1
+
+    def _on_remote_invalidate(self, payload: str) -> None:
+        self._invalidate_local(payload if payload == ALL_KEYS else self._key_from_str(payload))
+
+    def snapshot(self) -> dict:
+        """当前统计（供监控接口输出）"""
+        with self._lock:
+            return {
+                **asdict(self.stats),
+                "hit_rate": round(self.stats.hit_rate, 4),
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
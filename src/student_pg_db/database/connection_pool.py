@@ -0,0 +1,147 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-09 09:41:16
+FilePath: /student_pg_db/src/student_pg_db/database/connection_pool.py
+'''
+"""
+原生 psycopg2 连接池（供 core/connection.DatabaseConnection 的维护任务使用）
+  - 基于 psycopg2 的 ThreadedConnectionPool；连接用满时等待归还（最多 timeout 秒），不直接报错。
+    空闲时保留 minconn 个连接，超出的在归还时关闭（并发高峰后不长期占着服务端连接）
+  - 借出时检查连接：已断开的丢弃；空闲超过 check_idle 秒的先 SELECT 1，失败则丢弃换一个
+  - 归还时未结束的事务由 ThreadedConnectionPool 回滚，不会带给下一个借用方
+  - 统计借出等待时间与占用时间，snapshot() 返回当前值
+"""
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterator
+
+import psycopg2
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+
+class PoolTimeout(PoolError):
+    """等待可用连接超时"""
+
+
+@dataclass
+class PoolStats:
+    borrowed: int = 0
+    returned: int = 0
+    timeouts: int = 0
+    discarded: int = 0  # 健康检查失败、归还时已断开或调用方要求关闭而丢弃的连接数
+    wait_total: float = 0.0  # 借出前等待的总时长（秒，含等待超时的调用）
+    wait_max: float = 0.0
+    hold_total: float = 0.0  # 借出到归还的总时长（秒）
+    hold_max: float = 0.0
+
+
+class PgConnectionPool:
+    def __init__(
+        self,
+        dsn: str,
+        minconn: int = 1,
+        maxconn: int = 10,
+        timeout: float = 30.0,
+        check_idle: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if maxconn < 1 or not 0 <= minconn <= maxconn:
+            raise ValueError(f"连接池大小无效: minconn={minconn}, maxconn={maxconn}")
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.check_idle = check_idle
+        self.clock = clock
+        self._pool = ThreadedConnectionPool(minconn, maxconn, dsn)
+        # ThreadedConnectionPool 用满时直接抛 PoolError：借出前先占一个名额，用满时在这里排队
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._idle_since: Dict[int, float] = {}  # id(conn) -> 归还时间
+        self._borrowed_at: Dict[int, float] = {}  # id(conn) -> 借出时间
+        self.stats = PoolStats()
+
+    def getconn(self):
+        """借出一个健康的连接（autocommit=False）；等待超过 timeout 秒抛 PoolTimeout"""
+        start = self.clock()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.stats.timeouts += 1
+                self._record_wait(self.clock() - start)
+            raise PoolTimeout(f"等待数据库连接超时（{self.timeout} 秒，maxconn={self.maxconn}）")
+        try:
+            conn = self._healthy_conn()
+        except BaseException:
+            self._slots.release()
+            raise
+        now = self.clock()
+        with self._lock:
+            self.stats.borrowed += 1
+            self._record_wait(now - start)
+            self._borrowed_at[id(conn)] = now
+        return conn
+
+    def _record_wait(self, wait: float) -> None:
+        self.stats.wait_total += wait
+        self.stats.wait_max = max(self.stats.wait_max, wait)
+
+    def _healthy_conn(self):
+        # 最多换 maxconn + 1 次：池中连接全部失效时最后一次拿到的是新建连接
+        for _ in range(self.maxconn + 1):
+            conn = self._pool.getconn()
+            with self._lock:
+                idle_since = self._idle_since.pop(id(conn), None)
+            fresh = idle_since is not None and self.clock() - idle_since < self.check_idle
+            if not conn.closed and (fresh or self._ping(conn)):
+                return conn
+            self._pool.putconn(conn, close=True)
+            with self._lock:
+                self.stats.discarded += 1
+        raise PoolError("无法从连接池取得可用连接")
+
+    @staticmethod
+    def _ping(conn) -> bool:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def putconn(self, conn, close: bool = False) -> None:
+        """归还连接；close=True 或连接已断开时关闭并丢弃"""
+        now = self.clock()
+        close = close or bool(conn.closed)
+        try:
+            self._pool.putconn(conn, close=close)
+        except psycopg2.Error:
+            # 回滚未结束的事务时发现连接已断开
+            close = True
+            self._pool.putconn(conn, close=True)
+        finally:
+            self._slots.release()
+        with self._lock:
+            borrowed_at = self._borrowed_at.pop(id(conn), now)
+            self.stats.returned += 1
+            self.stats.hold_total += now - borrowed_at
+            self.stats.hold_max = max(self.stats.hold_max, now - borrowed_at)
+            if close:
+                self.stats.discarded += 1
+            elif not conn.closed:  # 池中空闲连接已满 minconn 个时 psycopg2 直接关闭归还的连接
+                self._idle_since[id(conn)] = now
+
+    @contextmanager
+    def connection(self) -> Iterator:
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def closeall(self) -> None:
+        self._pool.closeall()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**asdict(self.stats), "in_use": len(self._borrowed_at), "maxconn": self.maxconn}
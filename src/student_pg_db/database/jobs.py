@@ -0,0 +1,269 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-06 10:07:26
+FilePath: /student_pg_db/src/student_pg_db/database/jobs.py
+'''
+"""
+分块批量修改任务（student-db jobs）
+整批一条 UPDATE 会长时间锁住大量行、一次写出大量 WAL；这里按 id 升序（keyset）每次取 chunk_size 个匹配的 ID，
+单独一个事务修改并推进 batch_jobs 中的检查点：
+  1. 每块提交后锁即释放，复制延迟与 autovacuum 都有机会跟上；块之间可按 pause / max_rows_per_sec 限速
+  2. 检查点与该块的修改在同一事务中提交，中断后从 last_id 之后继续，不重做也不遗漏已扫描的区间
+  3. UPDATE 时重新检查筛选条件，期间被其他事务改掉的行不会被覆盖
+  4. 每块提交后按 RETURNING 的 ID 失效 get_by_id 缓存（可选），不必等 TTL 过期
+  5. 运行期间持有以任务名为键的会话级 advisory lock，同名任务已在运行时直接报 JobConflict
+任务开始后新插入、id 小于检查点的行不在本次任务范围内
+"""
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import Integer, any_, bindparam, func, select, text, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from ..models.batch_job import BatchJob
+from ..models.students import Student
+from .cache import TTLCache
+from .repository import enrollment_year_filter, explain_statement, plan_rows
+
+
+# advisory lock 的第一个键：与其他用途的 advisory lock 区分，第二个键为 hashtext(任务名)
+JOB_LOCK_NAMESPACE = 0x4A4F42
+
+
+class JobConflict(Exception):
+    """同名任务已存在但参数不同，或正在其他会话中运行"""
+
+
+@dataclass(frozen=True)
+class StatusTransition:
+    """把满足条件的学生从 from_status 改为 to_status（如整届毕业：active -> graduated, enrollment_year=2022）"""
+    from_status: str
+    to_status: str
+    enrollment_year: Optional[int] = None
+    major: Optional[str] = None
+    class_name: Optional[str] = None
+
+    kind = "status_transition"
+
+    def filters(self) -> list:
+        # 入学年份按日期区间比较：只扫描该届分区，分区内可走 (status, enrollment_date, id) 索引
+        filters = [Student.status == self.from_status]
+        if self.enrollment_year is not None:
+            filters += enrollment_year_filter(self.enrollment_year)
+        if self.major is not None:
+            filters.append(Student.major == self.major)
+        if self.class_name is not None:
+            filters.append(Student.class_name == self.class_name)
+        return filters
+
+    def values(self) -> Dict[str, Any]:
+        return {"status": self.to_status}
+
+    def params(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# kind -> 任务类型，续跑时用 batch_jobs.params 重建
+JOB_KINDS = {StatusTransition.kind: StatusTransition}
+
+
+@dataclass
+class JobProgress:
+    name: str
+    status: str
+    last_id: int = 0
+    rows_scanned: int = 0
+    rows_updated: int = 0
+    chunks: int = 0
+    # 本次运行（不含中断前的运行）扫描的行数与耗时
+    run_rows: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.run_rows / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class JobPlan:
+    """dry-run 结果：检查点之后仍匹配的行数与查询计划"""
+    rows: int
+    chunk_plan: List[str] = field(default_factory=list)
+    update_plan: List[str] = field(default_factory=list)
+
+
+def spec_from_job(job: BatchJob):
+    return JOB_KINDS[job.kind](**job.params)
+
+
+def chunk_statement(spec, last_id: int, chunk_size: int):
+    """检查点之后按 id 升序的下一块 ID"""
+    return (
+        select(Student.id)
+        .where(*spec.filters(), Student.id > last_id)
+        .order_by(Student.id)
+        .limit(chunk_size)
+    )
+
+
+def chunk_update_statement(spec, ids: List[int]):
+    """只修改本块 ID 中仍满足筛选条件的行，返回实际修改的 ID"""
+    return (
+        update(Student)
+        .where(Student.id == any_(bindparam("ids", ids, type_=ARRAY(Integer))), *spec.filters())
+        .values(spec.values())
+        .returning(Student.id)
+    )
+
+
+class ChunkedJobRunner:
+    """
+    session 中每处理一块提交一次（与仓储层不同，这里自己管理事务）。
+    同名任务同时只应运行一个
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        name: str,
+        spec,
+        chunk_size: int = 1000,
+        pause: float = 0.0,
+        max_rows_per_sec: Optional[float] = None,
+        on_progress: Optional[Callable[[JobProgress], None]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        cache: Optional[TTLCache] = None,
+    ):
+        if chunk_size < 1:
+            raise ValueError("chunk_size 必须大于 0")
+        if max_rows_per_sec is not None and max_rows_per_sec <= 0:
+            raise ValueError("max_rows_per_sec 必须大于 0")
+        self.session = session
+        self.name = name
+        self.spec = spec
+        self.chunk_size = chunk_size
+        self.pause = pause
+        self.max_rows_per_sec = max_rows_per_sec
+        self.on_progress = on_progress
+        self.sleep = sleep
+        self.cache = cache  # 可选：每块提交后失效修改过的行（见 core/cache.py）
+
+    # ==================== 检查点 ====================
+    def checkpoint(self) -> Optional[BatchJob]:
+        return self.session.get(BatchJob, self.name, populate_existing=True)
+
+    def _claim(self, restart: bool) -> BatchJob:
+        """创建任务或取回检查点；参数与已有同名任务不同则报 JobConflict"""
+        job = self.checkpoint()
+        if job is None:
+            job = BatchJob(name=self.name, kind=self.spec.kind, params=self.spec.params())
+            self.session.add(job)
+        elif (job.kind, job.params) != (self.spec.kind, self.spec.params()):
+            raise JobConflict(f"任务 {self.name} 已存在且参数不同：{job.kind} {job.params}")
+        if restart:
+            job.last_id = job.rows_scanned = job.rows_updated = job.chunks = 0
+            job.finished_at = None
+        if job.status != "done" or restart:
+            job.status, job.error = "running", None
+        self.session.commit()
+        return job
+
+    # ==================== 执行 ====================
+    def remaining(self, last_id: int = 0) -> int:
+        """检查点之后仍满足筛选条件的行数（精确计数，要扫描全部匹配的行，只用于 dry-run）"""
+        stmt = select(func.count()).select_from(Student).where(*self.spec.filters(), Student.id > last_id)
+        return self.session.scalar(stmt)
+
+    def estimate_remaining(self, last_id: int = 0) -> int:
+        """检查点之后匹配行数的规划器估算（EXPLAIN，不扫描数据；进度条总数用）"""
+        stmt = select(Student.id).where(*self.spec.filters(), Student.id > last_id)
+        sql, params = explain_statement(stmt, self.session.get_bind().dialect)
+        return plan_rows(self.session.connection().exec_driver_sql(sql, params).scalar())
+
+    def plan(self) -> JobPlan:
+        """dry-run：不修改数据，返回待处理行数与第一块的查询计划"""
+        job = self.checkpoint()
+        last_id = job.last_id if job is not None else 0
+        chunk = chunk_statement(self.spec, last_id, self.chunk_size)
+        ids = self.session.scalars(chunk).all()
+        return JobPlan(
+            rows=self.remaining(last_id),
+            chunk_plan=self._explain(chunk),
+            update_plan=self._explain(chunk_update_statement(self.spec, ids)) if ids else [],
+        )
+
+    def _explain(self, stmt) -> List[str]:
+        sql, params = explain_statement(stmt, self.session.get_bind().dialect, options="")
+        return [row[0] for row in self.session.connection().exec_driver_sql(sql, params)]
+
+    def run(self, restart: bool = False) -> JobProgress:
+        """
+        执行到没有匹配的行为止；中断（Ctrl+C）或出错时回滚当前块、保留检查点后重新抛出。
+        同名任务正在其他会话中运行时报 JobConflict
+        """
+        # 每块提交后 session 会归还连接，会话级锁放在单独的连接上，任务结束时释放
+        with self.session.get_bind().engine.connect() as lock_conn:
+            key = {"ns": JOB_LOCK_NAMESPACE, "name": self.name}
+            if not lock_conn.scalar(text("SELECT pg_try_advisory_lock(:ns, hashtext(:name))"), key):
+                raise JobConflict(f"任务 {self.name} 正在其他会话中运行")
+            try:
+                return self._run(restart)
+            finally:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:ns, hashtext(:name))"), key)
+
+    def _run(self, restart: bool) -> JobProgress:
+        job = self._claim(restart)
+        progress = JobProgress(
+            name=job.name, status=job.status, last_id=job.last_id,
+            rows_scanned=job.rows_scanned, rows_updated=job.rows_updated, chunks=job.chunks,
+        )
+        started = time.perf_counter()
+        try:
+            while progress.status == "running":
+                ids = self.session.scalars(chunk_statement(self.spec, job.last_id, self.chunk_size)).all()
+                updated = []
+                if ids:
+                    updated = self.session.scalars(chunk_update_statement(self.spec, ids)).all()
+                    job.last_id = ids[-1]
+                    job.rows_scanned += len(ids)
+                    job.rows_updated += len(updated)
+                    job.chunks += 1
+                    progress.run_rows += len(ids)
+                if len(ids) < self.chunk_size:
+                    job.status, job.finished_at = "done", func.now()
+                self.session.commit()
+                if self.cache is not None:
+                    for id in updated:
+                        self.cache.invalidate(id)
+
+                progress.status, progress.last_id = job.status, job.last_id
+                progress.rows_scanned, progress.rows_updated = job.rows_scanned, job.rows_updated
+                progress.chunks = job.chunks
+                progress.elapsed = time.perf_counter() - started
+                if self.on_progress is not None:
+                    self.on_progress(progress)
+                if progress.status == "running":
+                    self._throttle(progress.run_rows, progress.elapsed)
+        except BaseException as e:
+            self.session.rollback()
+            job = self.checkpoint()
+            job.status = "interrupted" if isinstance(e, KeyboardInterrupt) else "failed"
+            job.error = None if isinstance(e, KeyboardInterrupt) else f"{type(e).__name__}: {e}"
+            self.session.commit()
+            raise
+        progress.elapsed = time.perf_counter() - started
+        return progress
+
+    def _throttle(self, scanned: int, elapsed: float) -> None:
+        delay = self.pause
+        if self.max_rows_per_sec is not None:
+            # 按本次运行的累计速度限速：提前完成的部分在块之间补齐
+            delay = max(delay, scanned / self.max_rows_per_sec - elapsed)
+        if delay > 0:
+            self.sleep(delay)
+
+
+def list_jobs(session: Session) -> List[BatchJob]:
+    return session.scalars(select(BatchJob).order_by(BatchJob.started_at.desc())).all()
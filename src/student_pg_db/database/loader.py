@@ -0,0 +1,145 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-03 10:12:36
+FilePath: /student_pg_db/src/student_pg_db/database/loader.py
+'''
+"""
+请求内批量加载器（DataLoader 风格）：把同一请求里分散的按 ID 查询合并成一次 get_many
+  - StudentLoader：同步版。load(id) 只登记 ID 并返回 Deferred，第一次取值时统一查询所有已登记的 ID
+  - AsyncStudentLoader：异步版。同一轮事件循环中 await load(id) 的 ID 合并为一次查询
+结果按 ID 记忆，同一请求内重复加载不再查库；加载器随请求创建、随请求丢弃（见 core/loader.py）
+"""
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+from ..models.students import Student
+from .async_repository import AsyncStudentRepository
+from .repository import StudentRepository
+
+# 单次 get_many 的 ID 上限，更多的 ID 拆成多次查询
+MAX_BATCH_SIZE = 1000
+
+
+class Deferred:
+    """StudentLoader.load 的返回值，result() 时才触发批量查询"""
+
+    def __init__(self, loader: "StudentLoader", id: int):
+        self._loader = loader
+        self.id = id
+
+    def result(self) -> Optional[Student]:
+        return self._loader.get(self.id)
+
+
+class StudentLoader:
+    def __init__(self, repo: StudentRepository, max_batch_size: int = MAX_BATCH_SIZE):
+        self.repo = repo
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[int, None] = {}  # 有序集合：已登记、尚未查询的 ID
+        self._loaded: Dict[int, Optional[Student]] = {}
+        self.batches = 0  # 实际发出的查询次数
+
+    def load(self, id: int) -> Deferred:
+        if id not in self._loaded:
+            self._pending[id] = None
+        return Deferred(self, id)
+
+    def load_many(self, ids: Iterable[int]) -> List[Optional[Student]]:
+        deferred = [self.load(id) for id in ids]
+        return [d.result() for d in deferred]
+
+    def get(self, id: int) -> Optional[Student]:
+        """立即取值：连同之前登记的 ID 一起查询；不存在时返回 None"""
+        if id not in self._loaded:
+            self._pending[id] = None
+            self.dispatch()
+        return self._loaded[id]
+
+    def dispatch(self) -> None:
+        ids, self._pending = list(self._pending), {}
+        for start in range(0, len(ids), self.max_batch_size):
+            batch = ids[start:start + self.max_batch_size]
+            found = {s.id: s for s in self.repo.get_many(batch)}
+            self.batches += 1
+            for id in batch:
+                self._loaded[id] = found.get(id)
+
+    def clear(self, id: Optional[int] = None) -> None:
+        """写入后清除记忆的结果（id 为 None 时全部清除）"""
+        if id is None:
+            self._loaded.clear()
+        else:
+            self._loaded.pop(id, None)
+
+
+class AsyncStudentLoader:
+    def __init__(self, repo: AsyncStudentRepository, max_batch_size: int = MAX_BATCH_SIZE):
+        self.repo = repo
+        self.max_batch_size = max_batch_size
+        self._futures: Dict[int, asyncio.Future] = {}
+        self._queue: List[int] = []
+        self._dispatching: Optional[asyncio.Task] = None
+        # AsyncSession 不允许并发执行语句：多批查询依次进行
+        self._lock = asyncio.Lock()
+        self.batches = 0
+
+    async def load(self, id: int) -> Optional[Student]:
+        future = self._futures.get(id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._futures[id] = loop.create_future()
+            self._queue.append(id)
+            if len(self._queue) == 1:
+                # 推迟到本轮已就绪的协程都登记完 ID 之后再查询
+                loop.call_soon(self._schedule_dispatch)
+        # shield：某个等待方被取消时不取消共享的 future，其他等待方照常拿到结果
+        return await asyncio.shield(future)
+
+    async def load_many(self, ids: Iterable[int]) -> List[Optional[Student]]:
+        return list(await asyncio.gather(*(self.load(id) for id in ids)))
+
+    def clear(self, id: Optional[int] = None) -> None:
+        """写入后清除记忆的结果（id 为 None 时全部清除）；仍在查询中的 ID 不受影响"""
+        ids = list(self._futures) if id is None else [id]
+        for key in ids:
+            future = self._futures.get(key)
+            if future is not None and future.done():
+                del self._futures[key]
+
+    def _schedule_dispatch(self) -> None:
+        ids, self._queue = self._queue, []
+        self._dispatching = asyncio.ensure_future(self._dispatch(ids))
+
+    async def _dispatch(self, ids: List[int]) -> None:
+        futures = {id: self._futures[id] for id in ids}
+        try:
+            async with self._lock:
+                for start in range(0, len(ids), self.max_batch_size):
+                    batch = ids[start:start + self.max_batch_size]
+                    try:
+                        found = {s.id: s for s in await self._fetch(batch)}
+                    except Exception as e:
+                        for id in batch:  # 失败的 ID 不记忆，下次 load 重新查询
+                            self._forget(id, futures[id])
+                            futures[id].set_exception(e)
+                        continue
+                    self.batches += 1
+                    for id in batch:
+                        futures[id].set_result(found.get(id))
+        finally:
+            # 被取消（CancelledError 不是 Exception）或意外退出时，未完成的 future 一并取消，等待方不会一直挂起
+            for id, future in futures.items():
+                if not future.done():
+                    self._forget(id, future)
+                    future.cancel()
+
+    async def _fetch(self, batch: List[int]) -> List[Student]:
+        # 只有一个 ID 时走 get_by_id：仓储启用 singleflight 时可与其他请求的相同查询共享结果
+        if len(batch) == 1:
+            student = await self.repo.get_by_id(batch[0])
+            return [] if student is None else [student]
+        return await self.repo.get_many(batch)
+
+    def _forget(self, id: int, future: asyncio.Future) -> None:
+        if self._futures.get(id) is future:
+            del self._futures[id]
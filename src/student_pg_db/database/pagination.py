@@ -0,0 +1,129 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-02-20 10:31:07
+FilePath: /student_pg_db/src/student_pg_db/database/pagination.py
+'''
+"""
+Keyset（游标）分页
+职责：把排序键 + id 编码为不透明游标，并生成可走索引的 seek 条件
+设计原则：
+  1. 排序固定附加 id 作为决胜键，翻页结果稳定
+  2. 深翻页与首页代价相同（不使用 OFFSET）
+  3. 可空排序列按 NULLS LAST 处理：先翻完非空区间，再按 id 翻 NULL 区间
+"""
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Any, Literal, Optional
+
+from sqlalchemy import tuple_
+
+from ..models.students import Student
+
+SortKey = Literal["id", "gpa", "enrollment_date", "name"]
+SortOrder = Literal["asc", "desc"]
+
+SORT_COLUMNS = {
+    "id": Student.id,
+    "gpa": Student.gpa,
+    "enrollment_date": Student.enrollment_date,
+    "name": Student.name,
+}
+
+_DECODERS = {
+    "id": int,
+    "gpa": Decimal,
+    "enrollment_date": date.fromisoformat,
+    "name": str,
+}
+
+
+class InvalidCursor(ValueError):
+    """游标无法解析或与当前排序方式不一致"""
+
+
+@dataclass(frozen=True)
+class Cursor:
+    sort_by: SortKey
+    order: SortOrder
+    value: Any  # 上一页最后一行的排序列取值（None 表示已进入 NULL 区间）
+    last_id: int
+
+    def encode(self) -> str:
+        value = self.value
+        if isinstance(value, date):
+            value = value.isoformat()
+        elif value is not None and not isinstance(value, str):
+            value = str(value)  # Decimal/float 统一转字符串，避免二进制浮点误差
+        raw = json.dumps([self.sort_by, self.order, value, self.last_id], ensure_ascii=False)
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> "Cursor":
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            sort_by, order, value, last_id = json.loads(raw)
+            if sort_by not in SORT_COLUMNS or order not in ("asc", "desc"):
+                raise ValueError(sort_by)
+            if value is not None:
+                value = _DECODERS[sort_by](value)
+            return cls(sort_by, order, value, int(last_id))
+        except (ValueError, TypeError, ArithmeticError) as e:
+            raise InvalidCursor("无效的分页游标") from e
+
+    @classmethod
+    def after(cls, row: Student, sort_by: SortKey, order: SortOrder) -> "Cursor":
+        return cls(sort_by, order, getattr(row, sort_by), row.id)
+
+
+@dataclass(frozen=True, order=True)
+class ChangeToken:
+    """增量同步位置：已同步到 (change_xid, id)；"0" 表示从头全量同步"""
+    xid: int
+    last_id: int = 0
+
+    def encode(self) -> str:
+        return f"{self.xid}.{self.last_id}"
+
+    @classmethod
+    def decode(cls, token: str) -> "ChangeToken":
+        try:
+            xid, _, last_id = token.partition(".")
+            result = cls(int(xid), int(last_id or 0))
+        except ValueError as e:
+            raise InvalidCursor("无效的同步令牌") from e
+        if result.xid < 0 or result.last_id < 0:
+            raise InvalidCursor("无效的同步令牌")
+        return result
+
+
+def keyset_select(stmt, sort_by: SortKey, order: SortOrder, cursor: Optional[Cursor], null_region: bool = False):
+    """
+    给 stmt 追加 seek 条件与 ORDER BY（不含 LIMIT）
+    null_region=True 时只翻排序列为 NULL 的区间（按 id 排序）
+    """
+    column = SORT_COLUMNS[sort_by]
+    desc = order == "desc"
+    if null_region:
+        stmt = stmt.where(column.is_(None))
+        if cursor is not None and cursor.value is None:
+            stmt = stmt.where(Student.id < cursor.last_id if desc else Student.id > cursor.last_id)
+        return stmt.order_by(Student.id.desc() if desc else Student.id.asc())
+
+    if column is Student.id:
+        if cursor is not None:
+            stmt = stmt.where(Student.id < cursor.last_id if desc else Student.id > cursor.last_id)
+        return stmt.order_by(Student.id.desc() if desc else Student.id.asc())
+
+    if cursor is not None:
+        # 行值比较 (col, id) > (:v, :id) 可直接在 (col, id) 复合索引上定位
+        key = tuple_(column, Student.id)
+        bound = tuple_(cursor.value, cursor.last_id)
+        stmt = stmt.where(key < bound if desc else key > bound)
+    elif column.nullable:
+        stmt = stmt.where(column.is_not(None))
+    if desc:
+        return stmt.order_by(column.desc(), Student.id.desc())
+    return stmt.order_by(column.asc(), Student.id.asc())
@@ -0,0 +1,63 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-07 11:02:38
+FilePath: /student_pg_db/src/student_pg_db/database/partitions.py
+'''
+"""
+students 分区管理（student-db partitions）：列出分区、为新一届建分区、归档一届
+与仓储层一致，不提交事务，由调用方决定何时 commit
+"""
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from ..models.student_partitions import archive_name, archive_sql, partition_name
+
+# students 的分区及其范围、规划器估算行数（ANALYZE 前为 -1）
+PARTITIONS_SQL = """
+SELECT c.relname AS name, pg_get_expr(c.relpartbound, c.oid) AS bound, c.reltuples::bigint AS rows
+FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'students'::regclass
+ORDER BY c.relname
+"""
+
+ARCHIVES_SQL = """
+SELECT relname AS name, reltuples::bigint AS rows FROM pg_class
+WHERE relkind = 'r' AND relname LIKE 'students\\_archive\\_y%' ORDER BY relname
+"""
+
+
+@dataclass
+class PartitionInfo:
+    name: str
+    bound: Optional[str]  # 归档表为 None
+    rows: int
+
+
+class StudentPartitionManager:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def partitions(self) -> List[PartitionInfo]:
+        return [PartitionInfo(r.name, r.bound, r.rows) for r in self.session.execute(text(PARTITIONS_SQL))]
+
+    def archives(self) -> List[PartitionInfo]:
+        return [PartitionInfo(r.name, None, r.rows) for r in self.session.execute(text(ARCHIVES_SQL))]
+
+    def create(self, year: int) -> str:
+        """为 year 届建分区（已存在则直接返回）；默认分区中该年份的行会搬进新分区"""
+        return self.session.scalar(select(func.create_student_partition(year)))
+
+    def archive(self, year: int) -> int:
+        """
+        摘下 year 届分区并改名为 students_archive_y<year>，返回归档的行数。
+        DETACH 需要短暂的 ACCESS EXCLUSIVE 锁；各进程内的查询缓存不会被清除，由 TTL 兜底
+        """
+        exists = self.session.scalar(select(func.to_regclass(partition_name(year))))
+        if exists is None:
+            raise ValueError(f"分区不存在: {partition_name(year)}")
+        for sql in archive_sql(year):
+            self.session.execute(text(sql))
+        return self.session.scalar(text(f"SELECT count(*) FROM {archive_name(year)}"))
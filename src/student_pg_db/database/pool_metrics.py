@@ -0,0 +1,163 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-10 10:22:48
+FilePath: /student_pg_db/src/student_pg_db/database/pool_metrics.py
+'''
+"""
+SQLAlchemy 连接池指标（GET /metrics 以 Prometheus 文本格式输出）
+  - 借出等待时间：直方图（含超时的调用），由 pool_class() 返回的连接池子类计时（SQLAlchemy 没有借出前事件）
+  - 使用中 / 空闲 / 溢出连接数：抓取时从连接池实时读取
+  - 连接更替：新建、关闭、失效次数（连接池事件），recycle 或断线重连频繁时 connects_total 持续增长
+  - 维护任务用的 psycopg2 连接池（core/connection.DatabaseConnection）的借出 / 等待 / 占用统计由 render_pg_pools 输出
+每个进程（uvicorn worker）各有一套连接池与指标，按 worker 汇总即为整体连接数
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Type
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool, QueuePool
+
+# 借出等待时间直方图的桶上界（秒）
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+_COUNTERS = ("checkouts", "timeouts", "connects", "closes", "invalidations")
+
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.engine: Optional[Engine] = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * len(WAIT_BUCKETS)  # 各桶自身的计数，输出时累加
+
+    def pool_class(self, base: Type[Pool] = QueuePool) -> Type[Pool]:
+        """
+        base 的子类，借出连接时计时（含 pre-ping 与新建连接的时间）；传给 create_engine(poolclass=...)。
+        engine.dispose() 重建连接池时沿用同一个类，计数不会丢
+        """
+        metrics = self
+
+        def connect(pool):
+            start = time.perf_counter()
+            try:
+                conn = base.connect(pool)
+            except PoolTimeoutError:
+                metrics.observe_wait(time.perf_counter() - start, timed_out=True)
+                raise
+            metrics.observe_wait(time.perf_counter() - start)
+            return conn
+
+        return type(f"Timed{base.__name__}", (base,), {"connect": connect})
+
+    def attach(self, engine: Engine) -> Engine:
+        """记录引擎（抓取时读连接池状态）并监听连接更替事件；异步引擎传 async_engine.sync_engine"""
+        self.engine = engine
+        event.listen(engine, "connect", lambda *args: self._count("connects"))
+        event.listen(engine, "close", lambda *args: self._count("closes"))
+        event.listen(engine, "close_detached", lambda *args: self._count("closes"))
+        event.listen(engine, "invalidate", lambda *args: self._count("invalidations"))
+        event.listen(engine, "soft_invalidate", lambda *args: self._count("invalidations"))
+        return engine
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def observe_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_sum += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            i = bisect_left(WAIT_BUCKETS, seconds)
+            if i < len(WAIT_BUCKETS):
+                self.wait_buckets[i] += 1
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool if self.engine is not None else None
+        with self._lock:
+            counters = {name: getattr(self, name) for name in _COUNTERS}
+            waits = {"wait_sum": self.wait_sum, "wait_max": self.wait_max, "wait_buckets": list(self.wait_buckets)}
+        gauges = {}
+        if isinstance(pool, QueuePool):
+            # overflow() 从 -pool_size 开始计数，超过常驻连接数后才为正
+            gauges = {"size": pool.size(), "checked_out": pool.checkedout(), "checked_in": pool.checkedin(),
+                      "overflow": max(pool.overflow(), 0)}
+        return {**counters, **waits, **gauges}
+
+
+def render_prometheus(all_metrics: Iterable[PoolMetrics]) -> str:
+    """Prometheus 文本格式（text/plain; version=0.0.4），标签 pool 为连接池名称"""
+    snapshots = [(m.name, m.snapshot()) for m in all_metrics]
+    lines: List[str] = []
+
+    def family(name: str, kind: str, help: str, key: str) -> None:
+        lines.append(f"# HELP student_db_pool_{name} {help}")
+        lines.append(f"# TYPE student_db_pool_{name} {kind}")
+        for pool, snap in snapshots:
+            if key in snap:
+                lines.append(f'student_db_pool_{name}{{pool="{pool}"}} {snap[key]}')
+
+    family("size", "gauge", "Configured number of persistent connections", "size")
+    family("checked_out", "gauge", "Connections currently in use", "checked_out")
+    family("checked_in", "gauge", "Idle connections held by the pool", "checked_in")
+    family("overflow", "gauge", "Connections open beyond pool_size", "overflow")
+    family("checkouts_total", "counter", "Successful connection checkouts", "checkouts")
+    family("checkout_timeouts_total", "counter", "Checkouts that gave up after pool_timeout", "timeouts")
+    family("connects_total", "counter", "New DBAPI connections opened", "connects")
+    family("closes_total", "counter", "DBAPI connections closed", "closes")
+    family("invalidations_total", "counter", "Connections invalidated after errors or disconnects", "invalidations")
+    family("checkout_wait_max_seconds", "gauge", "Longest checkout wait since the process started", "wait_max")
+
+    name = "student_db_pool_checkout_wait_seconds"
+    lines.append(f"# HELP {name} Time spent waiting for a connection, including timed out checkouts")
+    lines.append(f"# TYPE {name} histogram")
+    for pool, snap in snapshots:
+        cumulative = 0
+        for bound, n in zip(WAIT_BUCKETS, snap["wait_buckets"]):
+            cumulative += n
+            lines.append(f'{name}_bucket{{pool="{pool}",le="{bound}"}} {cumulative}')
+        total = snap["checkouts"] + snap["timeouts"]
+        lines.append(f'{name}_bucket{{pool="{pool}",le="+Inf"}} {total}')
+        lines.append(f'{name}_sum{{pool="{pool}"}} {snap["wait_sum"]}')
+        lines.append(f'{name}_count{{pool="{pool}"}} {total}')
+    return "\n".join(lines) + "\n"
+
+
+def render_pg_pools(pool_stats: Dict[str, dict]) -> str:
+    """
+    psycopg2 维护连接池的统计（DatabaseConnection.pool_stats() 的返回值），Prometheus 文本格式，
+    标签 pool 为 user@host:port/dbname；进程内还没有建过连接池时只输出 HELP / TYPE
+    """
+    lines: List[str] = []
+
+    def family(name: str, kind: str, help: str, key: str) -> None:
+        lines.append(f"# HELP student_db_pg_pool_{name} {help}")
+        lines.append(f"# TYPE student_db_pg_pool_{name} {kind}")
+        for pool, snap in pool_stats.items():
+            lines.append(f'student_db_pg_pool_{name}{{pool="{pool}"}} {snap[key]}')
+
+    family("maxconn", "gauge", "Maximum connections the pool may open", "maxconn")
+    family("in_use", "gauge", "Connections currently borrowed", "in_use")
+    family("borrowed_total", "counter", "Successful connection checkouts", "borrowed")
+    family("returned_total", "counter", "Connections returned to the pool", "returned")
+    family("checkout_timeouts_total", "counter", "Checkouts that gave up after the pool timeout", "timeouts")
+    family("discarded_total", "counter", "Connections closed on return or after a failed health check", "discarded")
+    family("checkout_wait_seconds_total", "counter", "Time spent waiting for a connection", "wait_total")
+    family("checkout_wait_max_seconds", "gauge", "Longest checkout wait since the pool was created", "wait_max")
+    family("hold_seconds_total", "counter", "Time connections were held between checkout and return", "hold_total")
+    family("hold_max_seconds", "gauge", "Longest time a connection was held", "hold_max")
+    return "\n".join(lines) + "\n"
@@ -3,38 +3,635 @@ Author: qifuxiao 867225266@qq.com
 Date: 2026-02-05 11:25:22
 FilePath: /student_pg_db/src/student_pg_db/database/repository.py
 '''
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import select, delete, update
+import heapq
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy import (
+    BigInteger, Boolean, DateTime, Integer, String, any_, bindparam, case, cast, column, select, delete, update, func, literal_column, text, tuple_,
+    values as sql_values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from ..models.change_tracking import StudentTombstone
+from ..models.student_partitions import StudentIdRegistry
 from ..models.students import Student
+from ..schemas.serializer import source_columns
+from ..schemas.student import StudentQuery
+from .cache import TTLCache
+from .routing import REPLICA
+from .singleflight import SingleFlight
+from .search import name_filter, search_statement
+from .pagination import SORT_COLUMNS, ChangeToken, Cursor, InvalidCursor, SortKey, SortOrder, keyset_select
+
+# 精确计数上限：超过后改用规划器估算，避免在大表上做全量 count(*)
+EXACT_COUNT_LIMIT = 10_000
+
+# 列元组查询（plain=True）返回的列，顺序与表定义一致
+ROW_COLUMNS = tuple(c.name for c in Student.__table__.c)
+# get_row 额外返回的行版本（xmin：最后一次写入该行版本的事务号，行每次更新都会变化）
+ROW_VERSION = literal_column("students.xmin::text").label("row_version")
+
+# upsert 更新已有学号时不覆盖的列（入学日期可以改，行随 UPDATE 移动到对应分区）
+_UPSERT_IMMUTABLE = {"id", "student_id", "change_xid", "created_at", "updated_at"}
+# 分区表上 ON CONFLICT 只能用含分区键的唯一索引
+_CONFLICT_TARGET = [Student.student_id, Student.enrollment_date]
+# update_many 可修改的列（change_xid / updated_at 由触发器与 onupdate 维护）
+UPDATABLE_COLUMNS = frozenset(ROW_COLUMNS) - {"id", "change_xid", "created_at", "updated_at"}
+# 安全水位：仍在运行的最老事务号，小于它的事务都已结束
+SNAPSHOT_XMIN = literal_column("pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+# 表级版本（列表 ETag）：最近一次写入的 change_xid 与时间（students / student_tombstones 各一次索引倒序扫描，
+# 只读不加锁，写入端不用维护计数行），附上比它小、仍在运行的事务号
+TABLE_VERSION_SQL = text("""
+SELECT latest.change_xid, latest.written_at,
+       (SELECT string_agg(x::text, ',' ORDER BY x) FROM pg_snapshot_xip(pg_current_snapshot()) x
+        WHERE x::text::bigint < latest.change_xid) AS pending
+FROM (
+    (SELECT change_xid, updated_at AS written_at FROM students ORDER BY change_xid DESC LIMIT 1)
+    UNION ALL
+    (SELECT change_xid, deleted_at FROM student_tombstones ORDER BY change_xid DESC LIMIT 1)
+    ORDER BY change_xid DESC LIMIT 1
+) latest
+""").columns(change_xid=BigInteger, written_at=DateTime(timezone=True), pending=String)  # 只读查询（不把会话固定到主库）
+
+
+@dataclass
+class UpsertResult:
+    """bulk_upsert 统计：新插入 / 已存在被更新的行数"""
+    inserted: int = 0
+    updated: int = 0
+
+
+@dataclass
+class ChangeBatch:
+    """changes_since 结果：变更行（列元组）、被删除的 (id, student_id)、下一次同步令牌"""
+    rows: List[Any] = field(default_factory=list)
+    deleted: List[Any] = field(default_factory=list)
+    next_token: ChangeToken = ChangeToken(0)
+    has_more: bool = False
+
+
+@dataclass(frozen=True)
+class TableVersion:
+    """students 表级版本：version 在任何已提交的写入之后都会变化，updated_at 为最近一次写入时间"""
+    version: str
+    updated_at: datetime
+
+
+
+# ==================== 语句构造（同步 / 异步仓储共用） ====================
+def first_by_student_id(rows: Iterable[Mapping[str, Any]]) -> dict:
+    """同批重复的学号只保留第一条"""
+    first: dict = {}
+    for row in rows:
+        first.setdefault(row["student_id"], row)
+    return first
+
+
+def registered_statement(student_ids: List[str], with_ids: bool = False):
+    """已在 student_ids 中登记的学号（可能位于其他入学年份的分区）；with_ids=True 时同时返回主键"""
+    columns = [StudentIdRegistry.student_id] + ([StudentIdRegistry.id] if with_ids else [])
+    return select(*columns).where(
+        StudentIdRegistry.student_id == any_(bindparam("student_ids", student_ids, type_=ARRAY(String)))
+    )
+
+
+def bulk_create_statement(rows: List[Mapping[str, Any]]):
+    """
+    ON CONFLICT 只能发现同一分区内的重复，调用方需先按 registered_statement 排除已登记的学号；
+    与并发插入撞上同一学号时由 student_ids 主键报 IntegrityError
+    """
+    return (
+        pg_insert(Student)
+        .values(list(rows))
+        .on_conflict_do_nothing(index_elements=_CONFLICT_TARGET)
+        .returning(Student.id, Student.student_id)
+    )
+
+
+def get_many_statement(entity, ids: List[int]):
+    """按一组 ID 查询：整个列表作为一个数组参数（= ANY(:ids)），语句文本与 ID 个数无关"""
+    return entity.where(Student.id == any_(bindparam("ids", ids, type_=ARRAY(Integer))))
+
+
+def in_requested_order(rows: Iterable[Any], ids: List[int]) -> List[Any]:
+    """按 ids 的顺序排列查询结果，不存在的 ID 跳过"""
+    found = {row.id: row for row in rows}
+    return [found[id] for id in ids if id in found]
+
+
+def update_many_statements(
+    changes: Iterable[Tuple[int, Mapping[str, Any]]], batch_size: int
+) -> Iterator[Any]:
+    """
+    把 [(id, {列: 新值}), ...] 切批，每批产出一条 UPDATE students ... FROM (VALUES ...) ... RETURNING 语句。
+    各行修改的列可以不同：批内所有行都改的列直接 SET col = v.col，
+    只有部分行改的列额外带一个布尔标记列，SET col = CASE WHEN v.set_col THEN v.col ELSE col END
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size 必须大于 0")
+    table = Student.__table__
+    it = iter(changes)
+    while batch := list(islice(it, batch_size)):
+        # 同批内同一 ID 的修改按先后合并（后者覆盖前者），否则一行会匹配多个 VALUES 行
+        merged: dict = {}
+        for id, values in batch:
+            unknown = set(values) - UPDATABLE_COLUMNS
+            if unknown:
+                raise ValueError(f"不能通过 update_many 修改的列: {', '.join(sorted(unknown))}")
+            merged.setdefault(id, {}).update(values)
+        merged = {id: values for id, values in merged.items() if values}
+        if not merged:
+            continue
+        names = [c for c in ROW_COLUMNS if any(c in values for values in merged.values())]
+        partial = [c for c in names if not all(c in values for values in merged.values())]
+        columns = [column("id", Integer)]
+        for name in names:
+            columns.append(column(name, table.c[name].type))
+        columns += [column(f"set_{name}", Boolean) for name in partial]
+        rows = [
+            (id, *(values.get(name) for name in names), *(name in values for name in partial))
+            for id, values in merged.items()
+        ]
+        v = sql_values(*columns, name="v").data(rows)
+        sets = {}
+        for name in names:
+            # psycopg2 不带参数类型：整列为 NULL 时 VALUES 列推断为 text，需显式转换
+            new = cast(v.c[name], table.c[name].type)
+            sets[name] = case((v.c[f"set_{name}"], new), else_=table.c[name]) if name in partial else new
+        yield update(table).where(table.c.id == v.c.id).values(sets).returning(*table.c)
+
+
+def row_snapshot_statement(id: int):
+    """单行列元组 + 行版本（缓存 / singleflight 共享的快照）"""
+    return _entity(True).add_columns(ROW_VERSION).where(Student.id == id)
+
+
+def detached_from_snapshot(snapshot: Mapping[str, Any]) -> Student:
+    """用快照重建 detached 对象，再由调用方 merge(load=False) 并入自己的 Session"""
+    student = Student(**{c: snapshot[c] for c in ROW_COLUMNS})
+    make_transient_to_detached(student)
+    return student
+
+
+def upsert_batches(rows: Iterable[Mapping[str, Any]], batch_size: int) -> Iterator[dict]:
+    """把 rows 切批，逐批产出 {学号: 行}；同批内 student_id 去重（后者覆盖前者）"""
+    if batch_size < 1:
+        raise ValueError("batch_size 必须大于 0")
+    it = iter(rows)
+    while batch := list(islice(it, batch_size)):
+        yield {row["student_id"]: dict(row) for row in batch}
+
+
+def split_upsert(
+    batch: Mapping[str, Mapping[str, Any]], registered: Mapping[str, int]
+) -> Tuple[List[Tuple[int, dict]], List[dict]]:
+    """
+    按 student_ids 登记表把一批 upsert 拆成 (已有学号的 [(id, 修改)], 新学号的行)。
+    分区表上 ON CONFLICT 只能用含分区键的唯一索引，入学日期不同就发现不了冲突：已有学号改为按主键 UPDATE
+    （改了入学日期时行移动到对应分区，payload 省略的列保持原值），只有新学号才 INSERT
+    """
+    changes, new_rows = [], []
+    for student_id, row in batch.items():
+        id = registered.get(student_id)
+        if id is None:
+            new_rows.append(row)
+        else:
+            changes.append((id, {c: v for c, v in row.items() if c not in _UPSERT_IMMUTABLE}))
+    return changes, new_rows
+
+
+def insert_statements(rows: List[Mapping[str, Any]]) -> Iterator[Any]:
+    """多行 INSERT：VALUES 要求列一致，按字段集合分组各发一条"""
+    groups = defaultdict(list)
+    for row in rows:
+        groups[tuple(sorted(row))].append(row)
+    for group in groups.values():
+        yield pg_insert(Student).values(group)
+
+
+def enrollment_year_filter(year: int) -> list:
+    """入学年份 -> 分区键上的日期区间（不能写成 extract(year ...)，否则规划器无法裁剪分区）"""
+    return [
+        Student.enrollment_date >= date(year, 1, 1),
+        Student.enrollment_date < date(year + 1, 1, 1),
+    ]
+
+
+def build_filters(q: StudentQuery) -> list:
+    """StudentQuery -> WHERE 条件（等值条件在前，便于命中复合索引）"""
+    filters = []
+    if q.major:
+        filters.append(Student.major == q.major)
+    if q.class_name:
+        filters.append(Student.class_name == q.class_name)
+    if q.status:
+        filters.append(Student.status == q.status.value)
+    if q.enrollment_year is not None:
+        filters += enrollment_year_filter(q.enrollment_year)
+    if q.min_gpa is not None:
+        filters.append(Student.gpa >= q.min_gpa)
+    if q.max_gpa is not None:
+        filters.append(Student.gpa <= q.max_gpa)
+    if q.student_id:
+        # 学号按前缀匹配，可走 varchar_pattern_ops 索引
+        filters.append(Student.student_id.startswith(q.student_id, autoescape=True))
+    if q.name:
+        # 多字姓名经 student_search 的 GIN 索引缩小范围，不做全表 ILIKE
+        filters.append(name_filter(q.name))
+    return filters
+
+
+def query_statement(q: StudentQuery, filters: list):
+    sort_column = SORT_COLUMNS[q.sort_by or "enrollment_date"]
+    # 沿用 PostgreSQL 默认 NULL 排序（NULL 视为最大），与 btree 索引正反向扫描一致
+    if q.order == "asc":
+        ordering = (sort_column.asc(), Student.id.asc())
+    else:
+        ordering = (sort_column.desc(), Student.id.desc())
+    return (
+        select(Student).where(*filters).order_by(*ordering)
+        .offset((q.page - 1) * q.size).limit(q.size)
+    )
+
+
+def capped_count_statement(filters: list, limit: int):
+    """最多数到 limit+1 行的计数语句"""
+    capped = select(Student.id).where(*filters).limit(limit + 1).subquery()
+    return select(func.count()).select_from(capped)
+
+
+def explain_statement(stmt, dialect, options: str = "(FORMAT JSON)") -> Tuple[str, Any]:
+    """编译为 EXPLAIN 语句 + 驱动参数（兼容命名 / 位置参数风格）；options 为空时输出文本格式的计划"""
+    compiled = stmt.compile(dialect=dialect)
+    params = compiled.params
+    if compiled.positiontup is not None:
+        params = tuple(params[name] for name in compiled.positiontup)
+    return f"EXPLAIN {options} {compiled}", params
+
+
+def plan_rows(plan) -> int:
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def check_cursor(cursor: Optional[Cursor], sort_by: SortKey, order: SortOrder) -> None:
+    if cursor is not None and (cursor.sort_by, cursor.order) != (sort_by, order):
+        raise InvalidCursor("游标与当前排序方式不一致")
+
+
+def page_with_cursor(rows: List[Any], limit: int, sort_by: SortKey, order: SortOrder):
+    """多取的一行用于判断是否有下一页"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, Cursor.after(rows[-1], sort_by, order)
+
+
+def projection_columns(fields: Optional[Sequence[str]], *keys: str) -> Tuple[str, ...]:
+    """
+    响应字段（None 为全部）-> 要查询的列，按表定义顺序；keys 为另外必须查询的列（id、游标排序列等）。
+    只查需要的列：行更窄，(排序列, id) 等复合索引可覆盖时可走 Index Only Scan
+    """
+    wanted = {*source_columns(fields), *keys}
+    return tuple(c for c in ROW_COLUMNS if c in wanted)
+
+
+def _entity(plain: bool, columns: Optional[Sequence[str]] = None):
+    """plain=True 时只查列元组（不建 ORM 对象、不进 identity map）；columns 指定时只查这些列"""
+    if not plain:
+        return select(Student)
+    table = Student.__table__
+    return select(*(table.c[c] for c in columns)) if columns else select(*table.c)
+
 
 class StudentRepository:
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, cache: Optional[TTLCache] = None, flight: Optional[SingleFlight] = None):
         self.session = session
+        self.cache = cache  # 可选：get_by_id 读穿缓存（见 core/cache.py）
+        # 可选：并发的相同 get_by_id / get_row 共享一次查询（见 core/singleflight.py）；只用于只读请求，
+        # 否则其他请求可能拿到本事务尚未提交的写入
+        self.flight = flight
 
     def create(self, student: Student):
         self.session.add(student)
         self.session.flush()  # 不要 commit
         return student
+
+    def bulk_create(self, rows: List[Mapping[str, Any]]) -> List[Any]:
+        """单条多行 INSERT 批量创建；学号已存在（含同批重复）的行被跳过，返回实际插入的 (id, student_id)"""
+        first = first_by_student_id(rows)
+        if not first:
+            return []
+        taken = set(self.session.scalars(registered_statement(list(first))))
+        rows = [row for student_id, row in first.items() if student_id not in taken]
+        if not rows:
+            return []
+        return list(self.session.execute(bulk_create_statement(rows)).all())
+
     def get_by_id(self, id: int) -> Optional[Student]:
-        """按 ID 查询 """
-        return self.session.get(Student, id)
+        """按 ID 查询；启用缓存时先查缓存，命中则不访问数据库；启用 singleflight 时与并发的相同查询共享结果"""
+        if self.flight is not None:
+            snapshot = self._row_snapshot(id)
+            return None if snapshot is None else self._from_snapshot(snapshot)
+        if self.cache is None:
+            return self.session.get(Student, id, bind_arguments=REPLICA)
+
+        snapshot = self.cache.get(id)
+        if snapshot is not None:
+            return self._from_snapshot(snapshot)
+
+        token = self.cache.token()
+        student = self.session.get(Student, id, bind_arguments=REPLICA)
+        if student is not None:
+            self.cache.set(id, self._snapshot(student), token)
+        return student
+
+    def get_many(self, ids: Iterable[int], plain: bool = False, columns: Optional[Sequence[str]] = None) -> List[Any]:
+        """
+        按一组 ID 批量查询（一条 = ANY(:ids) 语句），按传入顺序返回；不存在的 ID 跳过，重复的 ID 只返回一次。
+        启用缓存时（plain=False）先取缓存，只查未命中的 ID；plain=True 时可用 columns 只查部分列（需含 id）
+        """
+        ids = list(dict.fromkeys(ids))
+        found: List[Any] = []
+        missing = ids
+        use_cache = self.cache is not None and not plain
+        if use_cache:
+            missing = []
+            for id in ids:
+                snapshot = self.cache.get(id)
+                if snapshot is not None:
+                    found.append(self._from_snapshot(snapshot))
+                else:
+                    missing.append(id)
+            token = self.cache.token()
+        if missing:
+            rows = self._fetch(get_many_statement(_entity(plain, columns), missing), plain)
+            if use_cache:
+                for student in rows:
+                    self.cache.set(student.id, self._snapshot(student), token)
+            found += rows
+        return in_requested_order(found, ids)
+
+    @staticmethod
+    def _snapshot(student: Student) -> dict:
+        return {attr.key: getattr(student, attr.key) for attr in Student.__mapper__.column_attrs}
+
+    def _from_snapshot(self, snapshot: Mapping[str, Any]) -> Student:
+        """用缓存快照重建对象并并入当前 Session（load=False：不发 SELECT）"""
+        return self.session.merge(detached_from_snapshot(snapshot), load=False)
+
+    def get_row(self, id: int, columns: Optional[Sequence[str]] = None) -> Optional[Tuple]:
+        """
+        按 ID 查询列元组（columns 顺序，默认 ROW_COLUMNS，末尾附加行版本 row_version）；与 get_by_id 共用缓存。
+        缓存中由 get_by_id 写入的快照没有行版本，视为未命中
+        """
+        snapshot = self._row_snapshot(id, columns)
+        if snapshot is None:
+            return None
+        return tuple(snapshot[c] for c in columns or ROW_COLUMNS) + (snapshot[ROW_VERSION.name],)
 
-    def list_all(self, limit: int = 100, offset: int = 0) -> List[Student]:
-        """批量获取学生（默认100条）"""
-        stmt = select(Student).offset(offset).limit(limit)
-        return list(self.session.scalars(stmt).all())
+    def get_version(self, id: int) -> Optional[Any]:
+        """只查行版本与 updated_at（条件 GET 校验 ETag 用，不读整行、不经缓存）；不存在时为 None"""
+        return self.session.execute(
+            select(ROW_VERSION, Student.updated_at).where(Student.id == id), bind_arguments=REPLICA
+        ).first()
+
+    def _row_snapshot(self, id: int, columns: Optional[Sequence[str]] = None) -> Optional[dict]:
+        """带行版本的快照：先查缓存，未命中时查库（启用 singleflight 时并发的相同 ID 只查一次）"""
+        if self.cache is not None:
+            snapshot = self.cache.get(id)
+            if snapshot is not None and ROW_VERSION.name in snapshot:
+                return snapshot
+        if columns is not None:
+            # 只查部分列：快照不完整，不回填缓存，也不与查整行的调用合并
+            row = self.session.execute(
+                _entity(True, columns).add_columns(ROW_VERSION).where(Student.id == id), bind_arguments=REPLICA
+            ).first()
+            return None if row is None else row._asdict()
+        if self.flight is None:
+            return self._load_snapshot(id)
+        return self.flight.do(id, lambda: self._load_snapshot(id))
+
+    def _load_snapshot(self, id: int) -> Optional[dict]:
+        token = self.cache.token() if self.cache is not None else None
+        row = self.session.execute(row_snapshot_statement(id), bind_arguments=REPLICA).first()
+        if row is None:
+            return None
+        snapshot = row._asdict()
+        if self.cache is not None:
+            self.cache.set(id, snapshot, token)
+        return snapshot
+
+    def table_version(self) -> Optional[TableVersion]:
+        """
+        students 表级版本；表与删除记录都为空时为 None。
+        事务号顺序与提交顺序不一定相同：比最大 change_xid 小的事务稍后提交时最大值不变，
+        所以把这些仍在运行的事务号也算进版本，它们结束后版本随之变化（不会把旧列表当作最新）
+        """
+        row = self.session.execute(TABLE_VERSION_SQL).first()
+        if row is None:
+            return None
+        version = str(row.change_xid)
+        if row.pending:
+            version += f".{zlib.crc32(row.pending.encode()):08x}"
+        return TableVersion(version, row.written_at)
+
+    def list_all(
+        self, limit: int = 100, offset: int = 0, plain: bool = False, columns: Optional[Sequence[str]] = None
+    ) -> List[Any]:
+        """批量获取学生（默认100条）；plain=True 时可用 columns 只查部分列"""
+        stmt = _entity(plain, columns).order_by(Student.id).offset(offset).limit(limit)
+        return self._fetch(stmt, plain)
+
+    def _fetch(self, stmt, plain: bool) -> List[Any]:
+        """只读查询（get_many / list_all / list_keyset 共用），配置了只读副本时可走副本"""
+        result = self.session.execute(stmt, bind_arguments=REPLICA)
+        return list(result.all() if plain else result.scalars().all())
+
+    def list_keyset(
+        self,
+        limit: int = 100,
+        cursor: Optional[Cursor] = None,
+        sort_by: SortKey = "id",
+        order: SortOrder = "asc",
+        plain: bool = False,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Tuple[List[Any], Optional[Cursor]]:
+        """
+        游标分页：按 (sort_by, id) 在索引上定位，返回本页数据和下一页游标（无下一页为 None）
+        plain=True 时本页数据为列元组（顺序同 columns，默认 ROW_COLUMNS；columns 需含 id 与 sort_by）
+        """
+        check_cursor(cursor, sort_by, order)
+        nullable = SORT_COLUMNS[sort_by].nullable
+        in_null_region = nullable and cursor is not None and cursor.value is None
+
+        rows: List[Any] = []
+        if not in_null_region:
+            stmt = keyset_select(_entity(plain, columns), sort_by, order, cursor).limit(limit + 1)
+            rows = self._fetch(stmt, plain)
+        if nullable and len(rows) <= limit:
+            # 非空区间翻完后接着翻 NULL 区间（NULLS LAST）
+            stmt = keyset_select(
+                _entity(plain, columns), sort_by, order, cursor if in_null_region else None, null_region=True
+            ).limit(limit + 1 - len(rows))
+            rows += self._fetch(stmt, plain)
+        return page_with_cursor(rows, limit, sort_by, order)
+
+    def query(self, q: StudentQuery) -> Tuple[List[Student], int, bool]:
+        """按 StudentQuery 筛选 + 排序 + 分页，返回 (本页数据, 总数, 总数是否精确)"""
+        filters = build_filters(q)
+        rows = list(self.session.scalars(query_statement(q, filters), bind_arguments=REPLICA).all())
+        total, exact = self.count(filters)
+        return rows, total, exact
+
+    def changes_since(self, token: ChangeToken, limit: int = 1000) -> ChangeBatch:
+        """
+        返回 token 之后发生变更 / 删除的学生，按 (change_xid, id) 排序，最多 limit 条。
+        只返回 change_xid 低于安全水位（仍在运行的最老事务号）的变更：
+        未提交事务的写入留到下一次同步，不会因提交顺序与事务号顺序不同而漏掉
+        """
+        horizon = self.session.scalar(select(SNAPSHOT_XMIN))
+        position = (token.xid, token.last_id)
+
+        live = self.session.execute(
+            _entity(True)
+            .where(tuple_(Student.change_xid, Student.id) > position, Student.change_xid < horizon)
+            .order_by(Student.change_xid, Student.id)
+            .limit(limit + 1)
+        ).all()
+        deleted = self.session.execute(
+            select(StudentTombstone.id, StudentTombstone.student_id, StudentTombstone.change_xid)
+            .where(tuple_(StudentTombstone.change_xid, StudentTombstone.id) > position,
+                   StudentTombstone.change_xid < horizon)
+            .order_by(StudentTombstone.change_xid, StudentTombstone.id)
+            .limit(limit + 1)
+        ).all()
+
+        # 两路各自有序，归并后截取前 limit 条
+        merged = list(islice(
+            heapq.merge(((r.change_xid, r.id, False, r) for r in live),
+                        ((r.change_xid, r.id, True, r) for r in deleted)),
+            limit + 1,
+        ))
+        batch = ChangeBatch(has_more=len(merged) > limit)
+        merged = merged[:limit]
+        for _, _, is_deleted, row in merged:
+            (batch.deleted if is_deleted else batch.rows).append(row)
+        if batch.has_more:
+            batch.next_token = ChangeToken(merged[-1][0], merged[-1][1])
+        else:
+            batch.next_token = max(token, ChangeToken(horizon))
+        return batch
+
+    def prune_tombstones(self, retention: timedelta) -> int:
+        """
+        删除早于 retention 的墓碑，返回删除的行数。只删 change_xid 低于安全水位的（增量同步已能读到），
+        并保留最新的一条（表级版本 / 列表 ETag 读取它，删掉会让版本回退到删除之前的值）
+        """
+        newest = select(func.max(StudentTombstone.change_xid)).scalar_subquery()
+        result = self.session.execute(
+            delete(StudentTombstone).where(
+                StudentTombstone.deleted_at < func.now() - retention,
+                StudentTombstone.change_xid < SNAPSHOT_XMIN,
+                StudentTombstone.change_xid < newest,
+            )
+        )
+        return result.rowcount
+
+    def search(self, query: str, limit: int = 20, columns: Optional[Sequence[str]] = None) -> List[Any]:
+        """姓名 / 学号模糊搜索，返回按相关度排序的列元组（顺序同 columns，默认 ROW_COLUMNS），最多 limit 行"""
+        if not query.strip():
+            return []
+        return self.session.execute(
+            search_statement(_entity(True, columns).selected_columns, query, limit), bind_arguments=REPLICA
+        ).all()
+
+    def stream_rows(self, batch_size: int = 1000, filters: Iterable = ()) -> Iterator[List[Any]]:
+        """
+        服务端游标（psycopg2 命名游标）按 id 顺序逐批读取全部列，每次产出一批 Row。
+        只取列元组、不建 ORM 对象，内存占用只与 batch_size 有关；需在事务内迭代完毕
+        """
+        stmt = (
+            _entity(True)
+            .where(*filters)
+            .order_by(Student.id)
+            .execution_options(stream_results=True, yield_per=batch_size)
+        )
+        result = self.session.execute(stmt)
+        try:
+            yield from result.partitions()
+        finally:
+            result.close()  # 客户端中途断开时也要关闭游标
+
+    def count(self, filters: list, limit: Optional[int] = None) -> Tuple[int, bool]:
+        """
+        计数：最多数到 limit+1 行（选择性高的条件可得精确值）；
+        超过上限说明结果集很大，改用规划器估算值，返回 (总数, 是否精确)
+        """
+        limit = EXACT_COUNT_LIMIT if limit is None else limit
+        n = self.session.scalar(capped_count_statement(filters, limit), bind_arguments=REPLICA)
+        if n <= limit:
+            return n, True
+        return max(self.estimate_rows(select(Student.id).where(*filters)), n), False
+
+    def estimate_rows(self, stmt) -> int:
+        """EXPLAIN 取规划器估算行数（不执行查询）"""
+        sql, params = explain_statement(stmt, self.session.get_bind().dialect)
+        return plan_rows(self.session.connection(bind_arguments=REPLICA).exec_driver_sql(sql, params).scalar())
 
     def update(self, id: int, **kwargs) -> Optional[Student]:
         """更新学生信息 """
         stmt = update(Student).where(Student.id == id).values(**kwargs).returning(Student)
         result = self.session.execute(stmt)
         self.session.commit()
+        if self.cache is not None:
+            self.cache.invalidate(id)
         return result.scalar_one_or_none()
 
+    def update_many(
+        self, changes: Iterable[Tuple[int, Mapping[str, Any]]], batch_size: int = 1000
+    ) -> List[Any]:
+        """
+        批量修改：changes 为 [(id, {列: 新值}), ...]，各行修改的列可以不同。
+        每 batch_size 行一条 UPDATE ... FROM (VALUES ...) ... RETURNING，返回修改后的整行列元组（顺序同 ROW_COLUMNS，
+        不存在的 ID 不返回）。不 commit，由调用方决定何时提交；当前 Session 中已加载的对象不会同步刷新
+        """
+        updated: List[Any] = []
+        for stmt in update_many_statements(changes, batch_size):
+            updated += self.session.execute(stmt).all()
+        if self.cache is not None:
+            # 提交前的并发读仍可能回填旧值，由 TTL 兜底
+            for row in updated:
+                self.cache.invalidate(row.id)
+        return updated
+
     def delete(self, id: int) -> bool:
         """删除学生记录 """
         stmt = delete(Student).where(Student.id == id)
         result = self.session.execute(stmt)
         self.session.commit()
-        return result.rowcount > 0
\ No newline at end of file
+        if self.cache is not None:
+            self.cache.invalidate(id)
+        return result.rowcount > 0
+
+    def bulk_upsert(self, rows: Iterable[Mapping[str, Any]], batch_size: int = 1000) -> UpsertResult:
+        """按 student_id 批量 upsert，不 commit
+
+        每批先查 student_ids 登记表：已有学号按主键 UPDATE（可改入学日期，行移动到对应分区），
+        新学号多行 INSERT（需包含全部必填字段）。与并发插入撞上同一新学号时由 student_ids 主键报 IntegrityError
+        """
+        result = UpsertResult()
+        for batch in upsert_batches(rows, batch_size):
+            registered = dict(
+                (student_id, id) for student_id, id in self.session.execute(registered_statement(list(batch), True))
+            )
+            changes, new_rows = split_upsert(batch, registered)
+            updated = self.update_many(changes, batch_size)
+            for stmt in insert_statements(new_rows):
+                self.session.execute(stmt)
+            result.inserted += len(new_rows)
+            result.updated += len(updated)
+        return result
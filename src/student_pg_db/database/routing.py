@@ -0,0 +1,101 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-08 10:14:37
+FilePath: /student_pg_db/src/student_pg_db/database/routing.py
+'''
+"""
+读写分离：写入与读己之写走主库，仓储层标记过的只读查询按轮询分给只读副本
+  - 可走副本的查询以 bind_arguments=REPLICA 执行；普通 Session 忽略该参数，行为不变
+  - 副本复制延迟超过阈值或连接失败时跳过，全部不可用则回主库
+  - 一个 Session 只选一次副本（同一请求内的读取落在同一快照来源上）
+  - Session 写过之后（flush / INSERT·UPDATE·DELETE / text 语句），后续读取都留在主库，直到 Session 结束
+"""
+import threading
+import time
+from itertools import count
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import TextClause, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+# 仓储层只读查询的 bind_arguments
+REPLICA = {"replica": True}
+
+# 复制延迟（秒）：已收到的 WAL 全部回放完时为 0（主库空闲时回放时间戳不再前进，不能直接相减）；
+# 不在恢复模式（即连的是主库）时也为 0
+LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+class ReplicaSet:
+    """一组只读副本：轮询分配，跳过延迟超过 max_lag 的副本；延迟检查结果缓存 check_interval 秒"""
+
+    def __init__(
+        self,
+        engines: Iterable[Engine],
+        max_lag: float = 5.0,
+        check_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.engines = list(engines)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.clock = clock
+        self._next = count()
+        self._lock = threading.Lock()
+        self._checked: Dict[Engine, Tuple[float, float]] = {}  # engine -> (检查时间, 延迟)
+
+    def lag(self, engine: Engine) -> float:
+        """副本复制延迟（秒）；连接或查询失败视为无穷大"""
+        now = self.clock()
+        checked = self._checked.get(engine)
+        if checked is not None and now - checked[0] < self.check_interval:
+            return checked[1]
+        try:
+            with engine.connect() as conn:
+                lag = float(conn.scalar(text(LAG_SQL)))
+        except DBAPIError:
+            lag = float("inf")
+        self._checked[engine] = (now, lag)
+        return lag
+
+    def choose(self) -> Optional[Engine]:
+        """从轮询的下一个副本开始，返回第一个延迟不超过 max_lag 的副本；都不可用时返回 None"""
+        if not self.engines:
+            return None
+        with self._lock:
+            start = next(self._next)
+        for i in range(len(self.engines)):
+            engine = self.engines[(start + i) % len(self.engines)]
+            if self.lag(engine) <= self.max_lag:
+                return engine
+        return None
+
+
+class RoutingSession(Session):
+    """按语句选择主库或副本的 Session（bind 为主库，replicas 为 None 时与普通 Session 相同）"""
+
+    def __init__(self, *args, replicas: Optional[ReplicaSet] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        # 为 True 后所有语句走主库：本 Session 写过，或没有可用副本。
+        # 直接用 session.connection() 执行写入时需调用方自行置位
+        self.primary_only = False
+        self._replica: Optional[Engine] = None
+
+    def get_bind(self, mapper=None, *, clause=None, replica: bool = False, **kw):
+        if replica and not self.primary_only:
+            if self._replica is None:
+                self._replica = self.replicas.choose() if self.replicas is not None else None
+            if self._replica is not None:
+                return self._replica
+            self.primary_only = True
+        elif self._flushing or getattr(clause, "is_dml", False) or isinstance(clause, TextClause):
+            self.primary_only = True
+        return super().get_bind(mapper, clause=clause, **kw)
@@ -0,0 +1,89 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-02 10:32:07
+FilePath: /student_pg_db/src/student_pg_db/database/search.py
+'''
+"""
+姓名 / 学号模糊搜索：查询端切词（与 models/student_search.py 中的 SQL 函数规则一致）+ 语句构造
+  - 姓名：查询词的全部二元组都要出现在 grams 中（GIN @>），再用 ILIKE 复核；单字按姓氏（开头）匹配
+  - 学号：前缀（区分大小写）走 varchar_pattern_ops 索引，尾号（>= 2 位）走 grams 中的后缀词项
+每一路按 id 顺序最多取 SEARCH_CANDIDATES 个候选再排序，宽泛的查询词也不会排序大量行，结果确定；
+姓名 / 学号完全相等的行单独一路（走普通 btree 索引），不受候选上限影响，总会返回
+"""
+from typing import List, Optional
+
+from sqlalchemy import case, func, literal, or_, select, union_all
+
+from ..models.student_search import StudentSearch
+from ..models.students import Student
+
+# 每一路候选上限：排序只在候选集内进行
+SEARCH_CANDIDATES = 1000
+# grams 中学号后缀的最大长度（与 student_search_grams 一致）；更长的尾号取最后 6 位查找再复核
+SUFFIX_MAX = 6
+# 与 grams 相同的姓名规范化（去空白、转小写），用于复核与排序
+NORMALIZED_NAME = func.lower(func.regexp_replace(Student.name, r"\s+", "", "g"))
+
+
+def normalize(text: str) -> str:
+    return "".join(text.split()).lower()
+
+
+def name_grams(query: str) -> List[str]:
+    """姓名查询词 -> 需全部命中的词项；多字取二元组，单字取开头词项"""
+    q = normalize(query)
+    if len(q) == 1:
+        return [f"n:^{q}"]
+    return sorted({f"n:{q[i:i + 2]}" for i in range(len(q) - 1)})
+
+
+def suffix_gram(query: str) -> Optional[str]:
+    q = normalize(query)
+    return f"s:{q[-SUFFIX_MAX:]}" if len(q) >= 2 else None
+
+
+def name_filter(query: str):
+    """StudentQuery.name 筛选：多字查询先经 grams 索引缩小范围；单字仍为包含匹配"""
+    contains = NORMALIZED_NAME.contains(normalize(query), autoescape=True)
+    if len(normalize(query)) < 2:
+        return contains
+    ids = select(StudentSearch.id).where(StudentSearch.grams.contains(name_grams(query)))
+    return Student.id.in_(ids) & contains
+
+
+def search_statement(columns, query: str, limit: int):
+    """
+    返回按相关度排序的前 limit 行：
+    完全相等 > 前缀匹配 > 包含（学号为尾号）匹配，同级按姓名长度、id 排序
+    """
+    q, raw = normalize(query), query.strip()
+    term_matches = [StudentSearch.grams.contains(name_grams(query))]
+    if (suffix := suffix_gram(query)) is not None:
+        term_matches.append(StudentSearch.grams.contains([suffix]))
+    id_prefix = Student.student_id.startswith(raw, autoescape=True)
+    candidates = union_all(
+        select(Student.id).where(or_(Student.name == raw, Student.student_id == raw)),
+        select(StudentSearch.id).where(or_(*term_matches)).order_by(StudentSearch.id).limit(SEARCH_CANDIDATES),
+        select(Student.id).where(id_prefix).order_by(Student.id).limit(SEARCH_CANDIDATES),
+    ).cte("candidates")
+
+    name = NORMALIZED_NAME
+    student_id = func.lower(Student.student_id)
+    # grams 只保证词项都出现，需复核真实的子串关系
+    matches = [
+        name.contains(q, autoescape=True) if len(q) > 1 else name.startswith(q, autoescape=True),
+        id_prefix,
+    ]
+    if suffix is not None:
+        matches.append(student_id.endswith(q, autoescape=True))
+    rank = case(
+        (or_(name == q, student_id == q), literal(0)),
+        (or_(name.startswith(q, autoescape=True), id_prefix), literal(1)),
+        else_=literal(2),
+    )
+    return (
+        select(*columns)
+        .where(Student.id.in_(select(candidates.c.id)), or_(*matches))
+        .order_by(rank, func.length(Student.name), Student.id)
+        .limit(limit)
+    )
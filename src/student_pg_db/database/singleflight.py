@@ -0,0 +1,111 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-04 09:52:44
+FilePath: /student_pg_db/src/student_pg_db/database/singleflight.py
+'''
+"""
+请求合并（singleflight）：同一个键同时只有一次查询在执行，并发的相同查询等待并共享它的结果
+  - SingleFlight：同步版（线程池中的同步路由）
+  - AsyncSingleFlight：异步版（同一事件循环中的协程）
+共享的结果会交给多个调用方，只应是不可变的值（列元组 / 快照），不要共享绑定到某个 Session 的 ORM 对象。
+执行查询的调用方出错时，同批等待方收到同一个异常；异步版中执行方被取消时，等待方重新发起查询
+"""
+import asyncio
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+@dataclass
+class FlightStats:
+    calls: int = 0
+    executed: int = 0  # 实际执行的查询次数
+    coalesced: int = 0  # 等待并共享了他人查询结果的调用次数
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.stats = FlightStats()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self.stats.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats.executed += 1
+            else:
+                self.stats.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**asdict(self.stats), "in_flight": len(self._calls)}
+
+
+class AsyncSingleFlight:
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.stats = FlightStats()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            self.stats.calls += 1
+            future = self._calls.get(key)
+            if future is None:
+                break
+            self.stats.coalesced += 1
+            try:
+                # shield：等待方自己被取消时不影响共享的 future
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                # 执行方被取消（而不是自己被取消）：重新发起，由某个等待方接手执行
+                self.stats.calls -= 1
+
+        self.stats.executed += 1
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # 标记为已读取：没有等待方时不报 "exception was never retrieved"
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def snapshot(self) -> dict:
+        return {**asdict(self.stats), "in_flight": len(self._calls)}
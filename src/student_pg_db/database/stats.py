@@ -0,0 +1,106 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-02-28 11:24:50
+FilePath: /student_pg_db/src/student_pg_db/database/stats.py
+'''
+"""
+聚合统计：从 student_stats 直方图计算人数、GPA 均值与分位数
+读取量只与分组数及未折叠的增量有关（每组最多 402 个 GPA 桶），与 students 行数无关
+"""
+import math
+from dataclasses import dataclass, field
+from itertools import groupby
+from typing import Dict, List, Literal, Optional, Sequence, Tuple
+
+from sqlalchemy import BigInteger, cast, func, select, text, union_all
+from sqlalchemy.orm import Session
+
+from ..models.student_stats import FOLD_LOCK_KEY, FOLD_SQL, NULL_BUCKET, REBUILD_SQL, StudentStat, StudentStatDelta
+from .routing import REPLICA
+
+StatsDimension = Literal["all", "major", "class_name", "status", "enrollment_year"]
+
+
+@dataclass
+class GroupStats:
+    value: str
+    count: int = 0
+    gpa_count: int = 0
+    gpa_mean: Optional[float] = None
+    gpa_percentiles: Dict[str, float] = field(default_factory=dict)
+
+
+def _percentile(histogram: List[Tuple[int, int]], total: int, p: float) -> float:
+    """与 percentile_cont 相同的线性插值分位数；histogram 为按桶升序的 (桶, 人数)"""
+    position = p * (total - 1)
+    lo, hi = math.floor(position), math.ceil(position)
+    lo_value = hi_value = None
+    seen = 0
+    for bucket, n in histogram:
+        seen += n
+        if lo_value is None and seen > lo:
+            lo_value = bucket
+        if seen > hi:
+            hi_value = bucket
+            break
+    return round((lo_value + (hi_value - lo_value) * (position - lo)) / 100, 4)
+
+
+def summarize(value: str, histogram: List[Tuple[int, int]], percentiles: Sequence[int]) -> GroupStats:
+    stats = GroupStats(value=value, count=sum(n for _, n in histogram))
+    graded = [(bucket, n) for bucket, n in histogram if bucket != NULL_BUCKET]
+    stats.gpa_count = sum(n for _, n in graded)
+    if stats.gpa_count:
+        stats.gpa_mean = round(sum(bucket * n for bucket, n in graded) / stats.gpa_count / 100, 4)
+        stats.gpa_percentiles = {
+            f"p{p}": _percentile(graded, stats.gpa_count, p / 100) for p in percentiles
+        }
+    return stats
+
+
+class StudentStatsRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def groups(
+        self,
+        dimension: StatsDimension,
+        value: Optional[str] = None,
+        percentiles: Sequence[int] = (50, 90),
+    ) -> List[GroupStats]:
+        """按维度返回各分组统计（value 指定时只返回该组）；汇总表与未折叠的增量相加"""
+        parts = []
+        for table in (StudentStat, StudentStatDelta):
+            part = select(table.value, table.gpa_bucket, table.n).where(table.dimension == dimension)
+            if value is not None:
+                part = part.where(table.value == value)
+            parts.append(part)
+        merged = union_all(*parts).subquery()
+        n = cast(func.sum(merged.c.n), BigInteger).label("n")  # bigint 的 sum 为 numeric
+        stmt = (
+            select(merged.c.value, merged.c.gpa_bucket, n)
+            .group_by(merged.c.value, merged.c.gpa_bucket)
+            .having(n > 0)
+            .order_by(merged.c.value, merged.c.gpa_bucket)
+        )
+        rows = self.session.execute(stmt, bind_arguments=REPLICA).all()
+        return [
+            summarize(group, [(r.gpa_bucket, r.n) for r in items], percentiles)
+            for group, items in groupby(rows, key=lambda r: r.value)
+        ]
+
+    def fold(self) -> Optional[int]:
+        """
+        把已提交的增量折叠进汇总表，返回更新的汇总行数；其他会话正在折叠时跳过并返回 None。
+        只有折叠事务会更新 student_stats 的行，写入端只追加增量。不提交事务
+        """
+        locked = self.session.scalar(select(func.pg_try_advisory_xact_lock(FOLD_LOCK_KEY)))
+        if not locked:
+            return None
+        return self.session.execute(text(FOLD_SQL)).rowcount
+
+    def rebuild(self) -> int:
+        """全量重建汇总表（期间阻塞 students 写入），返回汇总行数。不提交事务"""
+        for sql in REBUILD_SQL:
+            self.session.execute(text(sql))
+        return self.session.scalar(select(func.count()).select_from(StudentStat))
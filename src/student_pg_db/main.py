@@ -1,17 +1,26 @@
-from fastapi import FastAPI, Depends, HTTPException, Query
+from typing import Optional
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
+from .api.conditional import etag_matches, not_modified, validator_headers
 from .core.session import get_session
-from .database.repository import StudentRepository
-from .schemas.student import StudentCreate, StudentResponse, StudentUpdate
+from .api.projection import response_fields
+from .database.repository import StudentRepository, projection_columns
+from .database.pagination import Cursor, InvalidCursor, SortKey, SortOrder
+from .schemas.serializer import serializer_for
+from .schemas.student import StudentCreate, StudentResponse
 from .models.students import Student
 from fastapi import FastAPI
-from student_pg_db.api.routes.students import router
+from student_pg_db.api.routes.students import parse_ids, router
+from student_pg_db.api.routes.async_students import router as async_router
+from student_pg_db.api.routes.metrics import router as metrics_router
 
 
 
 
 app = FastAPI(title="Student Management System")
 app.include_router(router)
+app.include_router(async_router)
+app.include_router(metrics_router)
 
 @app.post("/students/")
 def create_student(
@@ -23,27 +32,56 @@ def create_student(
     return student
 
 @app.get("/students/", response_model=list[StudentResponse])
+@app.get("/students", response_model=list[StudentResponse], include_in_schema=False)
 def list_students(
+    request: Request,
+    ids: Optional[str] = Query(None, description="按 ID 批量获取（逗号分隔，最多 1000 个），按传入顺序返回"),
     skip: int = 0, 
-    limit: int = Query(100, le=1000), 
+    limit: int = Query(100, ge=1, le=1000), 
+    cursor: Optional[str] = Query(None, description="游标分页：上一页响应头 X-Next-Cursor 的值"),
+    sort_by: SortKey = Query("id", description="游标分页排序字段（id 作为决胜键）"),
+    order: SortOrder = Query("asc", description="排序方向"),
+    fields: Optional[tuple[str, ...]] = Depends(response_fields),
     db: Session = Depends(get_session)
 ):
+    """
+    学生列表。skip > 0 时沿用 OFFSET 分页；否则为游标分页，
+    下一页游标通过响应头 X-Next-Cursor 返回（没有下一页时不返回该头）。
+    只查列元组并直接拼 JSON，不经 ORM 对象与逐行 Pydantic 校验。
+    ETag 为表级版本号：表没有任何写入时，带 If-None-Match 的请求直接返回 304。
+    传 ids 时忽略分页参数，一次查询返回这些学生（不存在的 ID 跳过）。
+    fields 只返回（并只查询）指定字段，如 fields=id,student_id,name,gpa
+    """
     repo = StudentRepository(db)
-    return repo.list_all(offset=skip, limit=limit)
+    headers = {}
+    version = repo.table_version()
+    if version is not None:
+        headers = validator_headers(f'"t{version.version}"', version.updated_at)
+        if etag_matches(request, headers["ETag"]):
+            return not_modified(headers)
 
-@app.get("/students/{id}", response_model=StudentResponse)
-def get_student(id: int, db: Session = Depends(get_session)):
-    repo = StudentRepository(db)
-    student = repo.get_by_id(id)
-    if not student:
-        raise HTTPException(status_code=404, detail="Student not found")
-    return student
-
-@app.patch("/students/{id}", response_model=StudentResponse)
-def update_student(id: int, data: StudentUpdate, db: Session = Depends(get_session)):
-    repo = StudentRepository(db)
-    # 只更新传入的字段
-    updated = repo.update(id, **data.model_dump(exclude_unset=True))
-    if not updated:
-        raise HTTPException(status_code=404, detail="Update failed: Student not found")
-    return updated
\ No newline at end of file
+    # 游标取自本页最后一行的 (排序列, id)，这两列总要查询
+    columns = projection_columns(fields, "id", sort_by)
+    serializer = serializer_for(columns, fields)
+    if ids is not None:
+        rows = repo.get_many(parse_ids(ids), plain=True, columns=columns)
+        return Response(serializer.dumps_many(rows), media_type="application/json", headers=headers)
+    if skip:
+        if cursor:
+            raise HTTPException(status_code=400, detail="cursor 与 skip 不能同时使用")
+        rows = repo.list_all(offset=skip, limit=limit, plain=True, columns=columns)
+        return Response(serializer.dumps_many(rows), media_type="application/json", headers=headers)
+    try:
+        rows, next_cursor = repo.list_keyset(
+            limit=limit,
+            cursor=Cursor.decode(cursor) if cursor else None,
+            sort_by=sort_by,
+            order=order,
+            plain=True,
+            columns=columns,
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = next_cursor.encode()
+    return Response(serializer.dumps_many(rows), media_type="application/json", headers=headers)
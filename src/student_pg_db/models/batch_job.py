@@ -0,0 +1,41 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-06 09:18:42
+FilePath: /student_pg_db/src/student_pg_db/models/batch_job.py
+'''
+"""
+分块批量修改任务的检查点（student-db jobs 使用）
+每处理完一块就在同一事务里推进 last_id，任务中断后从 last_id 之后继续，已提交的块不会重做
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import BigInteger, DateTime, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+# 任务状态：running 执行中 / interrupted 被中断 / failed 出错 / done 完成
+JOB_STATUSES = ("running", "interrupted", "failed", "done")
+
+
+class BatchJob(Base):
+    __tablename__ = "batch_jobs"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True, comment="任务名（续跑时按名称查找）")
+    kind: Mapped[str] = mapped_column(String(32), nullable=False, comment="任务类型")
+    params: Mapped[Dict[str, Any]] = mapped_column(JSONB, nullable=False, comment="任务参数（筛选条件与目标值）")
+    status: Mapped[str] = mapped_column(String(16), nullable=False, server_default="running", comment="任务状态")
+    last_id: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0", comment="已处理到的学生主键ID（按 id 升序分块）")
+    rows_scanned: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0", comment="已扫描的匹配行数")
+    rows_updated: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0", comment="已修改的行数")
+    chunks: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0", comment="已提交的块数")
+    error: Mapped[Optional[str]] = mapped_column(Text, comment="最后一次失败的错误信息")
+    started_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), comment="创建时间"
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now(), comment="最后一次推进检查点的时间"
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), comment="完成时间")
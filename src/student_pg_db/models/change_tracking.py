@@ -0,0 +1,80 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-02-27 09:35:12
+FilePath: /student_pg_db/src/student_pg_db/models/change_tracking.py
+'''
+"""
+students 变更追踪（增量同步 GET /students/changes 使用）
+  - students.change_xid：最后一次写入该行的事务号（xid8 转 bigint），
+    INSERT 由列默认值填写（COPY 同样生效），UPDATE 由行级触发器改写
+  - student_tombstones：被删除的学生，由语句级触发器（transition table）批量写入
+读取端用 pg_snapshot_xmin 作为安全水位：小于水位的事务都已结束，不会再出现更小的 change_xid
+墓碑保留 TOMBSTONE_RETENTION_DAYS 天（student-db prune-tombstones 清理），超过这么久没有同步的客户端需要重新全量同步
+"""
+from datetime import datetime
+
+from sqlalchemy import DDL, BigInteger, DateTime, Index, Integer, String, event, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+# 墓碑默认保留天数：增量同步的客户端至少每隔这么久同步一次
+TOMBSTONE_RETENTION_DAYS = 30
+
+# 当前事务号（子事务中也返回顶层事务号）
+CURRENT_XID = text("(pg_current_xact_id())::text::bigint")
+
+
+class StudentTombstone(Base):
+    __tablename__ = "student_tombstones"
+    __table_args__ = (
+        Index("ix_student_tombstones_change_xid_id", "change_xid", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False, comment="被删除学生的主键ID")
+    student_id: Mapped[str] = mapped_column(String(64), nullable=False, comment="被删除学生的学号")
+    change_xid: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, server_default=CURRENT_XID, comment="执行删除的事务号"
+    )
+    deleted_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), comment="删除时间"
+    )
+
+
+TRACKING_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION students_touch_change_xid() RETURNS trigger AS $$
+    BEGIN
+        NEW.change_xid := pg_current_xact_id()::text::bigint;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER students_touch_change_xid
+    BEFORE UPDATE ON students
+    FOR EACH ROW EXECUTE FUNCTION students_touch_change_xid()
+    """,
+    """
+    CREATE OR REPLACE FUNCTION students_record_tombstones() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO student_tombstones (id, student_id)
+        SELECT id, student_id FROM deleted_rows
+        ON CONFLICT (id) DO NOTHING;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER students_record_tombstones
+    AFTER DELETE ON students
+    REFERENCING OLD TABLE AS deleted_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION students_record_tombstones()
+    """,
+]
+
+
+def track_changes(table) -> None:
+    """create_all 建表后自动挂触发器（与 3d81c6f0e2b4 迁移中的语句一致）"""
+    for sql in TRACKING_SQL:
+        event.listen(table, "after_create", DDL(sql).execute_if(dialect="postgresql"))
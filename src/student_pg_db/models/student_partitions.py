@@ -0,0 +1,149 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-07 09:26:51
+FilePath: /student_pg_db/src/student_pg_db/models/student_partitions.py
+'''
+"""
+students 按入学年份范围分区（PARTITION BY RANGE (enrollment_date)）
+  - 每届一个分区 students_y<年份>，[1 月 1 日, 次年 1 月 1 日)；不在任何分区范围内的行落入 students_default
+  - 分区表的唯一约束必须包含分区键，主键因此为 (id, enrollment_date)；
+    学号的全局唯一由 student_ids 登记表（学号主键）保证，students 上的语句级触发器随写入维护
+  - 归档一届：DETACH 该分区并改名为 students_archive_y<年份>，不逐行 DELETE；
+    汇总表、检索词表、登记表与删除记录按被摘下的表批量修正（见 archive_sql）
+"""
+from typing import List
+
+from sqlalchemy import DDL, Integer, String, event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+from .student_stats import subtract_sql
+
+DEFAULT_PARTITION = "students_default"
+
+
+def partition_name(year: int) -> str:
+    return f"students_y{year}"
+
+
+def archive_name(year: int) -> str:
+    return f"students_archive_y{year}"
+
+
+class StudentIdRegistry(Base):
+    __tablename__ = "student_ids"
+
+    student_id: Mapped[str] = mapped_column(String(64), primary_key=True, comment="学号（全局唯一）")
+    id: Mapped[int] = mapped_column(Integer, nullable=False, comment="学生主键ID")
+
+
+# 建分区：默认分区中已有该年份的行时先搬到新表再 ATTACH，否则 ATTACH 校验失败。
+# 搬迁直接读写分区本身，不触发 students 上的语句级触发器（行没有增减，汇总表等无需变化）
+PARTITION_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION create_student_partition(year int) RETURNS text AS $$
+DECLARE
+    part text := 'students_y' || year;
+    lo text := quote_literal(make_date(year, 1, 1));
+    hi text := quote_literal(make_date(year + 1, 1, 1));
+BEGIN
+    IF to_regclass(part) IS NOT NULL THEN
+        RETURN part;
+    END IF;
+    EXECUTE 'CREATE TABLE ' || quote_ident(part) || ' (LIKE students INCLUDING DEFAULTS)';
+    IF to_regclass('students_default') IS NOT NULL THEN
+        EXECUTE 'WITH moved AS (DELETE FROM students_default WHERE enrollment_date >= ' || lo
+            || ' AND enrollment_date < ' || hi || ' RETURNING *) INSERT INTO ' || quote_ident(part)
+            || ' SELECT * FROM moved';
+    END IF;
+    EXECUTE 'ALTER TABLE students ATTACH PARTITION ' || quote_ident(part)
+        || ' FOR VALUES FROM (' || lo || ') TO (' || hi || ')';
+    RETURN part;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+REGISTRY_TRIGGER_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION students_registry_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO student_ids (student_id, id) SELECT student_id, id FROM new_rows;
+        ELSIF TG_OP = 'DELETE' THEN
+            DELETE FROM student_ids r USING old_rows o WHERE r.student_id = o.student_id;
+        ELSE
+            -- 只处理学号变化的行；先删后插，同一语句内互换学号不会误报冲突
+            DELETE FROM student_ids r USING old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE r.student_id = o.student_id AND n.student_id <> o.student_id;
+            INSERT INTO student_ids (student_id, id)
+            SELECT n.student_id, n.id FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE n.student_id <> o.student_id;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION students_registry_truncate() RETURNS trigger AS $$
+    BEGIN
+        DELETE FROM student_ids;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER students_registry_insert AFTER INSERT ON students
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION students_registry_apply()
+    """,
+    """
+    CREATE TRIGGER students_registry_update AFTER UPDATE ON students
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION students_registry_apply()
+    """,
+    """
+    CREATE TRIGGER students_registry_delete AFTER DELETE ON students
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION students_registry_apply()
+    """,
+    """
+    CREATE TRIGGER students_registry_truncate AFTER TRUNCATE ON students
+    FOR EACH STATEMENT EXECUTE FUNCTION students_registry_truncate()
+    """,
+]
+
+def register_sql(source: str) -> str:
+    """把 source（与 students 同结构的表或子查询）的学号登记到 student_ids，绕过触发器导入后使用；学号重复时报主键冲突"""
+    return f"INSERT INTO student_ids (student_id, id) SELECT student_id, id FROM {source} s"
+
+
+# 新建库的初始分区：默认分区 + 往前 5 届到下一届
+INITIAL_PARTITIONS_SQL = [
+    f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF students DEFAULT",
+    """
+    SELECT create_student_partition(y)
+    FROM generate_series(extract(year FROM current_date)::int - 5, extract(year FROM current_date)::int + 1) y
+    """,
+]
+
+
+def archive_sql(year: int) -> List[str]:
+    """
+    归档一届：摘下分区并改名，再按被摘下的表修正 students 的派生数据
+    （与逐行 DELETE 经触发器得到的结果一致：删除记录、登记表、检索词、汇总表）
+    """
+    archived = archive_name(year)
+    return [
+        f"ALTER TABLE students DETACH PARTITION {partition_name(year)}",
+        f"ALTER TABLE {partition_name(year)} RENAME TO {archived}",
+        f"INSERT INTO student_tombstones (id, student_id) SELECT id, student_id FROM {archived} "
+        "ON CONFLICT (id) DO NOTHING",
+        f"DELETE FROM student_ids r USING {archived} a WHERE r.student_id = a.student_id",
+        f"DELETE FROM student_search s USING {archived} a WHERE s.id = a.id",
+        subtract_sql(archived),
+    ]
+
+
+def track_partitions(table) -> None:
+    """create_all 建表后自动挂登记表触发器、建分区（与 9d4b7e2a6c13 迁移中的语句一致）"""
+    for sql in [*REGISTRY_TRIGGER_SQL, PARTITION_FUNCTION_SQL, *INITIAL_PARTITIONS_SQL]:
+        event.listen(table, "after_create", DDL(sql).execute_if(dialect="postgresql"))
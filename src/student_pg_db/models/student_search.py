@@ -0,0 +1,118 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-02 09:46:18
+FilePath: /student_pg_db/src/student_pg_db/models/student_search.py
+'''
+"""
+students 检索词表（姓名 / 学号模糊搜索使用）
+每个学生一行 grams（text[]，GIN 索引），由 students 上的语句级触发器维护：
+  - n:xx  姓名（去空白、转小写）首尾补 ^ / $ 后的二元组，中文姓名 2-3 字时比三元组更有区分度
+  - s:xxx 学号（转小写）长度 2-6 的后缀，按尾号查找只需一次精确的词项查找
+学号前缀仍走 students 上的 varchar_pattern_ops 索引。
+只用内置的 text[] + GIN（array_ops），不依赖 pg_trgm 扩展
+"""
+from typing import List
+
+from sqlalchemy import DDL, Index, Integer, Text, event
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class StudentSearch(Base):
+    __tablename__ = "student_search"
+    __table_args__ = (
+        Index("ix_student_search_grams", "grams", postgresql_using="gin"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False, comment="学生主键ID")
+    grams: Mapped[List[str]] = mapped_column(ARRAY(Text), nullable=False, comment="姓名二元组与学号后缀")
+
+
+# 与 database/search.py 中查询端的切词规则保持一致（plpgsql 循环比 generate_series 子查询快约 4 倍，影响 COPY 导入速度）
+GRAMS_FUNCTION_SQL = r"""
+CREATE OR REPLACE FUNCTION student_search_grams(name text, student_id text) RETURNS text[] AS $$
+DECLARE
+    padded text := '^' || lower(regexp_replace(name, '\s+', '', 'g')) || '$';
+    sid text := lower(student_id);
+    grams text[] := '{}';
+BEGIN
+    FOR i IN 1 .. length(padded) - 1 LOOP
+        grams := grams || ('n:' || substr(padded, i, 2));
+    END LOOP;
+    FOR k IN 2 .. least(length(sid), 6) LOOP
+        grams := grams || ('s:' || right(sid, k));
+    END LOOP;
+    RETURN grams;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE
+"""
+
+# 全量重建（绕过触发器批量导入之后、CLI rebuild-search）：锁住 students 的写入，
+# 清空后先写数据再建 GIN 索引（一次性排序构建，比逐行插入索引快约 2.5 倍）；重建期间检索请求等待
+REBUILD_SQL = [
+    "LOCK TABLE students IN SHARE ROW EXCLUSIVE MODE",
+    "TRUNCATE student_search",
+    "DROP INDEX ix_student_search_grams",
+    "INSERT INTO student_search (id, grams) SELECT id, student_search_grams(name, student_id) FROM students",
+    "CREATE INDEX ix_student_search_grams ON student_search USING gin (grams)",
+]
+
+
+SEARCH_TRIGGER_SQL = [
+    GRAMS_FUNCTION_SQL,
+    """
+    CREATE OR REPLACE FUNCTION students_search_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO student_search (id, grams)
+            SELECT id, student_search_grams(name, student_id) FROM new_rows
+            ON CONFLICT (id) DO UPDATE SET grams = EXCLUDED.grams;
+        ELSIF TG_OP = 'DELETE' THEN
+            DELETE FROM student_search s USING old_rows o WHERE s.id = o.id;
+        ELSE
+            INSERT INTO student_search (id, grams)
+            SELECT n.id, student_search_grams(n.name, n.student_id)
+            FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE (n.name, n.student_id) IS DISTINCT FROM (o.name, o.student_id)
+            ON CONFLICT (id) DO UPDATE SET grams = EXCLUDED.grams;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION students_search_truncate() RETURNS trigger AS $$
+    BEGIN
+        DELETE FROM student_search;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER students_search_insert AFTER INSERT ON students
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION students_search_apply()
+    """,
+    """
+    CREATE TRIGGER students_search_update AFTER UPDATE ON students
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION students_search_apply()
+    """,
+    """
+    CREATE TRIGGER students_search_delete AFTER DELETE ON students
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION students_search_apply()
+    """,
+    """
+    CREATE TRIGGER students_search_truncate AFTER TRUNCATE ON students
+    FOR EACH STATEMENT EXECUTE FUNCTION students_search_truncate()
+    """,
+]
+
+
+def track_search(table) -> None:
+    """create_all 建表后自动挂触发器（与 7c3e9a1f5d20 迁移中的语句一致）"""
+    for sql in SEARCH_TRIGGER_SQL:
+        event.listen(table, "after_create", DDL(sql).execute_if(dialect="postgresql"))
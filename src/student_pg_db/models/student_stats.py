@@ -0,0 +1,153 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-02-28 10:05:37
+FilePath: /student_pg_db/src/student_pg_db/models/student_stats.py
+'''
+"""
+students 汇总表（聚合统计接口使用）
+按维度（全部 / 专业 / 班级 / 状态 / 入学年份）记录每个 GPA 取值的人数。
+GPA 为 numeric(3,2)，取值只有 0.00-4.00 共 401 种（另用 -1 表示 NULL），
+因此人数、均值与任意分位数都能从直方图精确算出，读取代价与 students 行数无关。
+students 上的语句级触发器用 transition table 把每条写语句的增量追加到 student_stats_deltas
+（只 INSERT，并发写入之间没有行锁竞争）；读取时与 student_stats 相加，
+FOLD_SQL 定期把增量折叠进 student_stats（同一时刻只有一个折叠事务，见 database/stats.py）
+"""
+from sqlalchemy import DDL, BigInteger, Identity, SmallInteger, String, event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+# 维度名 -> 取值表达式（s 为 students 或 transition table 的别名）
+DIMENSIONS = {
+    "all": "'all'",
+    "major": "s.major",
+    "class_name": "s.class_name",
+    "status": "coalesce(s.status, '')",
+    "enrollment_year": "coalesce(extract(year FROM s.enrollment_date)::int::text, '')",
+}
+# GPA 桶：GPA * 100（0-400），NULL 记为 -1
+NULL_BUCKET = -1
+GPA_BUCKET_SQL = f"coalesce((s.gpa * 100)::int, {NULL_BUCKET})"
+
+
+class StudentStat(Base):
+    __tablename__ = "student_stats"
+
+    dimension: Mapped[str] = mapped_column(String(32), primary_key=True, comment="统计维度")
+    value: Mapped[str] = mapped_column(String(100), primary_key=True, comment="维度取值")
+    gpa_bucket: Mapped[int] = mapped_column(SmallInteger, primary_key=True, comment="GPA*100，-1 表示无 GPA")
+    n: Mapped[int] = mapped_column(BigInteger, nullable=False, comment="人数")
+
+
+class StudentStatDelta(Base):
+    __tablename__ = "student_stats_deltas"
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    dimension: Mapped[str] = mapped_column(String(32), nullable=False, comment="统计维度")
+    value: Mapped[str] = mapped_column(String(100), nullable=False, comment="维度取值")
+    gpa_bucket: Mapped[int] = mapped_column(SmallInteger, nullable=False, comment="GPA*100，-1 表示无 GPA")
+    n: Mapped[int] = mapped_column(BigInteger, nullable=False, comment="人数增量")
+
+
+def _exploded(source: str, sign: int) -> str:
+    """把 source 的每一行展开成各维度一行 (dimension, value, gpa_bucket, n)"""
+    values = ", ".join(f"('{name}', {expr})" for name, expr in DIMENSIONS.items())
+    return (
+        f"SELECT d.dimension, d.value, {GPA_BUCKET_SQL} AS gpa_bucket, {sign} AS n "
+        f"FROM {source} s CROSS JOIN LATERAL (VALUES {values}) AS d(dimension, value)"
+    )
+
+
+def _append_delta(*parts: str) -> str:
+    """把一条写语句的增量（按桶预先求和）追加到增量表"""
+    return (
+        "INSERT INTO student_stats_deltas (dimension, value, gpa_bucket, n) "
+        "SELECT dimension, value, gpa_bucket, sum(n) "
+        f"FROM ({' UNION ALL '.join(parts)}) delta "
+        "GROUP BY dimension, value, gpa_bucket HAVING sum(n) <> 0"
+    )
+
+
+def add_sql(source: str) -> str:
+    """把 source（与 students 同结构的表或子查询）的全部行计入汇总，绕过触发器导入后使用"""
+    return _append_delta(_exploded(source, 1))
+
+
+def subtract_sql(source: str) -> str:
+    """从汇总中减去 source（与 students 同结构的表）的全部行，归档分区时使用"""
+    return _append_delta(_exploded(source, -1))
+
+
+# 折叠事务持有的 advisory lock 键：同一时刻只有一个会话折叠
+FOLD_LOCK_KEY = 0x5354_4154
+# 折叠：取走已提交的增量并合并进汇总表（按主键顺序加锁）。
+# 与写入并发时未提交的增量留在表中，下次折叠再处理；读取端在一个快照里看到折叠前或折叠后的状态
+FOLD_SQL = (
+    "WITH moved AS (DELETE FROM student_stats_deltas RETURNING dimension, value, gpa_bucket, n) "
+    "INSERT INTO student_stats (dimension, value, gpa_bucket, n) "
+    "SELECT dimension, value, gpa_bucket, sum(n) FROM moved "
+    "GROUP BY dimension, value, gpa_bucket HAVING sum(n) <> 0 "
+    "ORDER BY dimension, value, gpa_bucket "
+    "ON CONFLICT (dimension, value, gpa_bucket) DO UPDATE SET n = student_stats.n + EXCLUDED.n"
+)
+
+# 全量重建（CLI rebuild-stats）：锁住 students 的写入，清空后重新聚合
+REBUILD_SQL = [
+    "LOCK TABLE students IN SHARE ROW EXCLUSIVE MODE",
+    "DELETE FROM student_stats_deltas",
+    "DELETE FROM student_stats",
+    "INSERT INTO student_stats (dimension, value, gpa_bucket, n) "
+    f"SELECT dimension, value, gpa_bucket, sum(n) FROM ({_exploded('students', 1)}) rows "
+    "GROUP BY dimension, value, gpa_bucket",
+]
+
+STATS_TRIGGER_SQL = [
+    f"""
+    CREATE OR REPLACE FUNCTION students_stats_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            {_append_delta(_exploded('new_rows', 1))};
+        ELSIF TG_OP = 'DELETE' THEN
+            {_append_delta(_exploded('old_rows', -1))};
+        ELSE
+            {_append_delta(_exploded('new_rows', 1), _exploded('old_rows', -1))};
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION students_stats_truncate() RETURNS trigger AS $$
+    BEGIN
+        DELETE FROM student_stats_deltas;
+        DELETE FROM student_stats;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER students_stats_insert AFTER INSERT ON students
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION students_stats_apply()
+    """,
+    """
+    CREATE TRIGGER students_stats_update AFTER UPDATE ON students
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION students_stats_apply()
+    """,
+    """
+    CREATE TRIGGER students_stats_delete AFTER DELETE ON students
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION students_stats_apply()
+    """,
+    """
+    CREATE TRIGGER students_stats_truncate AFTER TRUNCATE ON students
+    FOR EACH STATEMENT EXECUTE FUNCTION students_stats_truncate()
+    """,
+]
+
+
+def track_stats(table) -> None:
+    """create_all 建表后自动挂触发器（与 e4a7c2d95b18、c7d2e5a9f314 迁移中的语句一致）"""
+    for sql in STATS_TRIGGER_SQL:
+        event.listen(table, "after_create", DDL(sql).execute_if(dialect="postgresql"))
@@ -8,18 +8,48 @@ from sqlalchemy.orm import Mapped, mapped_column
 from .base import Base,TimestampMixin
 
 
-from sqlalchemy import String, Integer, Date, Numeric, Text, func
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, BigInteger, Date, Numeric, Text, func, Index
+from sqlalchemy.orm import Mapped, declared_attr, mapped_column
 from .base import Base, TimestampMixin
+from .change_tracking import CURRENT_XID, track_changes
+from .student_partitions import track_partitions
+from .student_search import track_search
+from .student_stats import track_stats
 
 class Student(Base, TimestampMixin):
     __tablename__ = "students"
+    __table_args__ = (
+        # 游标分页：(排序列, id) 复合索引，支持 seek 定位与反向扫描
+        Index("ix_students_gpa_id", "gpa", "id"),
+        Index("ix_students_enrollment_date_id", "enrollment_date", "id"),
+        Index("ix_students_name_id", "name", "id"),
+        # StudentQuery 筛选：等值列在前、排序列在后，筛选 + 排序 + LIMIT 可直接走索引
+        Index("ix_students_major_enrollment_date_id", "major", "enrollment_date", "id"),
+        Index("ix_students_major_gpa_id", "major", "gpa", "id"),
+        Index("ix_students_class_name_gpa_id", "class_name", "gpa", "id"),
+        Index("ix_students_status_enrollment_date_id", "status", "enrollment_date", "id"),
+        # 增量同步：按 (change_xid, id) 顺序翻页
+        Index("ix_students_change_xid_id", "change_xid", "id"),
+        # 学号前缀匹配（LIKE 'S2024%'）
+        Index(
+            "ix_students_student_id_pattern", "student_id",
+            postgresql_ops={"student_id": "varchar_pattern_ops"},
+        ),
+        # 分区表的唯一索引须含分区键：学号的全局唯一由 student_ids 保证，这里供按学号查找与 ON CONFLICT 使用
+        Index("uq_students_student_id_enrollment_date", "student_id", "enrollment_date", unique=True),
+        {"postgresql_partition_by": "RANGE (enrollment_date)"},
+    )
+
+    @declared_attr.directive
+    def __mapper_args__(cls):
+        # 表主键为 (id, enrollment_date)；ORM 仍以 id 作为对象标识，session.get(Student, id) 用法不变
+        return {"primary_key": [cls.__table__.c.id]}
 
     id: Mapped[int] = mapped_column(
-        Integer, primary_key=True, comment="自增主键ID"
+        Integer, primary_key=True, autoincrement=True, comment="自增主键ID"
     )
     student_id: Mapped[str] = mapped_column(
-        String(64), nullable=False, unique=True, comment="学号，唯一标识符"
+        String(64), nullable=False, comment="学号，唯一标识符"
     )
     name: Mapped[str] = mapped_column(
         String(50), nullable=False, comment="学生姓名"
@@ -31,7 +61,7 @@ class Student(Base, TimestampMixin):
         Date, nullable=False, comment="出生日期"
     )
     enrollment_date: Mapped[str] = mapped_column(
-        Date, server_default=func.current_date(), comment="入学日期"
+        Date, primary_key=True, server_default=func.current_date(), comment="入学日期（分区键）"
     )
     major: Mapped[str] = mapped_column(
         String(100), nullable=False, comment="所属专业名称"
@@ -54,3 +84,16 @@ class Student(Base, TimestampMixin):
     status: Mapped[str] = mapped_column(
         String(32), server_default="active", comment="学籍状态：active(在读), inactive(休学/离校), graduated(毕业)"
     )
+    change_xid: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, server_default=CURRENT_XID, comment="最后一次写入该行的事务号（增量同步水位）"
+    )
+
+
+# UPDATE 刷新 change_xid，DELETE 写入 student_tombstones（增量同步）
+track_changes(Student.__table__)
+# 每条写语句的增量合并进 student_stats 汇总表（聚合统计）
+track_stats(Student.__table__)
+# 姓名 / 学号写入时同步 student_search 检索词（模糊搜索）
+track_search(Student.__table__)
+# 学号登记表触发器（全局唯一）+ 按入学年份建分区
+track_partitions(Student.__table__)
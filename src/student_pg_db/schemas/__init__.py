@@ -7,18 +7,16 @@ FilePath: /student_pg_db/src/student_pg_db/schemas/__init__.py
 Schema 层公共导出
 用途：统一管理 Pydantic 模型导出，避免循环依赖
 """
-# 学生相关 Schema
-from .student import (
-    StudentBase,
-    StudentCreate,
-    StudentUpdate,
-    StudentInDBBase,
-    Student,
-    StudentListResponse,
-    StudentQuery,
-    GenderEnum,
-    StudentStatusEnum
-)
+# 学生相关 Schema：首次访问时才导入 .student（Pydantic + EmailStr），只用枚举时不加载
+from .enums import GenderEnum, StudentStatusEnum
+
+
+def __getattr__(name):
+    if name in __all__:
+        from . import student
+        return getattr(student, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     # 枚举
@@ -34,4 +32,10 @@ __all__ = [
     "StudentInDBBase",
     "Student",
     "StudentListResponse",
+    "BulkItemError",
+    "BulkCreateResponse",
+    "DeletedStudent",
+    "StudentChangesResponse",
+    "GroupStatsResponse",
+    "StudentStatsResponse",
 ]
\ No newline at end of file
@@ -0,0 +1,24 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-11 09:18:40
+FilePath: /student_pg_db/src/student_pg_db/schemas/enums.py
+'''
+"""
+枚举定义（不依赖 Pydantic，CLI 参数类型可直接使用；schemas.student 重新导出）
+"""
+from enum import Enum
+
+
+class GenderEnum(str, Enum):
+    """性别枚举"""
+    MALE = "male"
+    FEMALE = "female"
+    OTHER = "other"
+
+
+class StudentStatusEnum(str, Enum):
+    """学生状态枚举"""
+    ACTIVE = "active"
+    GRADUATED = "graduated"
+    SUSPENDED = "suspended"
+    WITHDRAWN = "withdrawn"
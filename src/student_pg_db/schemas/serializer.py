@@ -0,0 +1,134 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-02-25 14:12:09
+FilePath: /student_pg_db/src/student_pg_db/schemas/serializer.py
+'''
+"""
+StudentResponse 快速 JSON 序列化（绕过 ORM 与逐行 Pydantic 校验）
+职责：把数据库列元组直接拼成与 StudentResponse.model_dump_json 相同的 JSON
+设计原则：
+  1. 数据来自数据库，视为可信，不再逐行校验
+  2. 字段顺序与编码方式在构造时按 StudentResponse 字段注解预先确定，逐行只做拼接
+  3. age 按同一个参考日期计算，参考日期每批只取一次
+  4. 支持只输出部分字段（fields=），数据库也只查这些字段依赖的列
+"""
+from datetime import date, datetime
+from functools import lru_cache
+from json.encoder import encode_basestring
+from typing import Callable, Iterable, Optional, Sequence, Tuple, Union, get_args, get_origin
+
+from .student import StudentResponse
+
+# 可按 fields= 选择的响应字段（含计算字段 age），顺序即输出顺序
+RESPONSE_FIELDS: Tuple[str, ...] = (*StudentResponse.model_fields, *StudentResponse.model_computed_fields)
+# 计算字段依赖的列
+COMPUTED_SOURCES = {"age": ("date_of_birth",)}
+
+
+def parse_fields(raw: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """fields=id,name,gpa -> 按 RESPONSE_FIELDS 顺序排列的元组；未传时为 None（全部字段）；未知字段抛 ValueError"""
+    if raw is None:
+        return None
+    requested = {name.strip() for name in raw.split(",") if name.strip()}
+    if not requested:
+        raise ValueError("fields 不能为空")
+    unknown = requested - set(RESPONSE_FIELDS)
+    if unknown:
+        raise ValueError(f"未知字段: {', '.join(sorted(unknown))}")
+    return tuple(name for name in RESPONSE_FIELDS if name in requested)
+
+
+def source_columns(fields: Optional[Sequence[str]] = None) -> Tuple[str, ...]:
+    """输出 fields（None 为全部字段）需要查询的列"""
+    columns = []
+    for name in RESPONSE_FIELDS if fields is None else fields:
+        columns.extend(COMPUTED_SOURCES.get(name, (name,)))
+    return tuple(dict.fromkeys(columns))
+
+
+def _encode_date(value: date) -> str:
+    return f'"{value.isoformat()}"'
+
+
+def _encode_datetime(value: date) -> str:
+    # 列类型为 Date 时 Pydantic 会补成当天零点
+    if not isinstance(value, datetime):
+        return f'"{value.isoformat()}T00:00:00"'
+    return f'"{value.isoformat()}"'
+
+
+def _encode_float(value) -> str:
+    return float.__repr__(float(value))  # 与 json / Pydantic 的浮点输出一致
+
+
+def _encoder_for(annotation) -> Callable[[object], str]:
+    """按字段注解选择编码器（Optional[X] 取 X）"""
+    if get_origin(annotation) is Union:
+        annotation = next(a for a in get_args(annotation) if a is not type(None))
+    if isinstance(annotation, type):
+        if issubclass(annotation, datetime):
+            return _encode_datetime
+        if issubclass(annotation, date):
+            return _encode_date
+        if issubclass(annotation, bool):
+            return lambda v: "true" if v else "false"
+        if issubclass(annotation, int):
+            return str
+        if issubclass(annotation, float):
+            return _encode_float
+    return lambda v: encode_basestring(str(v))  # str / Enum / EmailStr
+
+
+def _nullable(encode: Callable[[object], str]) -> Callable[[object], str]:
+    return lambda v: "null" if v is None else encode(v)
+
+
+class StudentSerializer:
+    """
+    把按 columns 顺序排列的行元组序列化为 StudentResponse JSON。
+    columns 需包含输出字段依赖的全部列（多余的列忽略）；fields 为 None 时输出全部字段
+    """
+
+    def __init__(self, columns: Sequence[str], model=StudentResponse, fields: Optional[Sequence[str]] = None):
+        position = {name: i for i, name in enumerate(columns)}
+        selected = [
+            (name, field) for name, field in model.model_fields.items() if fields is None or name in fields
+        ]
+        self._age = fields is None or "age" in fields
+        if not selected and not self._age:
+            raise ValueError("没有可输出的字段")
+        needed = [name for name, _ in selected] + (["date_of_birth"] if self._age else [])
+        missing = [name for name in needed if name not in position]
+        if missing:
+            raise ValueError(f"缺少字段: {', '.join(missing)}")
+        self._fields = [
+            (("{" if i == 0 else ",") + encode_basestring(name) + ":", position[name], _nullable(_encoder_for(field.annotation)))
+            for i, (name, field) in enumerate(selected)
+        ]
+        self._dob = position.get("date_of_birth")
+        self._age_prefix = ',"age":' if self._fields else '{"age":'
+
+    def row(self, values: Sequence, today: Optional[date] = None) -> str:
+        parts = [prefix + encode(values[i]) for prefix, i, encode in self._fields]
+        if self._age:
+            today = today or date.today()
+            dob = values[self._dob]
+            parts.append(f'{self._age_prefix}{(today - dob).days // 365 if dob is not None else 0}}}')
+        else:
+            parts.append("}")
+        return "".join(parts)
+
+    def dumps_one(self, values: Sequence) -> bytes:
+        return self.row(values).encode("utf-8")
+
+    def dumps_many(self, rows: Iterable[Sequence]) -> bytes:
+        today = date.today()  # 整批共用一个参考日期
+        row = self.row
+        return ("[" + ",".join([row(values, today) for values in rows]) + "]").encode("utf-8")
+
+
+@lru_cache(maxsize=256)
+def serializer_for(columns: Tuple[str, ...], fields: Optional[Tuple[str, ...]] = None) -> StudentSerializer:
+    """按 (列布局, 输出字段) 复用预编译的序列化器"""
+    return StudentSerializer(columns, fields=fields)
+
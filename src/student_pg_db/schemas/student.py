@@ -16,23 +16,7 @@ from pydantic import (
     computed_field,
     EmailStr
 )
-from enum import Enum
-
-
-# ==================== 枚举定义（增强类型安全） ====================
-class GenderEnum(str, Enum):
-    """性别枚举"""
-    MALE = "male"
-    FEMALE = "female"
-    OTHER = "other"
-
-
-class StudentStatusEnum(str, Enum):
-    """学生状态枚举"""
-    ACTIVE = "active"
-    GRADUATED = "graduated"
-    SUSPENDED = "suspended"
-    WITHDRAWN = "withdrawn"
+from .enums import GenderEnum, StudentStatusEnum
 
 
 # ==================== 基础 Schema（公共字段） ====================
@@ -263,6 +247,7 @@ class StudentListResponse(BaseModel):
     """学生列表分页响应"""
     data: List[Student] = Field(..., description="学生数据列表")
     total: int = Field(..., ge=0, description="总记录数")
+    total_exact: bool = Field(True, description="total 是否为精确值（结果集很大时为规划器估算值）")
     page: int = Field(1, ge=1, description="当前页码")
     size: int = Field(10, ge=1, le=100, description="每页数量")
     total_pages: int = Field(..., ge=0, description="总页数")
@@ -294,6 +279,7 @@ class StudentListResponse(BaseModel):
                     }
                 ],
                 "total": 150,
+                "total_exact": True,
                 "page": 1,
                 "size": 10,
                 "total_pages": 15,
@@ -312,6 +298,7 @@ class StudentQuery(BaseModel):
     major: Optional[str] = Field(None, description="专业筛选")
     class_name: Optional[str] = Field(None, description="班级筛选")
     status: Optional[StudentStatusEnum] = Field(None, description="状态筛选")
+    enrollment_year: Optional[int] = Field(None, ge=1900, le=2100, description="入学年份筛选（只扫描该届分区）")
     min_gpa: Optional[float] = Field(None, ge=0.0, le=4.0, description="最小GPA")
     max_gpa: Optional[float] = Field(None, ge=0.0, le=4.0, description="最大GPA")
     student_id: Optional[str] = Field(None, description="学号模糊查询")
@@ -362,4 +349,50 @@ class StudentResponse(StudentInDBBase):
     model_config = ConfigDict(
         from_attributes=True,  # 允许直接从 ORM 对象转换
         json_schema_extra={ "description": "学生信息完整响应" }
-    )
\ No newline at end of file
+    )
+
+# ==================== 批量创建 Schema ====================
+class BulkItemError(BaseModel):
+    """批量创建中单条记录的失败原因"""
+    index: int = Field(..., ge=0, description="该条记录在请求中的下标（从 0 开始）")
+    student_id: Optional[str] = Field(None, description="学号（可解析时返回）")
+    errors: List[dict] = Field(..., description="错误详情（loc / msg / type）")
+
+
+class BulkCreateResponse(BaseModel):
+    """批量创建响应：成功与失败分别列出，单条失败不影响其它记录"""
+    created: int = Field(..., ge=0, description="成功插入的记录数")
+    ids: List[int] = Field(default_factory=list, description="成功插入记录的主键ID（按请求顺序）")
+    errors: List[BulkItemError] = Field(default_factory=list, description="失败记录")
+
+
+# ==================== 增量同步 Schema ====================
+class DeletedStudent(BaseModel):
+    """已删除的学生（墓碑）"""
+    id: int = Field(..., description="数据库主键ID")
+    student_id: str = Field(..., description="学号")
+
+
+class StudentChangesResponse(BaseModel):
+    """增量同步响应：自 since 令牌以来新增/修改与删除的学生"""
+    changed: List[Student] = Field(default_factory=list, description="新增或修改过的学生（按变更顺序）")
+    deleted: List[DeletedStudent] = Field(default_factory=list, description="已删除的学生")
+    next_token: str = Field(..., description="下一次请求的 since 参数")
+    has_more: bool = Field(False, description="是否还有未返回的变更（为 true 时应立即用 next_token 继续拉取）")
+
+
+# ==================== 聚合统计 Schema ====================
+class GroupStatsResponse(BaseModel):
+    """单个分组的统计"""
+    value: str = Field(..., description="分组取值（如专业名称、入学年份）")
+    count: int = Field(..., ge=0, description="人数")
+    gpa_count: int = Field(..., ge=0, description="有 GPA 的人数")
+    gpa_mean: Optional[float] = Field(None, description="GPA 均值")
+    gpa_percentiles: dict = Field(default_factory=dict, description="GPA 分位数（如 p50 / p90）")
+
+
+class StudentStatsResponse(BaseModel):
+    """按维度分组的统计结果"""
+    dimension: str = Field(..., description="统计维度")
+    groups: List[GroupStatsResponse] = Field(default_factory=list)
+
@@ -5,51 +5,131 @@ FilePath: /student_pg_db/src/student_pg_db/utils/data_generator.py
 '''
 import random
 from datetime import date
+from decimal import Decimal
+from functools import cached_property
 from faker import Faker
-from typing import List
+from typing import Dict, Iterator, List, Optional, Tuple
 from ..models.students import Student
 from ..schemas.student import StudentStatusEnum
 
+ENROLL_YEARS = (2022, 2023, 2024)
+GENDERS = ("male", "female", "other")
+# 2.00-4.00 的全部两位小数取值（批量模式按列抽样）
+GPA_VALUES = tuple(Decimal(c) / 100 for c in range(200, 401))
+
 class DataGenerator:
-    def __init__(self, locale: str = "zh_CN"):
+    # iter_rows 产出的元组字段顺序（与 COPY 列清单一一对应）
+    ROW_COLUMNS: Tuple[str, ...] = (
+        "student_id", "name", "gender", "date_of_birth", "enrollment_date",
+        "major", "class_name", "email", "phone", "address", "gpa", "status",
+    )
+
+    def __init__(self, locale: str = "zh_CN", seed: Optional[int] = None, pool_size: int = 1000):
         self.fake = Faker(locale)
+        # 指定 seed 时 Faker 与随机数均可复现
+        self.rng = random.Random(seed)
+        if seed is not None:
+            self.fake.seed_instance(seed)
+        self.pool_size = pool_size
         self.majors = [
             "计算机科学与技术", "软件工程", "人工智能", "数据科学", "网络安全",
             "电子信息工程", "通信工程", "自动化", "金融学", "法学", "英语"
         ]
-        self.classes = [f"{m[:2]}{y}-{c:02d}" for m in self.majors for y in [2022, 2023, 2024] for c in range(1, 5)]
+        self.classes = [f"{m[:2]}{y}-{c:02d}" for m in self.majors for y in ENROLL_YEARS for c in range(1, 5)]
+
+    def generate_row(self, index: int = 0) -> tuple:
+        """生成单条学生记录的字段元组（顺序见 ROW_COLUMNS，不创建 ORM 对象）"""
+        rng = self.rng
 
-    def generate_student(self, index: int = 0) -> Student:
-        """生成单个学生记录，确保符合 Pydantic V2 和数据库约束"""
-        
         # 1. 确定日期逻辑（符合 15-30 岁校验）
-        enroll_year = random.choice([2022, 2023, 2024])
+        enroll_year = rng.choice(ENROLL_YEARS)
         enroll_date = date(enroll_year, 9, 1)
-        age = random.randint(18, 25)
-        dob = date(enroll_year - age, random.randint(1, 12), random.randint(1, 28))
+        age = rng.randint(18, 25)
+        dob = date(enroll_year - age, rng.randint(1, 12), rng.randint(1, 28))
 
         # 2. 生成字段并强制截断（防御性编程）
         name = self.fake.name()[:100]  # 匹配模型 100
-        major = random.choice(self.majors)[:100]
-        
+        major = rng.choice(self.majors)[:100]
+
         # 3. 构造学号（确保 20 位以内）
-        student_id = f"S{enroll_year}{str(index).zfill(5)}{random.randint(10, 99)}"
-
-        return Student(
-            student_id=student_id,
-            name=name,
-            gender=random.choice(["male", "female", "other"]),
-            date_of_birth=dob,
-            enrollment_date=enroll_date,
-            major=major,
-            class_name=random.choice(self.classes)[:50],
-            email=self.fake.email()[:100],
-            phone=self.fake.phone_number()[:20],
-            address=self.fake.address()[:500],
-            gpa=round(random.uniform(2.0, 4.0), 2),
-            status=StudentStatusEnum.ACTIVE,
-            
+        student_id = f"S{enroll_year}{str(index).zfill(5)}{rng.randint(10, 99)}"
+
+        return (
+            student_id,
+            name,
+            rng.choice(GENDERS),
+            dob,
+            enroll_date,
+            major,
+            rng.choice(self.classes)[:50],
+            self.fake.email()[:100],
+            self.fake.phone_number()[:20],
+            self.fake.address()[:500],
+            round(rng.uniform(2.0, 4.0), 2),
+            StudentStatusEnum.ACTIVE,
         )
 
+    def generate_student(self, index: int = 0) -> Student:
+        """生成单个学生记录，确保符合 Pydantic V2 和数据库约束"""
+        return Student(**dict(zip(self.ROW_COLUMNS, self.generate_row(index))))
+
     def generate_students(self, count: int = 100) -> List[Student]:
-        return [self.generate_student(i) for i in range(count)]
\ No newline at end of file
+        return [self.generate_student(i) for i in range(count)]
+
+    # ==================== 批量模式（按列生成） ====================
+
+    @cached_property
+    def _pools(self) -> Dict[str, list]:
+        """预生成 Faker 取值池：批量模式只做抽样，不再逐行调用 Faker"""
+        n = self.pool_size
+        return {
+            "name": [self.fake.name()[:100] for _ in range(n)],
+            "email": [self.fake.email()[:100] for _ in range(n)],
+            "phone": [self.fake.phone_number()[:20] for _ in range(n)],
+            "address": [self.fake.address()[:500] for _ in range(n)],
+        }
+
+    @cached_property
+    def _date_pairs(self) -> List[Tuple[int, date, date]]:
+        """(入学年份, 入学日期, 出生日期) 全部组合，与 generate_row 的分布一致"""
+        return [
+            (year, date(year, 9, 1), date(year - age, month, day))
+            for year in ENROLL_YEARS
+            for age in range(18, 26)
+            for month in range(1, 13)
+            for day in range(1, 29)
+        ]
+
+    def generate_batch(self, count: int, start: int = 0) -> Dict[str, list]:
+        """按列生成一批记录（键为 ROW_COLUMNS），每列一次性抽样"""
+        rng, pools = self.rng, self._pools
+        dates = rng.choices(self._date_pairs, k=count)
+        suffixes = rng.choices(range(10, 100), k=count)
+        return {
+            # 学号中序号唯一 + 年份/后缀定长，保证批次内外都不重复
+            "student_id": [
+                f"S{year}{str(i).zfill(5)}{suffix}"
+                for i, (year, _, _), suffix in zip(range(start, start + count), dates, suffixes)
+            ],
+            "name": rng.choices(pools["name"], k=count),
+            "gender": rng.choices(GENDERS, k=count),
+            "date_of_birth": [d[2] for d in dates],
+            "enrollment_date": [d[1] for d in dates],
+            "major": rng.choices(self.majors, k=count),
+            "class_name": rng.choices(self.classes, k=count),
+            "email": rng.choices(pools["email"], k=count),
+            "phone": rng.choices(pools["phone"], k=count),
+            "address": rng.choices(pools["address"], k=count),
+            "gpa": rng.choices(GPA_VALUES, k=count),
+            "status": [StudentStatusEnum.ACTIVE] * count,
+        }
+
+    def iter_batches(self, count: int, start: int = 0, batch_size: int = 10_000) -> Iterator[Dict[str, list]]:
+        """流式产出列批次；同一 seed 与 batch_size 下结果可复现"""
+        for offset in range(start, start + count, batch_size):
+            yield self.generate_batch(min(batch_size, start + count - offset), start=offset)
+
+    def iter_rows(self, count: int, start: int = 0, batch_size: int = 10_000) -> Iterator[tuple]:
+        """流式产出 count 条记录元组（index 从 start 开始），内存占用与 count 无关"""
+        for batch in self.iter_batches(count, start=start, batch_size=batch_size):
+            yield from zip(*(batch[c] for c in self.ROW_COLUMNS))
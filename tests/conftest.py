@@ -4,6 +4,7 @@ Date: 2026-02-13 07:02:36
 FilePath: /student_pg_db/tests/conftest.py
 '''
 import pytest
+import pytest_asyncio
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from student_pg_db.models.base import Base
@@ -37,4 +38,32 @@ def db_session(db_engine):
 @pytest.fixture
 def generator():
     """提供数据生成器实例"""
-    return DataGenerator()
\ No newline at end of file
+    return DataGenerator()
+
+@pytest.fixture
+def client(db_session):
+    """FastAPI 测试客户端（复用 db_session 事务，测试结束自动回滚）"""
+    from fastapi.testclient import TestClient
+    from student_pg_db.main import app
+    from student_pg_db.core.session import get_session
+
+    app.dependency_overrides[get_session] = lambda: db_session
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+@pytest_asyncio.fixture
+async def async_db_session(db_engine):
+    """异步会话（独立事务，测试结束自动回滚）"""
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    engine = create_async_engine(DatabaseConfig().async_url, poolclass=NullPool)
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        session = AsyncSession(bind=connection, expire_on_commit=False,
+                               join_transaction_mode="create_savepoint")
+        yield session
+        await session.close()
+        await transaction.rollback()
+    await engine.dispose()
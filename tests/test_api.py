@@ -0,0 +1,349 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-02-19 14:20:41
+FilePath: /student_pg_db/tests/test_api.py
+'''
+import json
+import pytest
+
+def _payload(generator, index):
+    s = generator.generate_student(index)
+    return {
+        "student_id": s.student_id, "name": s.name, "gender": s.gender,
+        "date_of_birth": s.date_of_birth.isoformat(), "enrollment_date": s.enrollment_date.isoformat(),
+        "major": s.major, "class_name": s.class_name, "gpa": s.gpa,
+    }
+
+@pytest.mark.e2e
+def test_bulk_create_reports_per_item_errors(client, generator):
+    """测试批量创建：合法记录入库，非法与重复学号逐条报错"""
+    good = [_payload(generator, i) for i in range(3)]
+    bad = {**_payload(generator, 10), "gpa": 9.9}
+    body = [good[0], bad, good[1], good[0], good[2]]
+
+    resp = client.post("/students/bulk", json=body)
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["created"] == 3 and len(data["ids"]) == 3
+    assert [e["index"] for e in data["errors"]] == [1, 3]
+    assert data["errors"][0]["errors"][0]["loc"] == ["gpa"]
+    assert data["errors"][1]["errors"][0]["type"] == "unique_violation"
+
+@pytest.mark.e2e
+def test_bulk_create_accepts_ndjson(client, generator):
+    """测试 NDJSON 请求体与无法解析的行"""
+    lines = [json.dumps(_payload(generator, 20)), "{not json", json.dumps(_payload(generator, 21))]
+    resp = client.post(
+        "/students/bulk", content="\n".join(lines), headers={"content-type": "application/x-ndjson"}
+    )
+    data = resp.json()
+    assert data["created"] == 2
+    assert [e["index"] for e in data["errors"]] == [1]
+
+@pytest.mark.e2e
+def test_bulk_create_reports_null_items(client, generator):
+    """测试 null 项按下标报校验错误，而不是被静默丢弃"""
+    body = [_payload(generator, 30), None]
+    data = client.post("/students/bulk", json=body).json()
+    assert data["created"] == 1
+    assert [e["index"] for e in data["errors"]] == [1]
+
+    lines = [json.dumps(_payload(generator, 31)), "null"]
+    data = client.post(
+        "/students/bulk", content="\n".join(lines), headers={"content-type": "application/x-ndjson"}
+    ).json()
+    assert data["created"] == 1
+    assert [e["index"] for e in data["errors"]] == [1]
+
+@pytest.mark.e2e
+@pytest.mark.parametrize("sort_by,order", [("id", "asc"), ("gpa", "desc"), ("gpa", "asc"), ("name", "asc")])
+def test_list_students_keyset_pages(client, db_session, generator, sort_by, order):
+    """测试游标分页逐页翻完：不重不漏，顺序与 (排序列, id) 一致，NULL 排在最后"""
+    students = generator.generate_students(7)
+    students[1].gpa = None
+    students[4].gpa = None
+    students[5].gpa = students[2].gpa  # 排序列相同时按 id 决胜
+    db_session.add_all(students)
+    db_session.flush()
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, "sort_by": sort_by, "order": order}
+        if cursor:
+            params["cursor"] = cursor
+        resp = client.get("/students/", params=params)
+        assert resp.status_code == 200
+        seen += [row["id"] for row in resp.json()]
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    reverse = order == "desc"
+    non_null = sorted((s for s in students if getattr(s, sort_by) is not None),
+                      key=lambda s: (getattr(s, sort_by), s.id), reverse=reverse)
+    nulls = sorted((s for s in students if getattr(s, sort_by) is None), key=lambda s: s.id, reverse=reverse)
+    assert seen == [s.id for s in non_null + nulls]
+
+@pytest.mark.e2e
+def test_list_students_rejects_bad_cursor(client):
+    """测试非法游标与排序不一致的游标返回 400"""
+    assert client.get("/students/", params={"cursor": "not-a-cursor"}).status_code == 400
+    from student_pg_db.database.pagination import Cursor
+    token = Cursor("gpa", "desc", None, 3).encode()
+    assert client.get("/students/", params={"cursor": token, "sort_by": "name"}).status_code == 400
+
+@pytest.mark.e2e
+def test_query_students_filters_and_capped_total(client, db_session, generator, monkeypatch):
+    """测试 StudentQuery 筛选；超过精确计数上限时 total 改为估算值"""
+    students = generator.generate_students(12)
+    for i, s in enumerate(students):
+        s.major = "测试专业"
+        s.class_name = "测试2024-01" if i < 4 else "测试2024-02"
+        s.gpa = 3.0 + i / 100
+    db_session.add_all(students)
+    db_session.flush()
+
+    resp = client.get("/students/query", params={
+        "major": "测试专业", "class_name": "测试2024-01", "sort_by": "gpa", "order": "asc", "size": 3,
+    })
+    data = resp.json()
+    assert resp.status_code == 200
+    assert (data["total"], data["total_exact"], data["total_pages"], data["has_next"]) == (4, True, 2, True)
+    assert [row["student_id"] for row in data["data"]] == [s.student_id for s in students[:3]]
+
+    monkeypatch.setattr("student_pg_db.database.repository.EXACT_COUNT_LIMIT", 5)
+    data = client.get("/students/query", params={"major": "测试专业"}).json()
+    assert data["total_exact"] is False
+    assert data["total"] >= 6
+
+@pytest.mark.e2e
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+def test_stream_students(client, db_session, generator, fmt):
+    """测试流式导出：按 id 顺序输出全部行，NDJSON / CSV 两种格式"""
+    import csv
+    import io
+    import json
+    students = generator.generate_students(5)
+    students[2].gpa = None
+    db_session.add_all(students)
+    db_session.flush()
+
+    resp = client.get("/students/stream", params={"format": fmt, "batch_size": 100})
+    assert resp.status_code == 200
+    if fmt == "ndjson":
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in resp.text.splitlines()]
+    else:
+        rows = list(csv.DictReader(io.StringIO(resp.text)))
+    by_id = {int(r["id"]): r for r in rows}
+    assert [int(r["id"]) for r in rows] == sorted(by_id)
+    for s in students:
+        assert by_id[s.id]["student_id"] == s.student_id
+    assert by_id[students[2].id]["gpa"] in (None, "")
+
+@pytest.mark.e2e
+def test_get_student_detail(client, db_session, generator):
+    """测试详情接口（列元组快速序列化）输出与 StudentResponse 一致，不存在时 404"""
+    from student_pg_db.schemas.student import StudentResponse
+    student = generator.generate_student(1)
+    db_session.add(student)
+    db_session.flush()
+    db_session.refresh(student)
+
+    resp = client.get(f"/students/{student.id}")
+    assert resp.status_code == 200
+    assert resp.json() == StudentResponse.model_validate(student).model_dump(mode="json")
+    assert client.get("/students/0").status_code == 404
+
+@pytest.mark.e2e
+def test_update_student(client, db_session, generator):
+    """测试 PATCH 只更新传入的字段，不存在时 404"""
+    student = generator.generate_student(1)
+    db_session.add(student)
+    db_session.flush()
+
+    resp = client.patch(f"/students/{student.id}", json={"gpa": 3.2})
+    assert resp.status_code == 200
+    assert resp.json()["gpa"] == 3.2 and resp.json()["name"] == student.name
+    assert client.patch("/students/0", json={"gpa": 3.2}).status_code == 404
+
+@pytest.mark.e2e
+def test_conditional_get_list_and_detail(client, db_session, db_engine, generator):
+    """测试 ETag：未变化时 If-None-Match 返回 304，写入后 ETag 变化并返回 200"""
+    from sqlalchemy import delete, event, update
+    from sqlalchemy.orm import Session
+    from student_pg_db.models.change_tracking import StudentTombstone
+    from student_pg_db.models.students import Student
+    student = generator.generate_student(1)
+    db_session.add(student)
+    db_session.flush()
+
+    for path in ("/students/", f"/students/{student.id}", "/students/query"):
+        resp = client.get(path)
+        etag = resp.headers["ETag"]
+        assert resp.status_code == 200 and "Last-Modified" in resp.headers
+        cached = client.get(path, headers={"If-None-Match": etag})
+        assert cached.status_code == 304 and cached.content == b""
+        assert cached.headers["ETag"] == etag
+
+    detail_etag = client.get(f"/students/{student.id}").headers["ETag"]
+    selects = []
+    record = lambda conn, cursor, statement, *args: selects.append(statement)
+    event.listen(db_engine, "before_cursor_execute", record)
+    try:  # 校验 ETag 只查行版本，不读整行
+        assert client.get(f"/students/{student.id}", headers={"If-None-Match": detail_etag}).status_code == 304
+    finally:
+        event.remove(db_engine, "before_cursor_execute", record)
+    assert len(selects) == 1 and "students.name" not in selects[0]
+    with db_session.begin_nested():  # 子事务写入，xmin 随之变化
+        db_session.execute(update(Student).where(Student.id == student.id).values(name="新名字"))
+    resp = client.get(f"/students/{student.id}", headers={"If-None-Match": detail_etag})
+    assert resp.status_code == 200 and resp.json()["name"] == "新名字"
+
+    # 表级版本取自已提交的写入：另开事务提交一条新增与删除
+    list_etag = client.get("/students/").headers["ETag"]
+    other = generator.generate_student(2)
+    with Session(db_engine, expire_on_commit=False) as session, session.begin():
+        session.add(other)
+    try:
+        resp = client.get("/students/", headers={"If-None-Match": list_etag})
+        assert resp.status_code == 200 and resp.headers["ETag"] != list_etag
+    finally:
+        with Session(db_engine) as session, session.begin():
+            session.execute(delete(Student).where(Student.id == other.id))
+            session.execute(delete(StudentTombstone).where(StudentTombstone.id == other.id))
+
+@pytest.mark.e2e
+def test_student_changes_feed(client, db_engine, generator):
+    """测试增量同步：只返回令牌之后已提交的新增/修改/删除，分页拉取不重不漏"""
+    from sqlalchemy import delete, update
+    from sqlalchemy.orm import Session
+    from student_pg_db.models.change_tracking import StudentTombstone
+    from student_pg_db.models.students import Student
+
+    def pull(token, limit=2):
+        changed, deleted = {}, set()
+        while True:
+            data = client.get("/students/changes", params={"since": token, "limit": limit}).json()
+            changed.update({row["id"]: row for row in data["changed"]})
+            deleted |= {row["id"] for row in data["deleted"]}
+            token = data["next_token"]
+            if not data["has_more"]:
+                return changed, deleted, token
+
+    _, _, start = pull("0", limit=10000)
+    students = generator.generate_students(3)
+    try:
+        with Session(db_engine, expire_on_commit=False) as session, session.begin():  # 三个独立提交的事务
+            session.add_all(students)
+        with Session(db_engine) as session, session.begin():
+            session.execute(update(Student).where(Student.id == students[1].id).values(name="改名"))
+        with Session(db_engine) as session, session.begin():
+            session.execute(delete(Student).where(Student.id == students[2].id))
+
+        changed, deleted, token = pull(start)
+        assert set(changed) == {students[0].id, students[1].id}
+        assert changed[students[1].id]["name"] == "改名"
+        assert deleted == {students[2].id}
+        assert pull(token) == ({}, set(), token)
+    finally:
+        with Session(db_engine) as session, session.begin():
+            ids = [s.id for s in students if s.id is not None]
+            session.execute(delete(Student).where(Student.id.in_(ids)))
+            session.execute(delete(StudentTombstone).where(StudentTombstone.id.in_(ids)))
+    assert client.get("/students/changes", params={"since": "x"}).status_code == 400
+
+@pytest.mark.e2e
+def test_student_stats_match_sql(client, db_session, generator):
+    """测试聚合统计：与直接在 students 上 count / avg / percentile_cont 的结果一致，写入后实时更新"""
+    from sqlalchemy import text
+    students = generator.generate_students(30)
+    for s in students[:10]:
+        s.major = "统计测试专业"
+    students[3].gpa = None
+    db_session.add_all(students)
+    db_session.flush()
+
+    def expected():
+        return db_session.execute(text(
+            "SELECT count(*), count(gpa), round(avg(gpa), 4), "
+            "percentile_cont(0.5) WITHIN GROUP (ORDER BY gpa), percentile_cont(0.9) WITHIN GROUP (ORDER BY gpa) "
+            "FROM students WHERE major = '统计测试专业'"
+        )).one()
+
+    def actual():
+        resp = client.get("/students/stats/major", params={"value": "统计测试专业"})
+        assert resp.status_code == 200
+        group, = resp.json()["groups"]
+        p = group["gpa_percentiles"]
+        return group["count"], group["gpa_count"], group["gpa_mean"], p["p50"], p["p90"]
+
+    def normalize(row):
+        return tuple(round(float(v), 4) for v in row)
+
+    assert normalize(actual()) == normalize(expected())
+
+    students[0].gpa = 4.0
+    students[1].major = "其他专业"
+    db_session.delete(students[2])
+    db_session.flush()
+    assert normalize(actual()) == normalize(expected())
+
+    total = client.get("/students/stats/all").json()["groups"][0]["count"]
+    assert total == db_session.execute(text("SELECT count(*) FROM students")).scalar()
+    assert client.get("/students/stats/major", params={"percentiles": "0"}).status_code == 400
+    assert client.get("/students/stats/nope").status_code == 422
+
+@pytest.mark.e2e
+def test_search_students(client, db_session, generator):
+    """测试搜索接口：返回完整学生字段，limit 生效，空查询词返回 422"""
+    students = generator.generate_students(3)
+    for s in students:
+        s.name = "搜索测试" + s.name[-1]
+    db_session.add_all(students)
+    db_session.flush()
+
+    resp = client.get("/students/search", params={"q": "搜索测试", "limit": 2})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert len(data) == 2 and {row["id"] for row in data} <= {s.id for s in students}
+    assert data[0]["student_id"] and "gpa" in data[0]
+    assert client.get("/students/search", params={"q": ""}).status_code == 422
+
+@pytest.mark.e2e
+def test_list_students_by_ids(client, db_session, generator):
+    """测试 GET /students?ids=：按传入顺序返回，跳过不存在的 ID，非法参数返回 400"""
+    students = generator.generate_students(3)
+    db_session.add_all(students)
+    db_session.flush()
+    a, b, c = (s.id for s in students)
+
+    resp = client.get("/students", params={"ids": f"{c},{a},{10**9},{b}"})
+    assert resp.status_code == 200
+    assert [row["id"] for row in resp.json()] == [c, a, b]
+    assert resp.json()[0]["student_id"] == students[2].student_id
+    assert client.get("/students/", params={"ids": f"{b}"}).json()[0]["id"] == b
+    assert client.get("/students", params={"ids": "1,x"}).status_code == 400
+    assert client.get("/students", params={"ids": ",".join(["1"] * 1001)}).status_code == 400
+
+@pytest.mark.e2e
+def test_fields_projection(client, db_session, generator):
+    """测试 fields=：列表（含游标翻页）、详情、批量与搜索都只返回请求的字段"""
+    students = generator.generate_students(3)
+    db_session.add_all(students)
+    db_session.flush()
+
+    resp = client.get("/students/", params={"limit": 2, "sort_by": "gpa", "order": "desc", "fields": "id,gpa"})
+    assert resp.status_code == 200 and all(set(row) == {"id", "gpa"} for row in resp.json())
+    page2 = client.get("/students/", params={"limit": 2, "sort_by": "gpa", "order": "desc",
+                                             "fields": "name", "cursor": resp.headers["X-Next-Cursor"]})
+    assert all(set(row) == {"name"} for row in page2.json())
+
+    detail = client.get(f"/students/{students[0].id}", params={"fields": "name,age"})
+    assert detail.json() == {"name": students[0].name, "age": client.get(f"/students/{students[0].id}").json()["age"]}
+    assert detail.headers["ETag"] == client.get(f"/students/{students[0].id}").headers["ETag"]
+
+    by_ids = client.get("/students", params={"ids": f"{students[1].id}", "fields": "student_id"})
+    assert by_ids.json() == [{"student_id": students[1].student_id}]
+    assert client.get("/students/", params={"fields": "id,secret"}).status_code == 400
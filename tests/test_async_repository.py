@@ -0,0 +1,80 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-02-22 16:02:17
+FilePath: /student_pg_db/tests/test_async_repository.py
+'''
+import pytest
+from student_pg_db.database.async_repository import AsyncStudentRepository
+from student_pg_db.database.cache import TTLCache
+from student_pg_db.schemas.student import StudentQuery
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_async_create_and_get_student(async_db_session, generator):
+    """测试异步仓储的创建和查询"""
+    repo = AsyncStudentRepository(async_db_session)
+    mock_student = generator.generate_student(1)
+    await repo.create(mock_student)
+
+    saved = await repo.get_by_id(mock_student.id)
+    assert saved is not None
+    assert saved.student_id == mock_student.student_id
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_async_keyset_and_query(async_db_session, generator):
+    """测试异步游标分页逐页翻完（含 NULL 区间）以及条件查询计数"""
+    repo = AsyncStudentRepository(async_db_session)
+    students = generator.generate_students(5)
+    students[2].gpa = None
+    async_db_session.add_all(students)
+    await async_db_session.flush()
+    ids = {s.id for s in students}
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = await repo.list_keyset(limit=2, cursor=cursor, sort_by="gpa", order="desc")
+        seen += [r.id for r in rows if r.id in ids]
+        if cursor is None:
+            break
+    assert sorted(seen) == sorted(ids)
+    assert seen[-1] == students[2].id
+
+    major = students[0].major
+    rows, total, exact = await repo.query(StudentQuery(major=major, size=100))
+    assert exact and total == len(rows)
+    assert students[0].id in {r.id for r in rows}
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_async_update_many(async_db_session, generator):
+    """测试异步 update_many 跨批次修改"""
+    repo = AsyncStudentRepository(async_db_session)
+    students = generator.generate_students(3)
+    async_db_session.add_all(students)
+    await async_db_session.flush()
+
+    changes = [(s.id, {"gpa": 3.5}) for s in students] + [(students[0].id, {"status": "graduated"})]
+    rows = await repo.update_many(changes, batch_size=2)
+
+    assert len(rows) == 4
+    latest = {r.id: r for r in rows}
+    assert latest[students[0].id].status == "graduated"
+    assert all(float(r.gpa) == 3.5 for r in latest.values())
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_async_writes_invalidate_shared_cache(async_db_session, generator):
+    """测试异步 update / delete 提交后失效同步路由共用的 get_by_id 缓存"""
+    cache = TTLCache(maxsize=10)
+    repo = AsyncStudentRepository(async_db_session, cache=cache)
+    first, second = generator.generate_students(2)
+    async_db_session.add_all([first, second])
+    await async_db_session.flush()
+    cache.set(first.id, "stale")
+    cache.set(second.id, "stale")
+
+    await repo.update(first.id, gpa=3.9)
+    assert cache.get(first.id) is None and cache.get(second.id) == "stale"
+    await repo.delete(second.id)
+    assert cache.get(second.id) is None
@@ -0,0 +1,94 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-02-18 10:05:12
+FilePath: /student_pg_db/tests/test_bulk_loader.py
+'''
+import pytest
+from decimal import Decimal
+from sqlalchemy import func, select
+from student_pg_db.database.bulk_loader import CopyLoader, encode_text, split_ranges
+from student_pg_db.models.students import Student
+from student_pg_db.utils.data_generator import DataGenerator
+
+@pytest.mark.unit
+def test_encode_text_escapes_special_chars():
+    """测试 text 格式对 NULL、制表符、换行、反斜杠的转义"""
+    data = encode_text([("a\tb", None, "c\\d\ne")])
+    assert data == b"a\\tb\t\\N\tc\\\\d\\ne\n"
+
+@pytest.mark.unit
+def test_loader_rejects_unknown_format():
+    """测试非法 COPY 格式直接报错"""
+    with pytest.raises(ValueError):
+        CopyLoader(None, DataGenerator.ROW_COLUMNS, fmt="csv")
+
+@pytest.mark.unit
+def test_split_ranges_disjoint_and_complete():
+    """测试多进程序号区间互不重叠且覆盖全部行"""
+    ranges = split_ranges(10, 3, start=100)
+    assert ranges == [(100, 4), (104, 3), (107, 3)]
+    assert split_ranges(2, 4) == [(0, 1), (1, 1)]
+    for count, workers, start in [(10, 0, 0), (0, 2, 0), (-5, 2, 0), (10, 2, -1)]:
+        with pytest.raises(ValueError):
+            split_ranges(count, workers, start=start)
+
+@pytest.mark.integration
+@pytest.mark.parametrize("fmt", ["text", "binary"])
+def test_copy_load_roundtrip(db_session, generator, fmt):
+    """测试 text / binary 两种格式分块导入后数据完整"""
+    rows = list(generator.iter_rows(25))
+    rows[0] = rows[0][:9] + ("第一行\t含制表符\\", Decimal("0.05"), "active")
+    loader = CopyLoader(db_session.connection().connection, DataGenerator.ROW_COLUMNS, fmt=fmt, chunk_size=10)
+
+    progress = []
+    stats = loader.load(iter(rows), on_progress=lambda s: progress.append(s.rows))
+
+    assert stats.rows == 25 and stats.chunks == 3
+    assert progress == [10, 20, 25]
+    ids = [r[0] for r in rows]
+    saved = db_session.scalars(select(Student).where(Student.student_id.in_(ids))).all()
+    by_id = {s.student_id: s for s in saved}
+    assert len(by_id) == 25
+    first = by_id[rows[0][0]]
+    assert first.address == "第一行\t含制表符\\"
+    assert first.gpa == Decimal("0.05")
+    assert by_id[rows[3][0]].gpa == Decimal(str(rows[3][10]))
+
+@pytest.mark.integration
+def test_direct_load_bypasses_triggers(db_session, generator):
+    """测试 direct 导入直接写分区：学号登记与汇总在导入结束时补齐，检索词在全量重建后补齐"""
+    from sqlalchemy import text
+    from student_pg_db.database.stats import StudentStatsRepository
+    from student_pg_db.models.student_partitions import StudentIdRegistry
+    from student_pg_db.models.student_search import REBUILD_SQL, StudentSearch
+
+    stats = StudentStatsRepository(db_session)
+    total = sum(g.count for g in stats.groups("all"))
+    rows = list(generator.iter_rows(25))
+    loader = CopyLoader(db_session.connection().connection, DataGenerator.ROW_COLUMNS, chunk_size=10, direct=True)
+    assert loader.load(iter(rows)).rows == 25
+
+    sids = [r[0] for r in rows]
+    ids = db_session.scalars(select(Student.id).where(Student.student_id.in_(sids))).all()
+    assert len(ids) == 25
+    assert db_session.scalar(select(func.count()).select_from(StudentIdRegistry).where(StudentIdRegistry.student_id.in_(sids))) == 25
+    assert sum(g.count for g in stats.groups("all")) == total + 25
+    assert db_session.scalars(select(StudentSearch.id).where(StudentSearch.id.in_(ids))).all() == []
+
+    for sql in REBUILD_SQL:
+        db_session.execute(text(sql))
+    assert len(db_session.scalars(select(StudentSearch.id).where(StudentSearch.id.in_(ids))).all()) == 25
+
+    with pytest.raises(ValueError):
+        CopyLoader(None, ("student_id", "name"), direct=True)
+
+@pytest.mark.unit
+@pytest.mark.parametrize("args", [["--count", "0"], ["--count", "-3"], ["--count", "10", "-w", "0"]])
+def test_seed_rejects_invalid_count(args):
+    """测试 seed 的行数 / 进程数不合法时直接报参数错误，不启动进程池"""
+    from typer.testing import CliRunner
+    from student_pg_db.cli import app
+
+    result = CliRunner().invoke(app, ["seed", *args])
+    assert result.exit_code == 2
+    assert "必须大于 0" in result.output
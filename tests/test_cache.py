@@ -0,0 +1,104 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-02-24 11:08:40
+FilePath: /student_pg_db/tests/test_cache.py
+'''
+import threading
+import pytest
+from student_pg_db.config import DatabaseConfig
+from student_pg_db.database.cache import InvalidationChannel, PgNotifyChannel, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingChannel(InvalidationChannel):
+    def __init__(self):
+        self.published, self.callback = [], None
+
+    def publish(self, key):
+        self.published.append(key)
+
+    def listen(self, callback):
+        self.callback = callback
+
+
+@pytest.mark.unit
+def test_lru_eviction_and_ttl():
+    """测试容量超限时淘汰最久未使用的条目，过期条目视为未命中"""
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    assert cache.get(1) == "a"  # 1 变为最近使用
+    cache.set(3, "c")
+    assert cache.get(2) is None and cache.get(1) == "a"
+
+    clock.now = 11
+    assert cache.get(1) is None
+    assert (cache.stats.hits, cache.stats.misses) == (2, 2)
+    assert (cache.stats.evictions, cache.stats.expirations) == (1, 1)
+
+@pytest.mark.unit
+def test_invalidate_discards_stale_fill_and_broadcasts():
+    """测试读库期间发生失效时回填被丢弃，失效会广播，收到广播会失效本地条目"""
+    channel = RecordingChannel()
+    cache = TTLCache(maxsize=10, channel=channel)
+    token = cache.token()
+    cache.invalidate(1)
+    cache.set(1, "stale", token)
+    assert cache.get(1) is None
+    assert channel.published == [1]
+
+    cache.set(2, "b")
+    channel.callback("2")
+    assert cache.get(2) is None
+    cache.set(3, "c")
+    channel.callback("*")
+    assert cache.snapshot()["size"] == 0
+
+@pytest.mark.integration
+def test_pg_notify_channel_delivers_to_other_listener(db_engine):
+    """测试 LISTEN/NOTIFY 通道把失效广播给其它进程（另一条连接）"""
+    dsn = DatabaseConfig.get_app_connection_string()
+    sender, receiver = PgNotifyChannel(dsn, poll_interval=0.05), PgNotifyChannel(dsn, poll_interval=0.05)
+    received, echoed, done = [], [], threading.Event()
+    try:
+        sender.listen(echoed.append)  # 本进程发出的通知应被忽略
+        receiver.listen(lambda payload: (received.append(payload), done.set()))
+        sender.publish(42)
+        assert done.wait(5)
+        assert received == ["42"]
+        assert echoed == []
+    finally:
+        sender.close()
+        receiver.close()
+
+
+@pytest.mark.integration
+def test_pg_notify_channel_reconnects_publisher(db_engine):
+    """测试发送连接被断开后重连重试；数据库不可达时只记日志，不让调用方的写请求失败"""
+    from sqlalchemy import text
+    dsn = DatabaseConfig.get_app_connection_string()
+    sender, receiver = PgNotifyChannel(dsn, poll_interval=0.05), PgNotifyChannel(dsn, poll_interval=0.05)
+    received, done = [], threading.Event()
+    try:
+        receiver.listen(lambda payload: (received.append(payload), done.set() if len(received) == 2 else None))
+        sender.publish(1)
+        with db_engine.connect() as conn:
+            conn.execute(text("SELECT pg_terminate_backend(:pid)"), {"pid": sender._publisher_pid})
+        sender.publish(2)
+        assert done.wait(5)
+        assert received == ["1", "2"]
+    finally:
+        sender.close()
+        receiver.close()
+
+    unreachable = PgNotifyChannel("host=127.0.0.1 port=1 dbname=none connect_timeout=1")
+    unreachable.publish(3)
+    unreachable.close()
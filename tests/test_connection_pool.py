@@ -0,0 +1,136 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-09 14:05:52
+FilePath: /student_pg_db/tests/test_connection_pool.py
+'''
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from student_pg_db.config import DatabaseConfig
+from student_pg_db.core.connection import DatabaseConnection
+from student_pg_db.database.connection_pool import PgConnectionPool, PoolTimeout
+
+DSN = DatabaseConfig.get_app_connection_string()
+
+
+@pytest.fixture
+def pool():
+    pool = PgConnectionPool(DSN, minconn=2, maxconn=2, timeout=0.1)
+    yield pool
+    pool.closeall()
+
+
+@pytest.mark.integration
+def test_get_cursor_runs_in_parallel():
+    """测试多个线程同时 get_cursor 各用各的连接并行执行，提交后归还"""
+    db = DatabaseConnection(maxconn=5)
+    db.connect_app()  # 本实例占用一个连接，另外 4 个供 get_cursor 并行借用
+
+    def work(_):
+        with db.get_cursor() as cursor:
+            cursor.execute("SELECT pg_backend_pid() AS pid, pg_sleep(0.2)")
+            return cursor.fetchone()["pid"]
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(4) as executor:
+            pids = list(executor.map(work, range(4)))
+        assert time.perf_counter() - start < 0.6
+        assert len(set(pids)) == 4
+        stats = DatabaseConnection.pool_stats()
+        app = next(v for k, v in stats.items() if k.endswith(DatabaseConfig._load_profile().app_db_name))
+        assert (app["borrowed"], app["returned"], app["in_use"]) == (5, 4, 1)
+    finally:
+        db.close()
+    with pytest.raises(ConnectionError):
+        db.get_pool()
+    # close 只断开本实例，共享的连接池仍可被其他实例使用
+    other = DatabaseConnection()
+    other.connect_app()
+    try:
+        with other.get_cursor() as cursor:
+            cursor.execute("SELECT 1 AS one")
+            assert cursor.fetchone()["one"] == 1
+    finally:
+        DatabaseConnection.close_all_pools()
+    assert DatabaseConnection.pool_stats() == {}
+
+
+@pytest.mark.integration
+def test_get_cursor_rolls_back_before_returning():
+    """测试异常时回滚，归还的连接不带未结束的事务"""
+    db = DatabaseConnection(maxconn=2)
+    db.connect_app()
+    try:
+        with pytest.raises(ZeroDivisionError), db.get_cursor() as cursor:
+            cursor.execute("CREATE TEMP TABLE pool_probe (x int)")
+            1 / 0
+        with db.get_pool().connection() as conn:
+            assert conn.info.transaction_status == TRANSACTION_STATUS_IDLE
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT to_regclass('pg_temp.pool_probe')")
+                assert cursor.fetchone()[0] is None
+    finally:
+        DatabaseConnection.close_all_pools()
+
+
+@pytest.mark.integration
+def test_connect_returns_pooled_connection():
+    """测试 connect_app / get_connection 仍返回可直接使用的连接，close 时归还连接池"""
+    db = DatabaseConnection(maxconn=2)
+    try:
+        conn = db.connect_app()
+        assert db.get_connection() is conn
+        assert conn.autocommit is False
+        with conn.cursor() as cursor:
+            cursor.execute("CREATE TEMP TABLE compat_probe (x int)")
+        pool = db.get_pool()
+        assert pool.snapshot()["in_use"] == 1
+        db.close()
+        assert pool.snapshot()["in_use"] == 0
+        with pytest.raises(ConnectionError):
+            db.get_connection()
+        # 归还时回滚了未提交的事务
+        with pool.connection() as reused, reused.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('pg_temp.compat_probe')")
+            assert cursor.fetchone()[0] is None
+    finally:
+        DatabaseConnection.close_all_pools()
+
+
+@pytest.mark.integration
+def test_pool_waits_then_times_out(pool):
+    """测试连接用满时等待归还，超过 timeout 抛 PoolTimeout"""
+    a, b = pool.getconn(), pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    pool.putconn(a)
+    with pool.connection() as conn:
+        assert conn is a
+    pool.putconn(b)
+    stats = pool.snapshot()
+    assert (stats["borrowed"], stats["timeouts"], stats["in_use"]) == (3, 1, 0)
+    assert stats["wait_max"] >= 0.1
+
+
+@pytest.mark.integration
+def test_pool_discards_dead_connections(pool):
+    """测试空闲超时后借出前先检查，已被服务端断开的连接被丢弃并换成新连接"""
+    now = [0.0]
+    pool.clock = lambda: now[0]
+    victim, other = pool.getconn(), pool.getconn()
+    with victim.cursor() as cursor:
+        cursor.execute("SELECT pg_backend_pid()")
+        pid = cursor.fetchone()[0]
+    with other.cursor() as cursor:
+        cursor.execute("SELECT pg_terminate_backend(%s)", (pid,))
+    pool.putconn(other)
+    pool.putconn(victim)  # 后归还的先借出
+
+    now[0] = pool.check_idle + 1
+    with pool.connection() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT pg_backend_pid()")
+        assert cursor.fetchone()[0] != pid
+    assert pool.snapshot()["discarded"] == 1
@@ -30,4 +30,26 @@ def test_batch_generation_uniqueness(generator):
     assert len(students) == count
     
     student_ids = [s.student_id for s in students]
-    assert len(set(student_ids)) == count  # 学号不重复
\ No newline at end of file
+    assert len(set(student_ids)) == count  # 学号不重复
+
+@pytest.mark.unit
+def test_batch_mode_deterministic_under_seed():
+    """测试批量模式在相同 seed 下结果可复现"""
+    rows_a = list(DataGenerator(seed=42, pool_size=50).iter_rows(30, batch_size=7))
+    rows_b = list(DataGenerator(seed=42, pool_size=50).iter_rows(30, batch_size=7))
+    assert rows_a == rows_b
+    assert len(rows_a[0]) == len(DataGenerator.ROW_COLUMNS)
+
+@pytest.mark.unit
+def test_batch_mode_columns_and_uniqueness():
+    """测试列批次长度、字段取值范围与跨批次学号唯一性"""
+    gen = DataGenerator(seed=7, pool_size=20)
+    batches = list(gen.iter_batches(2500, start=99990, batch_size=1000))
+    assert [len(b["student_id"]) for b in batches] == [1000, 1000, 500]
+
+    ids = [sid for b in batches for sid in b["student_id"]]
+    assert len(set(ids)) == 2500
+    for b in batches:
+        assert set(b) == set(DataGenerator.ROW_COLUMNS)
+        assert all(2 <= g <= 4 for g in b["gpa"])
+        assert all(15 <= (e - d).days // 365 <= 30 for d, e in zip(b["date_of_birth"], b["enrollment_date"]))
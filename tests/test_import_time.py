@@ -0,0 +1,58 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-11 15:26:14
+FilePath: /student_pg_db/tests/test_import_time.py
+'''
+import subprocess
+import sys
+
+import pytest
+
+# 启动开销预算（秒）：当前约 0.05 秒，预算留出足够余量，只拦截把重依赖重新拉回模块级导入的改动
+CLI_IMPORT_BUDGET = 0.3
+HEAVY_MODULES = ("sqlalchemy", "pydantic", "email_validator", "faker", "fastapi", "rich", "psycopg2", "dotenv")
+
+
+def import_profile(statement: str) -> tuple:
+    """在新解释器中执行 statement，返回 (-X importtime 统计的累计导入秒数, 已加载的重依赖)"""
+    probe = f"{statement}; import sys; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe], capture_output=True, text=True, check=True
+    )
+    # importtime 每行："import time: self [us] | cumulative | imported package"，只累加顶层（未缩进）的模块
+    top_level = [line.split("|") for line in result.stderr.splitlines() if line.startswith("import time:")]
+    total_us = sum(int(cols[1]) for cols in top_level if cols[1].strip().isdigit() and not cols[2].startswith("  "))
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return total_us / 1e6, loaded
+
+
+@pytest.mark.unit
+def test_cli_import_is_light():
+    """测试导入 CLI 不加载 SQLAlchemy / Pydantic / Faker / FastAPI / rich，且启动开销在预算内"""
+    seconds, loaded = import_profile("import student_pg_db.cli")
+    assert loaded == []
+    assert seconds < CLI_IMPORT_BUDGET, f"import student_pg_db.cli: {seconds * 1000:.1f} ms"
+
+
+@pytest.mark.unit
+def test_package_exports_load_on_first_access():
+    """测试 import student_pg_db 不加载重依赖，公开 API 首次访问时才导入"""
+    _, loaded = import_profile("import student_pg_db")
+    assert loaded == []
+    _, loaded = import_profile("import student_pg_db as p; p.StudentStatusEnum")
+    assert loaded == []
+    _, loaded = import_profile("import student_pg_db as p; p.StudentRepository")
+    assert "sqlalchemy" in loaded
+
+
+@pytest.mark.unit
+def test_session_module_defers_engine_creation():
+    """测试导入 core.session / core.async_session / core.cache 不创建引擎与缓存，首次使用时创建且只创建一次"""
+    statement = (
+        "from student_pg_db.core import cache, session, async_session; "
+        "assert session._stack is None and async_session._factory is None and not cache._built; "
+        "assert cache.student_cache is cache.get_student_cache(); "
+        "assert session.SessionLocal is session.get_session_factory(); "
+        "assert session.engine is session.get_engine() and len(session.pool_metrics) == 1"
+    )
+    import_profile(statement)
@@ -0,0 +1,128 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-06 14:40:12
+FilePath: /student_pg_db/tests/test_jobs.py
+'''
+from datetime import date
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+from student_pg_db.database.cache import TTLCache
+from student_pg_db.database.jobs import JOB_LOCK_NAMESPACE, ChunkedJobRunner, JobConflict, StatusTransition, spec_from_job
+from student_pg_db.models.students import Student
+
+MAJOR = "分块任务测试专业"
+SPEC = StatusTransition(from_status="active", to_status="graduated", enrollment_year=2022, major=MAJOR)
+
+
+@pytest.fixture
+def job_session(db_engine):
+    """任务每块提交一次：用 savepoint 承接提交，测试结束整体回滚"""
+    connection = db_engine.connect()
+    transaction = connection.begin()
+    session = sessionmaker(bind=connection, join_transaction_mode="create_savepoint")()
+    yield session
+    session.close()
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture
+def cohort(job_session, generator):
+    """3 名 2022 级在读（待毕业），另有 2023 级与已休学各 1 名（不应被修改）"""
+    students = [generator.generate_student(i) for i in range(5)]
+    for s, (year, status) in zip(students, [(2022, "active")] * 3 + [(2023, "active"), (2022, "suspended")]):
+        s.major, s.status, s.enrollment_date = MAJOR, status, date(year, 9, 1)
+    job_session.add_all(students)
+    job_session.commit()
+    return students
+
+
+def statuses(session, students):
+    session.expire_all()
+    return [session.get(Student, s.id).status for s in students]
+
+
+@pytest.mark.integration
+def test_job_runs_in_chunks(job_session, cohort):
+    """测试分块执行：只修改匹配的行，检查点记录进度与完成状态"""
+    runner = ChunkedJobRunner(job_session, "graduate", SPEC, chunk_size=2)
+    assert runner.plan().rows == 3
+
+    result = runner.run()
+
+    assert (result.status, result.rows_updated, result.chunks) == ("done", 3, 2)
+    assert statuses(job_session, cohort) == ["graduated"] * 3 + ["active", "suspended"]
+    job = runner.checkpoint()
+    assert job.status == "done" and job.last_id == cohort[2].id and job.finished_at is not None
+    assert spec_from_job(job) == SPEC
+    # 已完成的任务再次运行不做任何修改
+    assert runner.run().chunks == 2
+
+
+@pytest.mark.integration
+def test_job_invalidates_cache_per_chunk(job_session, cohort):
+    """测试每块提交后只失效实际修改的行的缓存"""
+    cache = TTLCache(maxsize=10)
+    for s in cohort:
+        cache.set(s.id, "stale")
+    ChunkedJobRunner(job_session, "graduate", SPEC, chunk_size=2, cache=cache).run()
+    assert [cache.get(s.id) for s in cohort] == [None] * 3 + ["stale", "stale"]
+
+
+@pytest.mark.integration
+def test_job_resumes_after_interrupt(job_session, cohort):
+    """测试中断后保留已提交块的检查点，续跑只处理剩余的行"""
+    def interrupt(progress):
+        raise KeyboardInterrupt
+
+    runner = ChunkedJobRunner(job_session, "graduate", SPEC, chunk_size=2, on_progress=interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        runner.run()
+
+    job = runner.checkpoint()
+    assert (job.status, job.last_id, job.rows_updated) == ("interrupted", cohort[1].id, 2)
+    assert statuses(job_session, cohort)[:3] == ["graduated", "graduated", "active"]
+
+    runner.on_progress = None
+    result = runner.run()
+    assert (result.status, result.rows_updated, result.chunks, result.run_rows) == ("done", 3, 2, 1)
+
+
+@pytest.mark.integration
+def test_job_name_conflict(job_session, cohort):
+    """测试同名任务参数不同时拒绝执行，restart 从头开始"""
+    ChunkedJobRunner(job_session, "graduate", SPEC).run()
+    other = StatusTransition(from_status="active", to_status="withdrawn", major=MAJOR)
+    with pytest.raises(JobConflict):
+        ChunkedJobRunner(job_session, "graduate", other).run()
+
+    result = ChunkedJobRunner(job_session, "graduate", SPEC).run(restart=True)
+    assert (result.status, result.rows_updated) == ("done", 0)
+
+
+@pytest.mark.integration
+def test_job_rejects_concurrent_run(job_session, cohort, db_engine):
+    """测试同名任务正在其他会话中运行（持有 advisory lock）时直接报 JobConflict，不改检查点"""
+    from sqlalchemy import text
+    runner = ChunkedJobRunner(job_session, "graduate", SPEC, chunk_size=2)
+    assert runner.estimate_remaining() >= 0
+    with db_engine.connect() as other:
+        other.execute(text("SELECT pg_advisory_lock(:ns, hashtext('graduate'))"), {"ns": JOB_LOCK_NAMESPACE})
+        with pytest.raises(JobConflict, match="正在"):
+            runner.run()
+        other.execute(text("SELECT pg_advisory_unlock(:ns, hashtext('graduate'))"), {"ns": JOB_LOCK_NAMESPACE})
+    assert runner.checkpoint() is None
+    assert runner.run().rows_updated == 3
+
+
+@pytest.mark.unit
+def test_job_throttle():
+    """测试限速：按累计速度补齐等待时间，pause 为最小间隔"""
+    sleeps = []
+    runner = ChunkedJobRunner(None, "t", SPEC, pause=0.1, max_rows_per_sec=1000, sleep=sleeps.append)
+    runner._throttle(scanned=1000, elapsed=0.25)
+    runner._throttle(scanned=1000, elapsed=2.0)
+    assert sleeps == [0.75, 0.1]
+    with pytest.raises(ValueError):
+        ChunkedJobRunner(None, "t", SPEC, chunk_size=0)
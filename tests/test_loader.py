@@ -0,0 +1,152 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-03 14:26:31
+FilePath: /student_pg_db/tests/test_loader.py
+'''
+import asyncio
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from student_pg_db.database.async_repository import AsyncStudentRepository
+from student_pg_db.database.cache import TTLCache
+from student_pg_db.database.loader import AsyncStudentLoader, StudentLoader
+from student_pg_db.database.repository import StudentRepository
+
+
+@contextmanager
+def count_selects(engine):
+    """统计期间发出的 SELECT 语句条数"""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def saved_students(db_session, generator):
+    students = generator.generate_students(4)
+    db_session.add_all(students)
+    db_session.flush()
+    db_session.expunge_all()
+    return students
+
+
+@pytest.mark.integration
+def test_get_many_keeps_requested_order(db_engine, db_session, saved_students):
+    """测试 get_many：一条语句、按传入顺序、跳过不存在与重复的 ID"""
+    a, b, c, _ = (s.id for s in saved_students)
+    repo = StudentRepository(db_session)
+    with count_selects(db_engine) as selects:
+        rows = repo.get_many([c, a, 10**9, c, b], plain=True)
+    assert [r.id for r in rows] == [c, a, b]
+    assert len(selects) == 1 and "ANY" in selects[0]
+    assert repo.get_many([]) == []
+
+
+@pytest.mark.integration
+def test_get_many_uses_cache(db_engine, db_session, saved_students):
+    """测试启用缓存时 get_many 只查询未命中的 ID"""
+    a, b, c, _ = (s.id for s in saved_students)
+    cache = TTLCache(maxsize=10)
+    repo = StudentRepository(db_session, cache=cache)
+    repo.get_by_id(a)
+    db_session.expunge_all()
+    with count_selects(db_engine) as selects:
+        assert [s.id for s in repo.get_many([b, a, c])] == [b, a, c]
+    assert len(selects) == 1 and cache.stats.hits == 1
+    assert [s.id for s in repo.get_many([c, b])] == [c, b] and cache.stats.hits == 3
+
+
+@pytest.mark.integration
+def test_student_loader_coalesces_loads(db_engine, db_session, saved_students):
+    """测试同步加载器：先登记的 ID 在第一次取值时合并查询，结果在请求内记忆"""
+    a, b, c, d = (s.id for s in saved_students)
+    loader = StudentLoader(StudentRepository(db_session), max_batch_size=2)
+    with count_selects(db_engine) as selects:
+        pending = [loader.load(id) for id in (a, b, 10**9)]
+        assert [p.result().id for p in pending[:2]] + [pending[2].result()] == [a, b, None]
+        assert loader.get(a).id == a
+        assert [s.id for s in loader.load_many([d, a, c])] == [d, a, c]
+    # (a, b) + (10**9) 按 2 个一批拆成两次，之后只有 d、c 需要再查一次
+    assert loader.batches == len(selects) == 3
+
+    loader.clear(a)
+    assert loader.get(a).id == a and loader.batches == 4
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_async_loader_coalesces_concurrent_loads(async_db_session, generator):
+    """测试异步加载器：同一轮事件循环里并发的 load 合并成一次查询，被取消的等待方不影响其他等待方"""
+    students = generator.generate_students(3)
+    async_db_session.add_all(students)
+    await async_db_session.flush()
+    a, b, c = (s.id for s in students)
+    loader = AsyncStudentLoader(AsyncStudentRepository(async_db_session))
+
+    results = await asyncio.gather(loader.load(a), loader.load(b), loader.load(a), loader.load(10**9))
+    assert [r and r.id for r in results] == [a, b, a, None]
+    assert loader.batches == 1
+
+    cancelled = asyncio.ensure_future(loader.load(c))
+    waiting = asyncio.ensure_future(loader.load(c))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    assert (await waiting).id == c
+    assert [s.id for s in await loader.load_many([c, b])] == [c, b]
+    assert loader.batches == 2
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_async_loader_cancelled_dispatch_releases_waiters():
+    """测试批量查询被取消时，等待中的 load 随之取消而不是一直挂起；之后可重新加载"""
+    class SlowRepo:
+        async def get_by_id(self, id):
+            await asyncio.sleep(10)
+
+        get_many = get_by_id
+
+    loader = AsyncStudentLoader(SlowRepo())
+    waiting = asyncio.ensure_future(loader.load(1))
+    await asyncio.sleep(0.01)
+    loader._dispatching.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(waiting, 1)
+    assert loader._futures == {}
+
+
+@pytest.mark.e2e
+@pytest.mark.asyncio
+async def test_async_routes_use_request_loader(async_db_session, generator):
+    """测试异步详情与 ids 批量获取经请求内加载器：ids 一次查询、按传入顺序、跳过不存在的 ID"""
+    from httpx import ASGITransport, AsyncClient
+    from student_pg_db.core.async_session import get_async_session
+    from student_pg_db.main import app
+
+    students = generator.generate_students(3)
+    async_db_session.add_all(students)
+    await async_db_session.flush()
+    a, b, c = (s.id for s in students)
+    statements = []
+    record = lambda conn, cursor, statement, *args: statements.append(statement)
+    engine = async_db_session.bind.engine.sync_engine
+    app.dependency_overrides[get_async_session] = lambda: async_db_session
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            resp = await client.get("/async/students/", params={"ids": f"{c},{a},{10**9},{c}"})
+            assert [s["id"] for s in resp.json()] == [c, a]
+            assert len(statements) == 1 and "ANY" in statements[0]
+            assert (await client.get(f"/async/students/{b}")).json()["id"] == b
+            assert (await client.get("/async/students/0")).status_code == 404
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+        app.dependency_overrides.clear()
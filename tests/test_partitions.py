@@ -0,0 +1,169 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-07 16:12:05
+FilePath: /student_pg_db/tests/test_partitions.py
+'''
+from datetime import date
+
+import pytest
+from sqlalchemy import select, text, update
+from sqlalchemy.exc import IntegrityError
+from student_pg_db.database.partitions import StudentPartitionManager
+from student_pg_db.database.repository import StudentRepository, build_filters, explain_statement, query_statement
+from student_pg_db.database.stats import StudentStatsRepository
+from student_pg_db.models.change_tracking import StudentTombstone
+from student_pg_db.models.student_partitions import StudentIdRegistry
+from student_pg_db.models.student_search import StudentSearch
+from student_pg_db.models.students import Student
+from student_pg_db.schemas.student import StudentQuery
+
+
+def ensure_partitions(session, *years):
+    """初始分区随当前日期变化，测试用到的年份显式建好"""
+    for year in years:
+        StudentPartitionManager(session).create(year)
+
+
+def add_students(session, generator, *years):
+    students = []
+    for i, year in enumerate(years):
+        student = generator.generate_student(i)
+        student.enrollment_date = date(year, 9, 1)
+        students.append(student)
+    session.add_all(students)
+    session.flush()
+    return students
+
+
+def partition_of(session, student) -> str:
+    return session.scalar(text("SELECT tableoid::regclass::text FROM students WHERE id = :id"), {"id": student.id})
+
+
+def registered(session, student_id) -> bool:
+    return session.get(StudentIdRegistry, student_id) is not None
+
+
+@pytest.mark.integration
+def test_student_id_unique_across_partitions(db_session, generator):
+    """测试学号在不同入学年份（不同分区）间仍全局唯一"""
+    ensure_partitions(db_session, 2022, 2023)
+    existing, = add_students(db_session, generator, 2022)
+    assert partition_of(db_session, existing) == "students_y2022"
+
+    duplicate = generator.generate_student(99)
+    duplicate.student_id, duplicate.enrollment_date = existing.student_id, date(2023, 9, 1)
+    with pytest.raises(IntegrityError), db_session.begin_nested():
+        db_session.add(duplicate)
+
+
+@pytest.mark.integration
+def test_bulk_create_skips_student_ids_in_other_partitions(db_session, generator):
+    """测试 bulk_create 跳过其他分区中已有的学号与同批重复"""
+    existing, = add_students(db_session, generator, 2022)
+    fresh = {c: getattr(generator.generate_student(7), c) for c in generator.ROW_COLUMNS}
+    moved = {**fresh, "student_id": existing.student_id, "enrollment_date": date(2023, 9, 1)}
+
+    inserted = StudentRepository(db_session).bulk_create([moved, fresh, {**fresh, "name": "重复"}])
+
+    assert [row.student_id for row in inserted] == [fresh["student_id"]]
+
+
+@pytest.mark.integration
+def test_updates_keep_registry_in_sync(db_session, generator):
+    """测试改入学日期时行移动到对应分区；改学号（含同一语句互换）时登记表同步"""
+    ensure_partitions(db_session, 2022, 2023, 2024)
+    a, b = add_students(db_session, generator, 2022, 2023)
+    old_a, old_b = a.student_id, b.student_id
+
+    db_session.execute(update(Student).where(Student.id == a.id).values(enrollment_date=date(2024, 9, 1)))
+    assert partition_of(db_session, a) == "students_y2024"
+
+    db_session.execute(update(Student).where(Student.id == a.id).values(student_id="S20249999901"))
+    assert registered(db_session, "S20249999901") and not registered(db_session, old_a)
+
+    swap = {a.id: old_b, b.id: "S20249999901"}
+    db_session.execute(
+        update(Student).where(Student.id.in_(swap)).values(
+            student_id=text("CASE id WHEN :a THEN :sa ELSE :sb END").bindparams(a=a.id, sa=swap[a.id], sb=swap[b.id])
+        )
+    )
+    rows = db_session.execute(select(StudentIdRegistry.student_id, StudentIdRegistry.id).where(
+        StudentIdRegistry.id.in_(swap))).all()
+    assert dict((id, sid) for sid, id in rows) == swap
+
+
+@pytest.mark.integration
+def test_bulk_upsert_moves_student_to_new_enrollment_year(db_session, generator):
+    """测试 upsert 改入学日期：已有学号按主键更新并移动分区，不因登记表冲突整批回滚；省略入学日期时保持原值"""
+    ensure_partitions(db_session, 2022, 2023)
+    student, = add_students(db_session, generator, 2022)
+    fresh = generator.generate_student(50)
+    row = {c: getattr(student, c) for c in generator.ROW_COLUMNS}
+    repo = StudentRepository(db_session)
+
+    result = repo.bulk_upsert([
+        {**row, "enrollment_date": date(2023, 9, 1), "gpa": 3.3},
+        {c: getattr(fresh, c) for c in generator.ROW_COLUMNS},
+    ])
+    assert (result.inserted, result.updated) == (1, 1)
+    db_session.expire_all()
+    assert partition_of(db_session, student) == "students_y2023"
+    assert float(db_session.get(Student, student.id).gpa) == 3.3
+    assert registered(db_session, fresh.student_id)
+
+    partial = {c: v for c, v in row.items() if c != "enrollment_date"}
+    assert repo.bulk_upsert([{**partial, "gpa": 2.1}]).updated == 1
+    db_session.expire_all()
+    assert db_session.get(Student, student.id).enrollment_date == date(2023, 9, 1)
+
+
+@pytest.mark.integration
+def test_enrollment_year_query_prunes_partitions(db_session):
+    """测试 enrollment_year 条件只扫描该届分区"""
+    ensure_partitions(db_session, 2022, 2023)
+    q = StudentQuery(enrollment_year=2023, major="计算机科学与技术", sort_by="gpa")
+    sql, params = explain_statement(query_statement(q, build_filters(q)), db_session.get_bind().dialect, options="")
+    plan = "\n".join(row[0] for row in db_session.connection().exec_driver_sql(sql, params))
+    assert "students_y2023" in plan
+    assert "students_y2022" not in plan and "students_default" not in plan
+
+
+@pytest.mark.integration
+def test_create_partition_moves_rows_from_default(db_session, generator):
+    """测试新建分区时把默认分区中该年份的行搬过去，汇总统计不变"""
+    stats = StudentStatsRepository(db_session)
+    student, = add_students(db_session, generator, 2010)
+    assert partition_of(db_session, student) == "students_default"
+    total = stats.groups("all")[0].count
+
+    assert StudentPartitionManager(db_session).create(2010) == "students_y2010"
+
+    assert partition_of(db_session, student) == "students_y2010"
+    assert stats.groups("all")[0].count == total
+    assert StudentPartitionManager(db_session).create(2010) == "students_y2010"
+
+
+@pytest.mark.integration
+def test_archive_detaches_cohort(db_session, generator):
+    """测试归档一届：分区摘下改名，删除记录、登记表、检索词、汇总表与逐行删除一致，表级版本随之变化"""
+    manager = StudentPartitionManager(db_session)
+    manager.create(2011)
+    archived = add_students(db_session, generator, 2011, 2011)
+    kept, = add_students(db_session, generator, 2023)
+    repo = StudentRepository(db_session)
+    stats = StudentStatsRepository(db_session)
+    total = stats.groups("all")[0].count
+
+    assert manager.archive(2011) == 2
+
+    ids = [s.id for s in archived]
+    assert db_session.scalars(select(Student.id).where(Student.id.in_(ids + [kept.id]))).all() == [kept.id]
+    assert db_session.scalar(text("SELECT count(*) FROM students_archive_y2011")) == 2
+    assert sorted(db_session.scalars(select(StudentTombstone.id).where(StudentTombstone.id.in_(ids)))) == sorted(ids)
+    assert not any(registered(db_session, s.student_id) for s in archived)
+    assert db_session.scalars(select(StudentSearch.id).where(StudentSearch.id.in_(ids))).all() == []
+    assert stats.groups("all")[0].count == total - 2
+    assert repo.table_version().version == db_session.scalar(text("SELECT pg_current_xact_id()::text"))  # 删除记录带本事务号
+    assert "students_archive_y2011" in [p.name for p in manager.archives()]
+    with pytest.raises(ValueError):
+        manager.archive(2011)
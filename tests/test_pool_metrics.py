@@ -0,0 +1,110 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-10 16:03:35
+FilePath: /student_pg_db/tests/test_pool_metrics.py
+'''
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from student_pg_db.config import DatabaseConfig
+from student_pg_db.core.connection import DatabaseConnection
+from student_pg_db.database.pool_metrics import PoolMetrics, render_pg_pools, render_prometheus
+
+
+@pytest.fixture
+def metered():
+    metrics = PoolMetrics("test")
+    engine = metrics.attach(create_engine(
+        DatabaseConfig().sync_url, poolclass=metrics.pool_class(), pool_size=1, max_overflow=1, pool_timeout=0.05,
+    ))
+    yield metrics, engine
+    engine.dispose()
+
+
+@pytest.mark.unit
+def test_pool_options_from_env(monkeypatch):
+    """测试连接池参数可由环境变量配置"""
+    monkeypatch.setenv("DB_POOL_SIZE", "4")
+    monkeypatch.setenv("DB_POOL_RECYCLE", "1800")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+    monkeypatch.setenv("DB_POOL_USE_LIFO", "1")
+    options = DatabaseConfig().pool_options
+    assert (options["pool_size"], options["pool_recycle"]) == (4, 1800)
+    assert options["pool_pre_ping"] is False and options["pool_use_lifo"] is True
+    assert options["max_overflow"] == 20
+
+
+@pytest.mark.integration
+def test_pool_metrics_track_checkouts_overflow_and_timeouts(metered):
+    """测试借出计数、使用中与溢出连接数、等待超时计数"""
+    metrics, engine = metered
+    first, second = engine.connect(), engine.connect()
+    snap = metrics.snapshot()
+    assert (snap["checkouts"], snap["checked_out"], snap["overflow"], snap["connects"]) == (2, 2, 1, 2)
+
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    assert metrics.snapshot()["timeouts"] == 1
+    assert metrics.wait_max >= 0.05
+
+    second.close()  # 溢出连接归还时直接关闭
+    first.close()
+    snap = metrics.snapshot()
+    assert (snap["checked_out"], snap["checked_in"], snap["closes"]) == (0, 1, 1)
+
+
+@pytest.mark.integration
+def test_pool_metrics_count_invalidations_and_survive_dispose(metered):
+    """测试连接失效计入更替次数；dispose 重建连接池后继续计数"""
+    metrics, engine = metered
+    with engine.connect() as conn:
+        conn.invalidate()
+    engine.dispose()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    snap = metrics.snapshot()
+    assert (snap["invalidations"], snap["checkouts"], snap["connects"]) == (1, 2, 2)
+    assert snap["checked_in"] == 1
+
+
+@pytest.mark.integration
+def test_metrics_endpoint(client, metered):
+    """测试 /metrics 输出 Prometheus 文本：每个连接池的状态与等待时间直方图"""
+    metrics, engine = metered
+    with engine.connect():
+        pass
+    body = render_prometheus([metrics])
+    assert 'student_db_pool_checkouts_total{pool="test"} 1' in body
+    assert 'student_db_pool_checkout_wait_seconds_bucket{pool="test",le="+Inf"} 1' in body
+    assert f'student_db_pool_checkout_wait_max_seconds{{pool="test"}} {metrics.wait_max}' in body
+
+    db = DatabaseConnection(maxconn=2)
+    db.connect_app()
+    try:
+        with db.get_cursor() as cursor:
+            cursor.execute("SELECT 1")
+        response = client.get("/metrics")
+    finally:
+        DatabaseConnection.close_all_pools()
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'student_db_pool_size{pool="primary"}' in response.text
+    assert 'student_db_pool_checked_out{pool="async"}' in response.text
+    assert "# TYPE student_db_pg_pool_in_use gauge" in response.text
+    app = [line for line in response.text.splitlines()
+           if line.startswith("student_db_pg_pool_") and DatabaseConfig._load_profile().app_db_name in line]
+    assert any(line.startswith("student_db_pg_pool_borrowed_total") and line.endswith(" 2") for line in app)
+    assert any(line.startswith("student_db_pg_pool_in_use") and line.endswith(" 1") for line in app)
+
+
+@pytest.mark.unit
+def test_render_pg_pools():
+    """测试 psycopg2 维护连接池的统计按 pool 标签输出"""
+    snap = {"borrowed": 3, "returned": 2, "timeouts": 1, "discarded": 0, "wait_total": 0.5, "wait_max": 0.25,
+            "hold_total": 1.5, "hold_max": 1.0, "in_use": 1, "maxconn": 4}
+    body = render_pg_pools({"app@localhost:5432/students": snap})
+    assert 'student_db_pg_pool_checkout_wait_max_seconds{pool="app@localhost:5432/students"} 0.25' in body
+    assert 'student_db_pg_pool_checkout_timeouts_total{pool="app@localhost:5432/students"} 1' in body
+    assert 'student_db_pg_pool_in_use{pool="app@localhost:5432/students"} 1' in body
+    assert render_pg_pools({}).count("# TYPE") == 10
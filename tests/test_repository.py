@@ -36,4 +36,123 @@ def test_update_student_status(db_session, generator):
     repo.update_status(student.student_id, "graduated")
     
     updated_student = repo.get_by_student_id(student.student_id)
-    assert updated_student.status == "graduated"
\ No newline at end of file
+    assert updated_student.status == "graduated"
+
+@pytest.mark.integration
+def test_bulk_upsert_counts_inserted_and_updated(db_session, generator):
+    """测试批量 upsert 的插入/更新计数与同批去重"""
+    repo = StudentRepository(db_session)
+    existing = [generator.generate_student(i) for i in range(3)]
+    db_session.add_all(existing)
+    db_session.flush()
+
+    def as_row(student, **changes):
+        row = {c: getattr(student, c) for c in generator.ROW_COLUMNS}
+        return {**row, **changes}
+
+    rows = [
+        as_row(existing[0], gpa=1.5),
+        as_row(existing[1], gpa=2.5),
+        as_row(existing[1], gpa=3.5),  # 同批重复：以最后一条为准
+        as_row(generator.generate_student(99)),
+    ]
+
+    result = repo.bulk_upsert(rows, batch_size=3)
+
+    assert (result.inserted, result.updated) == (1, 2)
+    db_session.expire_all()
+    assert float(repo.get_by_id(existing[1].id).gpa) == 3.5
+    assert existing[2].gpa == repo.get_by_id(existing[2].id).gpa
+
+@pytest.mark.integration
+def test_get_by_id_cache_hit_and_invalidation(db_session, generator):
+    """测试 get_by_id 读穿缓存：二次读取命中不查库，update 后失效"""
+    from student_pg_db.database.cache import TTLCache
+    cache = TTLCache(maxsize=10)
+    repo = StudentRepository(db_session, cache=cache)
+    student = generator.generate_student(1)
+    db_session.add(student)
+    db_session.flush()
+    db_session.expunge_all()
+
+    assert repo.get_by_id(student.id).name == student.name
+    db_session.expunge_all()
+    cached = repo.get_by_id(student.id)
+    assert cached.name == student.name and cached in db_session
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+    repo.update(student.id, name="新名字")
+    db_session.expunge_all()
+    assert repo.get_by_id(student.id).name == "新名字"
+    assert cache.stats.invalidations == 1 and cache.stats.misses == 2
+
+@pytest.mark.integration
+def test_update_many_mixed_columns(db_session, generator):
+    """测试 update_many：各行修改的列不同、同 ID 合并、置 NULL、跳过不存在的 ID、不提交"""
+    from datetime import date
+    repo = StudentRepository(db_session)
+    students = [generator.generate_student(i) for i in range(4)]
+    db_session.add_all(students)
+    db_session.flush()
+    a, b, c, d = (s.id for s in students)
+    original_c = (students[2].status, float(students[2].gpa))
+
+    rows = repo.update_many([
+        (a, {"gpa": 1.25}),
+        (b, {"status": "graduated", "enrollment_date": date(2020, 9, 1)}),
+        (a, {"status": "suspended"}),  # 同批同 ID：与前一条合并
+        (d, {"gpa": None}),
+        (10**9, {"gpa": 2.0}),
+        (c, {}),
+    ], batch_size=10)
+
+    assert sorted(r.id for r in rows) == sorted([a, b, d])
+    db_session.expire_all()
+    got = {s.id: s for s in repo.get_many([a, b, c, d])}
+    assert (float(got[a].gpa), got[a].status) == (1.25, "suspended")
+    assert (got[b].status, got[b].enrollment_date) == ("graduated", date(2020, 9, 1))
+    assert float(got[b].gpa) == float(students[1].gpa)
+    assert (got[c].status, float(got[c].gpa)) == original_c
+    assert got[d].gpa is None
+
+
+@pytest.mark.integration
+def test_update_many_rejects_immutable_columns(db_session):
+    """测试 update_many 拒绝未知列与主键 / 时间戳列"""
+    repo = StudentRepository(db_session)
+    for changes in ({"id": 2}, {"created_at": None}, {"nickname": "x"}):
+        with pytest.raises(ValueError):
+            repo.update_many([(1, changes)])
+    with pytest.raises(ValueError):
+        repo.update_many([(1, {"gpa": 1.0})], batch_size=0)
+
+
+@pytest.mark.integration
+def test_prune_tombstones_keeps_recent_newest_and_unfinished(db_session, generator):
+    """测试只清理超过保留期、低于安全水位的墓碑，并保留最新的一条"""
+    from datetime import datetime, timedelta, timezone
+    from sqlalchemy import delete, select, update
+    from student_pg_db.models.change_tracking import StudentTombstone
+
+    repo = StudentRepository(db_session)
+    now = datetime.now(timezone.utc)
+    db_session.add_all([
+        StudentTombstone(id=900001, student_id="T900001", change_xid=1, deleted_at=now - timedelta(days=40)),
+        StudentTombstone(id=900002, student_id="T900002", change_xid=2, deleted_at=now - timedelta(days=1)),
+        StudentTombstone(id=900003, student_id="T900003", change_xid=3, deleted_at=now - timedelta(days=40)),
+    ])
+    db_session.flush()
+
+    assert repo.prune_tombstones(timedelta(days=30)) >= 1
+    assert set(db_session.scalars(select(StudentTombstone.id).where(StudentTombstone.id >= 900001))) == {900002, 900003}
+
+    # 本事务删除的学生：墓碑的事务号不低于安全水位，即使已过保留期也不清理
+    student = generator.generate_student(900004)
+    db_session.add(student)
+    db_session.flush()
+    db_session.execute(delete(Student).where(Student.id == student.id))
+    db_session.execute(update(StudentTombstone).where(StudentTombstone.id == student.id)
+                       .values(deleted_at=now - timedelta(days=40)))
+    repo.prune_tombstones(timedelta(days=30))
+    kept = set(db_session.scalars(select(StudentTombstone.id).where(StudentTombstone.id.in_([900002, 900003, student.id]))))
+    assert kept == {900002, student.id}
@@ -0,0 +1,115 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-08 15:32:09
+FilePath: /student_pg_db/tests/test_routing.py
+'''
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import NullPool
+from student_pg_db.config import DatabaseConfig
+from student_pg_db.database.repository import StudentRepository
+from student_pg_db.database.routing import LAG_SQL, REPLICA, ReplicaSet, RoutingSession
+from student_pg_db.database.stats import StudentStatsRepository
+
+
+class FixedLagReplicas(ReplicaSet):
+    def __init__(self, lags):
+        super().__init__(list(lags), max_lag=5.0)
+        self.lags = lags
+
+    def lag(self, engine):
+        return self.lags[engine]
+
+
+@pytest.fixture
+def replica_engine():
+    """没有真正的副本时用指向同一个库的只读引擎充当副本，并记录在其上执行的语句"""
+    engine = create_engine(DatabaseConfig().sync_url, poolclass=NullPool).execution_options(postgresql_readonly=True)
+    engine.statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: engine.statements.append(sql))
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def routing_session(db_engine, replica_engine):
+    session = RoutingSession(bind=db_engine, replicas=ReplicaSet([replica_engine]))
+    yield session
+    session.close()  # 未提交，主库上的写入随之回滚
+
+
+@pytest.mark.unit
+def test_replicas_round_robin_skips_lagging():
+    """测试轮询分配副本，跳过延迟超过阈值的副本，全部超限时返回 None"""
+    replicas = FixedLagReplicas({"r1": 0.0, "r2": 1.0, "r3": 60.0})
+    assert [replicas.choose() for _ in range(4)] == ["r1", "r2", "r1", "r1"]
+
+    replicas.lags.update(r1=60.0, r2=60.0)
+    assert replicas.choose() is None
+
+
+@pytest.mark.unit
+def test_replica_lag_check_is_cached():
+    """测试延迟检查在 check_interval 内复用结果；连不上的副本视为延迟无穷大"""
+    now = [0.0]
+    unreachable = create_engine("postgresql+psycopg2://nobody:x@127.0.0.1:1/none", poolclass=NullPool)
+    replicas = ReplicaSet([unreachable], check_interval=1.0, clock=lambda: now[0])
+    assert replicas.lag(unreachable) == float("inf")
+
+    replicas._checked[unreachable] = (0.0, 0.5)
+    now[0] = 0.5
+    assert replicas.choose() is unreachable
+    now[0] = 1.5
+    assert replicas.choose() is None
+
+
+@pytest.mark.integration
+def test_reads_go_to_replica(routing_session, replica_engine):
+    """测试 get_by_id / list_all / search / 统计走副本；未标记的读取（table_version）走主库且不固定到主库"""
+    repo = StudentRepository(routing_session)
+    repo.get_by_id(-1)
+    repo.list_all(limit=5)
+    repo.search("张")
+    repo.table_version()
+    StudentStatsRepository(routing_session).groups("all")
+
+    assert routing_session.get_bind(**REPLICA) is replica_engine
+    lag_check, *reads = replica_engine.statements
+    assert lag_check == LAG_SQL
+    assert len(reads) == 4
+    assert not any("pg_current_snapshot" in sql for sql in reads)
+    assert not routing_session.primary_only
+
+
+@pytest.mark.integration
+def test_read_your_writes_stays_on_primary(routing_session, replica_engine, generator):
+    """测试 Session 写过之后读取都走主库，能读到本事务未提交的写入"""
+    repo = StudentRepository(routing_session)
+    repo.list_all(limit=1)
+    student = repo.create(generator.generate_student(0))
+    replica_engine.statements.clear()
+
+    routing_session.expunge(student)
+    assert repo.get_by_id(student.id).student_id == student.student_id
+    assert [row.id for row in repo.search(student.student_id)] == [student.id]
+    assert routing_session.primary_only and replica_engine.statements == []
+
+
+@pytest.mark.integration
+def test_falls_back_to_primary_without_healthy_replica(db_engine, replica_engine):
+    """测试副本延迟超限时读取回主库"""
+    with RoutingSession(bind=db_engine, replicas=FixedLagReplicas({replica_engine: 60.0})) as session:
+        StudentRepository(session).list_all(limit=1)
+        assert session.primary_only and replica_engine.statements == []
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(not DatabaseConfig().replica_sync_urls, reason="未配置 DB_REPLICAS（见 Docker/docker-compose.yml）")
+def test_streaming_replica(db_engine):
+    """真实主从（docker compose 起的 postgres + postgres-replica）：读取落在处于恢复模式的副本上，复制延迟在阈值内"""
+    from student_pg_db.core.session import SessionLocal, replicas
+
+    with SessionLocal() as session:
+        assert session.execute(text("SELECT pg_is_in_recovery()"), bind_arguments=REPLICA).scalar() is True
+        assert session.execute(text("SELECT pg_is_in_recovery()")).scalar() is False
+    assert all(replicas.lag(engine) <= replicas.max_lag for engine in replicas.engines)
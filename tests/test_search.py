@@ -0,0 +1,79 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-02 14:18:55
+FilePath: /student_pg_db/tests/test_search.py
+'''
+import pytest
+from sqlalchemy import select
+from student_pg_db.database.repository import StudentRepository
+from student_pg_db.database import search
+from student_pg_db.database.search import name_grams, suffix_gram
+from student_pg_db.models.student_search import StudentSearch
+
+
+@pytest.mark.unit
+def test_query_grams():
+    """测试查询端切词：多字取二元组，单字按姓氏，学号尾号最多取 6 位"""
+    assert name_grams("张 三丰") == ["n:三丰", "n:张三"]
+    assert name_grams("Li") == ["n:li"]
+    assert name_grams("张") == ["n:^张"]
+    assert suffix_gram("0072") == "s:0072"
+    assert suffix_gram("S20230000072") == "s:000072"
+    assert suffix_gram("7") is None
+
+
+@pytest.mark.integration
+def test_search_grams_maintained_by_triggers(db_session, generator):
+    """测试写入 / 改名 / 删除时 student_search 同步更新，且与查询端切词一致"""
+    student = generator.generate_student(1)
+    student.name, student.student_id = "欧阳 娜娜", "S20249990072"
+    db_session.add(student)
+    db_session.flush()
+
+    grams = set(db_session.scalar(select(StudentSearch.grams).where(StudentSearch.id == student.id)))
+    assert set(name_grams("欧阳娜娜")) | {"n:^欧", "n:娜$"} <= grams
+    assert {suffix_gram("72"), suffix_gram("990072"), suffix_gram("S20249990072")} <= grams
+
+    student.name = "司马光"
+    db_session.flush()
+    grams = set(db_session.scalar(select(StudentSearch.grams).where(StudentSearch.id == student.id)))
+    assert "n:司马" in grams and "n:欧阳" not in grams
+
+    db_session.delete(student)
+    db_session.flush()
+    assert db_session.get(StudentSearch, student.id) is None
+
+
+@pytest.mark.integration
+def test_search_ranking(db_session, generator):
+    """测试搜索排序：完全相等 > 前缀 > 包含；学号前缀与尾号都能命中"""
+    students = generator.generate_students(5)
+    for s, name in zip(students, ["林小雨", "小雨", "王小雨", "小雨晴", "李四"]):
+        s.name = name
+    students[4].student_id = "S20990000123"
+    db_session.add_all(students)
+    db_session.flush()
+    repo = StudentRepository(db_session)
+
+    assert [r.name for r in repo.search("小雨")] == ["小雨", "小雨晴", "林小雨", "王小雨"]
+    assert [r.name for r in repo.search("林")][:1] == ["林小雨"]
+    assert [r.id for r in repo.search("00123")] == [students[4].id]
+    assert [r.id for r in repo.search("S2099000")] == [students[4].id]
+    assert repo.search("  ") == []
+
+
+@pytest.mark.integration
+def test_search_keeps_exact_match_beyond_candidate_limit(db_session, generator, monkeypatch):
+    """测试高频词项的候选超过上限时，姓名 / 学号完全相等的行仍总被返回且排在最前"""
+    monkeypatch.setattr(search, "SEARCH_CANDIDATES", 2)
+    students = generator.generate_students(5)
+    for i, s in enumerate(students[:4]):
+        s.name = f"{'赵钱孙李'[i]}小雨"
+    students[4].name = "小雨"
+    db_session.add_all(students)
+    db_session.flush()
+    repo = StudentRepository(db_session)
+
+    for _ in range(3):
+        assert [r.name for r in repo.search("小雨")][:1] == ["小雨"]
+    assert [r.id for r in repo.search(students[4].student_id)][:1] == [students[4].id]
@@ -0,0 +1,57 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-02-25 15:02:44
+FilePath: /student_pg_db/tests/test_serializer.py
+'''
+import json
+import pytest
+from datetime import date
+from decimal import Decimal
+from student_pg_db.database.repository import ROW_COLUMNS
+from student_pg_db.schemas.serializer import StudentSerializer
+from student_pg_db.schemas.student import StudentResponse
+
+VALUES = dict(
+    id=7, student_id="S20240007", name="张\"三\\", gender=None, date_of_birth=date(2005, 8, 15),
+    enrollment_date=date(2023, 9, 1), major="计算机", class_name="CS2023-01", email=None,
+    phone="139-1234-5678", address="第一行\n第二行\t", gpa=Decimal("3.10"), status="active",
+    change_xid=1234, created_at=date(2026, 2, 1), updated_at=date(2026, 2, 2),
+)
+
+@pytest.mark.unit
+@pytest.mark.parametrize("gpa", [Decimal("3.10"), Decimal("0.05"), None])
+def test_fast_serializer_matches_pydantic(gpa):
+    """测试快速序列化输出与 StudentResponse.model_dump_json 一致（含转义、NULL、Date 补零点）"""
+    values = {**VALUES, "gpa": gpa}
+    row = tuple(values[c] for c in ROW_COLUMNS)
+    expected = StudentResponse.model_validate(values).model_dump_json()
+    serializer = StudentSerializer(ROW_COLUMNS)
+    assert json.loads(serializer.dumps_one(row)) == json.loads(expected)
+    assert json.loads(serializer.dumps_many([row, row])) == [json.loads(expected)] * 2
+
+@pytest.mark.unit
+def test_fast_serializer_requires_all_fields():
+    """测试列不全时构造即报错"""
+    with pytest.raises(ValueError):
+        StudentSerializer(ROW_COLUMNS[:-1])
+
+@pytest.mark.unit
+@pytest.mark.parametrize("fields", [("id", "student_id", "name", "gpa"), ("age",), ("name", "age"), ("address",)])
+def test_fast_serializer_projection(fields):
+    """测试只输出部分字段：与 model_dump(include=fields) 一致，且只依赖这些字段的列"""
+    from student_pg_db.database.repository import projection_columns
+    columns = projection_columns(fields)
+    row = tuple(VALUES[c] for c in columns)
+    expected = json.loads(StudentResponse.model_validate(VALUES).model_dump_json(include=set(fields)))
+    assert json.loads(StudentSerializer(columns, fields=fields).dumps_many([row])) == [expected]
+    assert ("date_of_birth" in columns) == ("age" in fields)
+
+@pytest.mark.unit
+def test_parse_fields():
+    """测试 fields 参数：按响应字段顺序排列，未知字段与空值报错"""
+    from student_pg_db.schemas.serializer import parse_fields
+    assert parse_fields(None) is None
+    assert parse_fields(" gpa,id ,gpa") == ("gpa", "id")
+    for bad in ("", "id,password", "change_xid"):
+        with pytest.raises(ValueError):
+            parse_fields(bad)
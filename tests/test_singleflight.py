@@ -0,0 +1,115 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-03-04 14:37:12
+FilePath: /student_pg_db/tests/test_singleflight.py
+'''
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from student_pg_db.database.async_repository import AsyncStudentRepository
+from student_pg_db.database.cache import TTLCache
+from student_pg_db.database.repository import StudentRepository
+from student_pg_db.database.singleflight import AsyncSingleFlight, SingleFlight
+
+
+@pytest.mark.unit
+def test_concurrent_calls_share_one_execution():
+    """测试并发线程的相同键只执行一次，其余调用共享结果；不同键互不影响"""
+    flight = SingleFlight()
+    release, executions = threading.Event(), []
+
+    def query():
+        executions.append(1)
+        release.wait(5)
+        return {"id": 1}
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(flight.do, 1, query) for _ in range(8)]
+        while flight.stats.calls < 8:
+            pass
+        assert flight.snapshot()["in_flight"] == 1
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert len(executions) == 1 and all(r is results[0] for r in results)
+    assert (flight.stats.executed, flight.stats.coalesced) == (1, 7)
+    assert flight.do(2, lambda: "other") == "other" and flight.snapshot()["in_flight"] == 0
+
+
+@pytest.mark.unit
+def test_error_is_shared_and_not_remembered():
+    """测试执行方出错时等待方收到同一异常，之后的调用重新执行"""
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("db down")
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flight.do, 1, failing)
+        started.wait(5)
+        follower = pool.submit(flight.do, 1, lambda: "unused")
+        while flight.stats.coalesced < 1:
+            pass
+        release.set()
+        for f in (leader, follower):
+            with pytest.raises(RuntimeError, match="db down"):
+                f.result()
+    assert flight.do(1, lambda: "ok") == "ok"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_async_calls_share_one_execution():
+    """测试同一事件循环中的并发相同查询只执行一次；执行方被取消时由等待方接手"""
+    flight = AsyncSingleFlight()
+    executions = []
+
+    async def query():
+        executions.append(1)
+        await asyncio.sleep(0.01)
+        return len(executions)
+
+    assert await asyncio.gather(*(flight.do(1, query) for _ in range(5))) == [1] * 5
+    assert (flight.stats.executed, flight.stats.coalesced) == (1, 4)
+
+    leader = asyncio.ensure_future(flight.do(2, query))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flight.do(2, query))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await follower == 3  # 第二次执行由 follower 发起
+    assert flight.snapshot() == {"calls": 7, "executed": 3, "coalesced": 5, "in_flight": 0}
+
+
+@pytest.mark.integration
+def test_repository_shares_snapshot_through_flight(db_session, generator):
+    """测试仓储经 singleflight 查询：get_row / get_by_id 结果与直接查询一致，并回填缓存"""
+    student = generator.generate_student(1)
+    db_session.add(student)
+    db_session.flush()
+    flight, cache = SingleFlight(), TTLCache(maxsize=10)
+    repo = StudentRepository(db_session, cache=cache, flight=flight)
+
+    row = repo.get_row(student.id)
+    assert row[0] == student.id and row[-1]
+    assert repo.get_by_id(student.id) is student  # 快照并入 Session 时复用已有对象
+    assert (flight.stats.executed, cache.stats.hits) == (1, 1)
+    assert repo.get_row(10**9) is None and repo.get_by_id(10**9) is None
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_async_repository_get_by_id_through_flight(async_db_session, generator):
+    student = generator.generate_student(1)
+    async_db_session.add(student)
+    await async_db_session.flush()
+    flight = AsyncSingleFlight()
+    repo = AsyncStudentRepository(async_db_session, flight=flight)
+
+    found = await repo.get_by_id(student.id)
+    assert found is student and flight.stats.executed == 1
+    assert await repo.get_by_id(10**9) is None
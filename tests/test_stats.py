@@ -0,0 +1,66 @@
+'''
+Author: qifuxiao 867225266@qq.com
+Date: 2026-02-28 15:02:19
+FilePath: /student_pg_db/tests/test_stats.py
+'''
+import statistics
+import pytest
+from sqlalchemy import func, select, text
+from student_pg_db.database.stats import StudentStatsRepository, summarize
+from student_pg_db.models.student_stats import NULL_BUCKET, StudentStat, StudentStatDelta
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("values", [[250], [100, 400], [300, 300, 310, 120, 399, 0, 205], list(range(0, 401, 7))])
+def test_summarize_matches_direct_computation(values):
+    """测试直方图算出的均值与分位数与逐个取值直接计算一致"""
+    histogram = sorted({v: values.count(v) for v in values}.items())
+    stats = summarize("x", [(NULL_BUCKET, 2)] + histogram, percentiles=(25, 50, 90))
+
+    gpas = [v / 100 for v in values]
+    assert stats.count == len(values) + 2 and stats.gpa_count == len(values)
+    assert stats.gpa_mean == pytest.approx(statistics.fmean(gpas), abs=1e-4)
+    if len(gpas) > 1:
+        cuts = statistics.quantiles(gpas, n=100, method="inclusive")
+        assert stats.gpa_percentiles == {f"p{p}": pytest.approx(cuts[p - 1], abs=1e-4) for p in (25, 50, 90)}
+    else:
+        assert set(stats.gpa_percentiles.values()) == {gpas[0]}
+
+
+@pytest.mark.unit
+def test_summarize_without_gpa():
+    stats = summarize("x", [(NULL_BUCKET, 3)], percentiles=(50,))
+    assert (stats.count, stats.gpa_count, stats.gpa_mean, stats.gpa_percentiles) == (3, 0, None, {})
+
+
+@pytest.mark.integration
+def test_rebuild_restores_summary(db_session, generator):
+    """测试汇总表被破坏后 rebuild 能按 students 重新算出"""
+    db_session.add_all(generator.generate_students(20))
+    db_session.flush()
+    repo = StudentStatsRepository(db_session)
+    repo.fold()
+    before = repo.groups("enrollment_year")
+
+    db_session.execute(text("UPDATE student_stats SET n = n + 5"))
+    assert repo.groups("enrollment_year") != before
+    assert repo.rebuild() > 0
+    assert repo.groups("enrollment_year") == before
+
+
+@pytest.mark.integration
+def test_student_stats_fold_keeps_totals(db_session, generator):
+    """测试写入只追加增量；读取时计入未折叠的增量，折叠前后结果一致且增量被清空"""
+    repo = StudentStatsRepository(db_session)
+    repo.fold()
+    base = db_session.scalar(select(func.coalesce(func.sum(StudentStat.n), 0)))
+
+    db_session.add_all(generator.generate_students(5))
+    db_session.flush()
+    assert db_session.scalar(select(func.coalesce(func.sum(StudentStat.n), 0))) == base  # 写入不改汇总表
+    assert db_session.scalar(select(func.count()).select_from(StudentStatDelta)) > 0
+    before = repo.groups("major")
+
+    assert repo.fold() > 0
+    assert db_session.scalar(select(func.count()).select_from(StudentStatDelta)) == 0
+    assert repo.groups("major") == before